@@ -0,0 +1,120 @@
+# Benchmark book scraping against the local GR simulator under each fault profile: goodput, faults served,
+# retries and recovery time after an outage. The fetch backend scrapes without a browser (GoodReadsScraper.get_books
+# with processes), selenium and cdp run the browser loop of get_books (Chrome needed).
+# Usage: python bench_faults.py [profile ...] [--backend fetch|selenium|cdp] [--books N] [--workers N]
+#        [--processes N] [--tabs N] [--backoff S]
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from parsepool import scrape_books  # noqa: E402
+from simulator import PROFILES  # noqa: E402
+from simulator import Simulator  # noqa: E402
+
+
+def scrape_fetch(sim, links, workers, processes, backoff):
+    scraped, errors = scrape_books(links, None, workers, processes, backoff=backoff)
+    good = sum(book is not None for book in scraped)
+    return good, len(links) - good - len(errors)
+
+
+def scrape_browser(sim, links, backend, tabs, backoff):
+    from goodreadsscraper import GoodReadsScraper
+    from goodreadsscraper import default_chrome_options
+
+    options = None
+    if backend == "selenium":
+        options = default_chrome_options()
+        options.add_argument("--headless")
+    scraper = GoodReadsScraper(
+        sim.list_url, options, backend=backend, tabs=tabs, backoff=backoff
+    )
+    scraper.book_links = links
+    # GR robots.txt is not read, the simulator disallows no book pages
+    scraper.robots_disallow = []
+
+    # get_books writes its output files to the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as out:
+        os.chdir(out)
+        try:
+            scraper.get_books()
+        finally:
+            os.chdir(cwd)
+    return len(scraper.books), len(scraper.broken)
+
+
+def run(
+    profile,
+    books=1000,
+    workers=16,
+    processes=2,
+    backoff=0.5,
+    seed=0,
+    backend="fetch",
+    tabs=8,
+):
+    with Simulator(profile, books, seed=seed) as sim:
+        links = sim.links()
+        start = time.perf_counter()
+        if backend == "fetch":
+            good, broken = scrape_fetch(sim, links, workers, processes, backoff)
+        else:
+            good, broken = scrape_browser(sim, links, backend, tabs, backoff)
+        elapsed = time.perf_counter() - start
+        recovery = sim.recovery_time()
+        return {
+            "profile": profile,
+            "backend": backend,
+            "pages": len(links),
+            "books": good,
+            "broken": broken,
+            # Pages given up after retries, or never reached when get_books stopped
+            "failed": len(links) - good - broken,
+            "seconds": round(elapsed, 2),
+            # Goodput: books scraped per second, faults and retries only count as time spent
+            "goodputPerSecond": round(good / elapsed, 1),
+            "requests": sim.stats["requests"],
+            "retries": sim.stats["requests"] - len(links),
+            "faults": {
+                k: v for k, v in sim.stats.items() if k not in ("requests", "ok")
+            },
+            "recoverySeconds": None if recovery is None else round(recovery, 2),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("profiles", nargs="*", default=sorted(PROFILES))
+    parser.add_argument(
+        "--backend", choices=("fetch", "selenium", "cdp"), default="fetch"
+    )
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--tabs", type=int, default=8)
+    parser.add_argument("--backoff", type=float, default=0.5)
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            [
+                run(
+                    p,
+                    args.books,
+                    args.workers,
+                    args.processes,
+                    args.backoff,
+                    backend=args.backend,
+                    tabs=args.tabs,
+                )
+                for p in args.profiles
+            ],
+            indent=1,
+        )
+    )
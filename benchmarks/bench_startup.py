@@ -0,0 +1,53 @@
+# Benchmark GoodReadsScraper startup for data-only jobs: module import and offline construction time.
+# Each measure runs in a fresh interpreter so imports are not cached. Usage: python bench_startup.py [runs]
+import os
+import sys
+import json
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+MEASURE = """
+import time
+start = time.perf_counter()
+import goodreadsscraper
+imported = time.perf_counter()
+scraper = goodreadsscraper.GoodReadsScraper(
+    "https://www.goodreads.com/list/show/1.Best_Books_Ever", offline=True
+)
+constructed = time.perf_counter()
+print((imported - start) * 1000, (constructed - imported) * 1000)
+print(int("selenium" in __import__("sys").modules), int("lxml" in __import__("sys").modules))
+"""
+
+
+def run(runs=20):
+    imports = []
+    constructions = []
+    loaded = None
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE],
+            cwd=SRC,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split("\n")
+        import_ms, construct_ms = output[0].split()
+        imports.append(float(import_ms))
+        constructions.append(float(construct_ms))
+        loaded = output[1].split()
+    imports.sort()
+    constructions.sort()
+    return {
+        "runs": runs,
+        "importMedianMs": round(imports[runs // 2], 2),
+        "importMaxMs": round(imports[-1], 2),
+        "constructMedianMs": round(constructions[runs // 2], 3),
+        "seleniumLoaded": loaded[0] == "1",
+        "lxmlLoaded": loaded[1] == "1",
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20), indent=1))
@@ -0,0 +1,332 @@
+# Import necessary libraries.
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from datasets import parse_list
+from datasets import read_books
+from extractors import compile_specs
+from extractors import parse_author
+from extractors import parse_page
+from fetch import fetch
+from fetch import read_robots
+from fetch import robots_allowed
+from pipeline import Pipeline
+from pipeline import Stage
+
+BOOK_URL = "https://www.goodreads.com/book/show/"
+AUTHOR_URL = "https://www.goodreads.com/author/show/"
+
+# Columns of the authors table, in order.
+AUTHOR_COLUMNS = (
+    "authorId",
+    "url",
+    "name",
+    "bio",
+    "followers",
+    "averageRating",
+    "numRatings",
+    "works",
+    "fetchedAt",
+)
+
+_AUTHOR_ID = re.compile(r"/author/show/(\d+)")
+
+
+def author_id(url):
+    """
+    Takes the GR author ID from an author profile URL, e.g. "1077326" from /author/show/1077326.J_K_Rowling.
+
+    :param url: The author URL.
+    :return: The author ID, None if url is not an author URL.
+    """
+    match = _AUTHOR_ID.search(url or "")
+    if match is None:
+        return None
+    return match.group(1)
+
+
+class AuthorCache:
+    """
+    Persistent SQLite cache of author profiles and of the authors of each book, shared between runs and lists,
+    and of the number of failed fetches of each page not cached yet.
+
+    Attributes:
+        file (string): The SQLite file.
+    """
+
+    def __init__(self, file="authors.db"):
+        """
+        The constructor for AuthorCache class.
+
+        :param file: The SQLite file, created if it does not exist (optional).
+        """
+        self.file = file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS authors (authorId TEXT PRIMARY KEY, url TEXT, name TEXT, bio TEXT, "
+            "followers INTEGER, averageRating REAL, numRatings INTEGER, works INTEGER, fetchedAt REAL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS book_authors (bookId TEXT, position INTEGER, authorId TEXT, "
+            "PRIMARY KEY (bookId, position))"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS failures (url TEXT PRIMARY KEY, attempts INTEGER)"
+        )
+        self._connection.commit()
+
+    def get(self, author_id):
+        """
+        Returns a cached author.
+
+        :param author_id: The GR author ID.
+        :return: Author dict, None if not cached.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM authors WHERE authorId = ?", (author_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(AUTHOR_COLUMNS, row))
+
+    def missing(self, author_ids, max_age=None):
+        """
+        Returns the authors not cached, or cached longer ago than max_age.
+
+        :param author_ids: Iterable of GR author IDs.
+        :param max_age: Maximum age in seconds of cached authors (optional, cached authors never expire).
+        :return: List of distinct author IDs, in first seen order.
+        """
+        oldest = 0 if max_age is None else time.time() - max_age
+        with self._lock:
+            fresh = set(
+                row[0]
+                for row in self._connection.execute(
+                    "SELECT authorId FROM authors WHERE fetchedAt >= ?", (oldest,)
+                )
+            )
+        missing = []
+        for author in author_ids:
+            if author not in fresh:
+                fresh.add(author)
+                missing.append(author)
+        return missing
+
+    def put(self, author):
+        """
+        Saves an author.
+
+        :param author: Author dict with AUTHOR_COLUMNS keys (fetchedAt defaults to now).
+        :return: None
+        """
+        author = dict(author)
+        author.setdefault("fetchedAt", time.time())
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO authors VALUES (%s)"
+                % ", ".join("?" * len(AUTHOR_COLUMNS)),
+                [author.get(column) for column in AUTHOR_COLUMNS],
+            )
+            self._connection.commit()
+
+    def book_authors(self, book_id):
+        """
+        Returns the cached authors of a book.
+
+        :param book_id: The GR bookId.
+        :return: List of author IDs in book order, None if the book is not cached.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT authorId FROM book_authors WHERE bookId = ? ORDER BY position",
+                (book_id,),
+            ).fetchall()
+        if len(rows) == 0:
+            return None
+        return [row[0] for row in rows]
+
+    def put_book_authors(self, book_id, author_ids):
+        """
+        Saves the authors of a book.
+
+        :param book_id: The GR bookId.
+        :param author_ids: List of author IDs in book order.
+        :return: None
+        """
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM book_authors WHERE bookId = ?", (book_id,)
+            )
+            self._connection.executemany(
+                "INSERT INTO book_authors VALUES (?, ?, ?)",
+                [(book_id, i, author) for i, author in enumerate(author_ids)],
+            )
+            self._connection.commit()
+
+    def attempts(self, url):
+        """
+        Returns the number of failed fetches of a page.
+
+        :param url: The page URL.
+        :return: Int
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT attempts FROM failures WHERE url = ?", (url,)
+            ).fetchone()
+        return 0 if row is None else row[0]
+
+    def add_failure(self, url):
+        """
+        Records a failed fetch of a page, which stays pending for the next runs.
+
+        :param url: The page URL.
+        :return: None
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO failures VALUES (?, 1) "
+                "ON CONFLICT (url) DO UPDATE SET attempts = attempts + 1",
+                (url,),
+            )
+            self._connection.commit()
+
+    def close(self):
+        """
+        Closes the cache.
+
+        :return: None
+        """
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def resolve_book_authors(book_id):
+    """
+    Fetches a book page and reads the profile URL of its authors.
+
+    :param book_id: The GR bookId.
+    :return: List of author IDs in book order.
+    """
+    url = BOOK_URL + book_id
+    values = compile_specs(["authorUrls"]).extract(parse_page(fetch(url), url))
+    author_ids = [author_id(u) for u in values["authorUrls"]]
+    return [a for a in author_ids if a is not None]
+
+
+def fetch_author(author):
+    """
+    Fetches an author profile.
+
+    :param author: The GR author ID.
+    :return: Author dict with AUTHOR_COLUMNS keys.
+    """
+    url = AUTHOR_URL + author
+    profile = parse_author(parse_page(fetch(url), url))
+    profile.update({"authorId": author, "url": url, "fetchedAt": time.time()})
+    return profile
+
+
+def crawl_authors(books, cache, workers=4, max_age=None, disallow=(), max_attempts=3):
+    """
+    Links books to their authors and fetches each author not in the cache once.
+
+    Book authors are taken from the authorUrls field when scraped, then from the cache, and book pages are
+    only fetched for the remaining books. Pages disallowed by robots.txt are never fetched, and pages that
+    failed are fetched again by later runs until they failed max_attempts times.
+    :param books: Iterable of book dicts (bookId and optionally authorUrls).
+    :param cache: The AuthorCache.
+    :param workers: Number of concurrent fetches (optional).
+    :param max_age: Refetch authors cached longer ago than max_age seconds (optional).
+    :param disallow: robots.txt path rules (optional, see fetch.read_robots).
+    :param max_attempts: Number of failed fetches after which a page is given up (optional).
+    :return: Tuple (dict bookId -> list of author IDs, list of (item, exception) of failed fetches).
+    """
+
+    def pending(url):
+        return robots_allowed(url, disallow) and cache.attempts(url) < max_attempts
+
+    book_authors = {}
+    unresolved = []
+    for book in books:
+        book_id = str(book["bookId"])
+        author_urls = parse_list(book.get("authorUrls"))
+        if len(author_urls) != 0:
+            author_ids = [a for a in map(author_id, author_urls) if a is not None]
+            cache.put_book_authors(book_id, author_ids)
+        else:
+            author_ids = cache.book_authors(book_id)
+        if author_ids is None:
+            if pending(BOOK_URL + book_id):
+                unresolved.append(book_id)
+        else:
+            book_authors[book_id] = author_ids
+
+    def resolve(_, book_id):
+        author_ids = resolve_book_authors(book_id)
+        cache.put_book_authors(book_id, author_ids)
+        book_authors[book_id] = author_ids
+
+    def profile(_, author):
+        cache.put(fetch_author(author))
+
+    errors = []
+    resolving = Pipeline([Stage("book_authors", resolve, workers)])
+    resolving.run(unresolved)
+    for _, item, error in resolving.errors:
+        cache.add_failure(BOOK_URL + item)
+        errors.append((item, error))
+
+    # Each distinct author is fetched once, however many books and lists it appears in
+    fetching = Pipeline([Stage("authors", profile, workers)])
+    fetching.run(
+        author
+        for author in cache.missing(
+            (a for author_ids in book_authors.values() for a in author_ids), max_age
+        )
+        if pending(AUTHOR_URL + author)
+    )
+    for _, item, error in fetching.errors:
+        cache.add_failure(AUTHOR_URL + item)
+        errors.append((item, error))
+    return book_authors, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fetch the authors of the books of a books file into the author cache."
+    )
+    parser.add_argument("books")
+    parser.add_argument("--cache", default="authors.db")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-age-days", type=float, default=None)
+    args = parser.parse_args(argv)
+    max_age = None if args.max_age_days is None else args.max_age_days * 86400
+    with AuthorCache(args.cache) as cache:
+        book_authors, errors = crawl_authors(
+            read_books(args.books), cache, args.workers, max_age, read_robots()
+        )
+    print(
+        "%d books linked to %d authors, %d fetches failed"
+        % (
+            len(book_authors),
+            len(set(a for ids in book_authors.values() for a in ids)),
+            len(errors),
+        )
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
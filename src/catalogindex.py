@@ -0,0 +1,256 @@
+# Import necessary libraries.
+import os
+import re
+import sys
+import json
+import argparse
+from datasets import parse_list
+from datasets import read_books
+from datasets import split_authors
+
+# Index keys taken from each book.
+INDEX_KINDS = ("genre", "author", "award", "language", "series")
+
+_AWARD_YEAR = re.compile(r"\s*\(\d{4}\)$")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def book_keys(book):
+    """
+    Computes the index keys of a book.
+
+    :param book: Book dict as scraped or read from a books file.
+    :return: Dict mapping each index kind to the list of keys of the book.
+    """
+    series = str(book.get("series") or "").split(" #")[0].strip()
+    language = str(book.get("language") or "").strip()
+    return {
+        "genre": sorted(set(parse_list(book.get("genres")))),
+        "author": sorted(set(split_authors(book.get("author", "")))),
+        "award": sorted(
+            set(_AWARD_YEAR.sub("", a) for a in parse_list(book.get("awards")))
+        ),
+        "language": [language] if language != "" else [],
+        "series": [series] if series != "" else [],
+    }
+
+
+class CatalogIndex:
+    """
+    Inverted indexes from genre, author, award, language and series to bookIds, with per-key aggregates.
+
+    Each book's contribution is kept, so updates only touch the keys of books that changed.
+
+    Attributes:
+        postings (dict): kind -> key -> set of bookIds.
+        aggregates (dict): kind -> key -> {"count", "ratingSum", "ratedCount", "totalRatings"}.
+        entries (dict): bookId -> {"keys", "rating", "numRatings"}, the indexed version of each book.
+    """
+
+    def __init__(self):
+        self.postings = {kind: {} for kind in INDEX_KINDS}
+        self.aggregates = {kind: {} for kind in INDEX_KINDS}
+        self.entries = {}
+
+    def _apply(self, book_id, entry, sign):
+        rating = entry["rating"]
+        for kind, keys in entry["keys"].items():
+            for key in keys:
+                ids = self.postings[kind].setdefault(key, set())
+                aggregate = self.aggregates[kind].setdefault(
+                    key,
+                    {"count": 0, "ratingSum": 0.0, "ratedCount": 0, "totalRatings": 0},
+                )
+                if sign > 0:
+                    ids.add(book_id)
+                else:
+                    ids.discard(book_id)
+                aggregate["count"] += sign
+                aggregate["totalRatings"] += sign * entry["numRatings"]
+                if rating is not None:
+                    aggregate["ratingSum"] += sign * rating
+                    aggregate["ratedCount"] += sign
+                if aggregate["count"] == 0:
+                    del self.postings[kind][key]
+                    del self.aggregates[kind][key]
+
+    def update_book(self, book):
+        """
+        Adds or updates a book.
+
+        :param book: Book dict.
+        :return: True if the index changed.
+        """
+        book_id = str(book.get("bookId"))
+        num_ratings = _to_float(book.get("numRatings"))
+        entry = {
+            "keys": book_keys(book),
+            "rating": _to_float(book.get("rating")),
+            "numRatings": int(num_ratings) if num_ratings is not None else 0,
+        }
+        previous = self.entries.get(book_id)
+        if previous == entry:
+            return False
+        if previous is not None:
+            self._apply(book_id, previous, -1)
+        self._apply(book_id, entry, 1)
+        self.entries[book_id] = entry
+        return True
+
+    def remove_book(self, book_id):
+        """
+        Removes a book.
+
+        :param book_id: The GR bookId.
+        :return: None
+        """
+        previous = self.entries.pop(book_id, None)
+        if previous is not None:
+            self._apply(book_id, previous, -1)
+
+    def update(self, books, snapshot=True):
+        """
+        Updates the index from books, touching only new, changed and removed books.
+
+        :param books: Iterable of book dicts.
+        :param snapshot: Whether books is the whole dataset, so books not in it are removed (optional).
+        :return: Tuple (changed, removed) counts.
+        """
+        seen = set()
+        changed = 0
+        for book in books:
+            seen.add(str(book.get("bookId")))
+            changed += self.update_book(book)
+        removed = 0
+        if snapshot:
+            for book_id in set(self.entries) - seen:
+                self.remove_book(book_id)
+                removed += 1
+        return changed, removed
+
+    def books(self, kind, key):
+        """
+        Returns the bookIds of a key.
+
+        :param kind: One of INDEX_KINDS.
+        :param key: The genre, author, award, language or series.
+        :return: Set of bookIds.
+        """
+        return self.postings[kind].get(key, set())
+
+    def aggregate(self, kind, key):
+        """
+        Returns the aggregates of a key.
+
+        :param kind: One of INDEX_KINDS.
+        :param key: The genre, author, award, language or series.
+        :return: Dict with count, meanRating and totalRatings (None if the key is not indexed).
+        """
+        aggregate = self.aggregates[kind].get(key)
+        if aggregate is None:
+            return None
+        mean = None
+        if aggregate["ratedCount"] > 0:
+            mean = round(aggregate["ratingSum"] / aggregate["ratedCount"], 3)
+        return {
+            "count": aggregate["count"],
+            "meanRating": mean,
+            "totalRatings": aggregate["totalRatings"],
+        }
+
+    def top_rated(self, kind, key, limit=10, min_ratings=0):
+        """
+        Returns the top rated books of a key.
+
+        :param kind: One of INDEX_KINDS.
+        :param key: The genre, author, award, language or series.
+        :param limit: Maximum number of books (optional).
+        :param min_ratings: Minimum number of ratings of the books (optional).
+        :return: List of (bookId, rating) tuples, best first.
+        """
+        rated = [
+            (book_id, self.entries[book_id]["rating"])
+            for book_id in self.books(kind, key)
+            if self.entries[book_id]["rating"] is not None
+            and self.entries[book_id]["numRatings"] >= min_ratings
+        ]
+        rated.sort(key=lambda item: (-item[1], item[0]))
+        return rated[:limit]
+
+    def save(self, file):
+        """
+        Saves the index (per-book entries and aggregates) to a json file.
+
+        :param file: The index file.
+        :return: None
+        """
+        with open(file + ".tmp", "w") as f:
+            json.dump({"entries": self.entries, "aggregates": self.aggregates}, f)
+        os.replace(file + ".tmp", file)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Loads an index saved with save, or returns an empty index if the file does not exist.
+
+        :param file: The index file.
+        :return: CatalogIndex
+        """
+        index = cls()
+        if not os.path.exists(file):
+            return index
+        with open(file) as f:
+            data = json.load(f)
+        index.entries = data["entries"]
+        index.aggregates = data["aggregates"]
+        for book_id, entry in index.entries.items():
+            for kind, keys in entry["keys"].items():
+                for key in keys:
+                    index.postings[kind].setdefault(key, set()).add(book_id)
+        return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Genre, author, award, language and series indexes."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser(
+        "update", help="Create or update the indexes from a books file."
+    )
+    update.add_argument("index")
+    update.add_argument("books")
+    query = commands.add_parser(
+        "query", help="Aggregates and top rated books of a key."
+    )
+    query.add_argument("index")
+    query.add_argument("kind", choices=INDEX_KINDS)
+    query.add_argument("key")
+    query.add_argument("--limit", type=int, default=10)
+    query.add_argument("--min-ratings", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    index = CatalogIndex.load(args.index)
+    if args.command == "update":
+        changed, removed = index.update(read_books(args.books))
+        index.save(args.index)
+        print(
+            "%d books indexed (%d changed, %d removed)"
+            % (len(index.entries), changed, removed)
+        )
+    else:
+        print(json.dumps(index.aggregate(args.kind, args.key)))
+        for book_id, rating in index.top_rated(
+            args.kind, args.key, args.limit, args.min_ratings
+        ):
+            print("%s\t%s" % (rating, book_id))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,475 @@
+# Import necessary libraries. websockets is imported when a browser is started (optional dependency).
+import os
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import subprocess
+
+# Chrome executables looked up in PATH when none is given.
+CHROME_EXECUTABLES = (
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+)
+
+# Default chrome arguments: background tabs are not throttled, so every tab of the pool runs at full speed.
+DEFAULT_ARGUMENTS = (
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--no-sandbox",
+    "--window-size=1920,1080",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+)
+
+
+class CdpError(Exception):
+    """
+    Raised when a DevTools protocol command fails, a page does not load or a script throws.
+    """
+
+
+def find_chrome():
+    """
+    Finds a chrome or chromium executable in PATH.
+
+    :return: The executable path, None if not found.
+    """
+    for name in CHROME_EXECUTABLES:
+        path = shutil.which(name)
+        if path is not None:
+            return path
+    return None
+
+
+class _Connection:
+    # One websocket to the browser, commands and events of every tab are multiplexed by session id
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self._next_id = 0
+        self._pending = {}
+        self._waiters = {}
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def _read(self):
+        try:
+            async for message in self.websocket:
+                data = json.loads(message)
+                if "id" in data:
+                    future = self._pending.pop(data["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in data:
+                        future.set_exception(CdpError(data["error"].get("message")))
+                    else:
+                        future.set_result(data.get("result", {}))
+                else:
+                    key = (data.get("sessionId"), data.get("method"))
+                    for future in self._waiters.pop(key, []):
+                        if not future.done():
+                            future.set_result(data.get("params", {}))
+        finally:
+            # Fail everything still waiting once the browser is gone
+            for future in list(self._pending.values()):
+                if not future.done():
+                    future.set_exception(CdpError("Browser connection closed"))
+            self._pending.clear()
+
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        self._next_id += 1
+        message = {"id": self._next_id, "method": method, "params": params or {}}
+        if session_id is not None:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        await self.websocket.send(json.dumps(message))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(message["id"], None)
+            raise CdpError("%s timed out" % method)
+
+    def event(self, method, session_id=None):
+        # Future set with the params of the next event of a session
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((session_id, method), []).append(future)
+        return future
+
+    async def close(self):
+        await self.websocket.close()
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class Tab:
+    """
+    A browser tab driven through the DevTools protocol. Many tabs run concurrently in one browser process.
+
+    Attributes:
+        target_id (string): The DevTools target of the tab.
+        session_id (string): The DevTools session attached to the target.
+    """
+
+    def __init__(self, connection, target_id, session_id):
+        """
+        The constructor for Tab class, use CdpBrowser.new_tab to create tabs.
+
+        :param connection: The browser connection.
+        :param target_id: The DevTools target of the tab.
+        :param session_id: The DevTools session attached to the target.
+        """
+        self._connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+
+    async def send(self, method, params=None, timeout=30):
+        """
+        Sends a DevTools command to the tab.
+
+        :param method: The command, e.g. "Page.reload".
+        :param params: The command parameters (optional).
+        :param timeout: Seconds to wait for the response (optional).
+        :return: Dict with the command result. CdpError if it fails.
+        """
+        return await self._connection.send(method, params, self.session_id, timeout)
+
+    async def add_script(self, source):
+        """
+        Adds a script run on every new document of the tab before page scripts.
+
+        :param source: The JavaScript source.
+        :return: None
+        """
+        await self.send("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+
+    async def navigate(self, url, timeout=30):
+        """
+        Navigates to url and waits for the load event.
+
+        :param url: The URL.
+        :param timeout: Seconds to wait for the page to load (optional).
+        :return: None. CdpError if the page cannot be loaded.
+        """
+        loaded = self._connection.event("Page.loadEventFired", self.session_id)
+        result = await self.send("Page.navigate", {"url": url}, timeout)
+        if result.get("errorText"):
+            loaded.cancel()
+            raise CdpError("Cannot load %s: %s" % (url, result["errorText"]))
+        try:
+            await asyncio.wait_for(loaded, timeout)
+        except asyncio.TimeoutError:
+            raise CdpError("Cannot load %s: timed out" % url)
+
+    async def evaluate(self, expression, timeout=30):
+        """
+        Evaluates a JavaScript expression in the page, awaiting it if it is a promise.
+
+        :param expression: The JavaScript expression.
+        :param timeout: Seconds to wait for the result (optional).
+        :return: The JSON value of the expression. CdpError if it throws.
+        """
+        result = await self.send(
+            "Runtime.evaluate",
+            {"expression": expression, "returnByValue": True, "awaitPromise": True},
+            timeout,
+        )
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CdpError(
+                details.get("exception", {}).get("description") or details.get("text")
+            )
+        return result.get("result", {}).get("value")
+
+    async def call(self, function_body, *args, timeout=30):
+        """
+        Runs a function body in the page, as selenium execute_script does (arguments, return).
+
+        :param function_body: The JavaScript function body.
+        :param args: JSON serializable arguments, available as arguments[i].
+        :param timeout: Seconds to wait for the result (optional).
+        :return: The JSON value returned.
+        """
+        return await self.evaluate(
+            "(function () {%s}).apply(null, %s)" % (function_body, json.dumps(args)),
+            timeout,
+        )
+
+    async def wait_for(self, expression, timeout=10, interval=0.1):
+        """
+        Polls a JavaScript expression until it is truthy, without blocking other tabs.
+
+        :param expression: The JavaScript expression.
+        :param timeout: Maximum seconds to wait (optional).
+        :param interval: Seconds between polls (optional).
+        :return: The first truthy value, None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            value = await self.evaluate(expression)
+            if value:
+                return value
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(interval)
+
+    async def html(self):
+        """
+        Returns the current DOM serialized as html.
+
+        :return: String
+        """
+        return await self.evaluate("document.documentElement.outerHTML")
+
+    async def close(self):
+        """
+        Closes the tab.
+
+        :return: None
+        """
+        await self._connection.send("Target.closeTarget", {"targetId": self.target_id})
+
+
+class CdpBrowser:
+    """
+    A single chrome process driven through the DevTools protocol, hosting many concurrent tabs (requires
+    websockets).
+
+    Attributes:
+        executable (string): The chrome executable.
+        headless (bool): Whether chrome runs headless.
+        arguments (list of string): The chrome command line arguments.
+        user_data_dir (string): The chrome profile directory, a temporary one by default.
+        process (Popen): The chrome process, None until started.
+    """
+
+    def __init__(
+        self, executable=None, headless=True, arguments=None, user_data_dir=None
+    ):
+        """
+        The constructor for CdpBrowser class.
+
+        :param executable: The chrome executable (optional, looked up in PATH).
+        :param headless: Run chrome headless (optional).
+        :param arguments: Chrome arguments to replace defaults (optional, see DEFAULT_ARGUMENTS).
+        :param user_data_dir: The chrome profile directory (optional, a temporary one is removed on close).
+        """
+        self.executable = executable or find_chrome()
+        self.headless = headless
+        self.arguments = list(DEFAULT_ARGUMENTS if arguments is None else arguments)
+        self.user_data_dir = user_data_dir
+        self.process = None
+        self._temporary_dir = None
+        self._connection = None
+        self._scripts = []
+
+    async def start(self, timeout=30):
+        """
+        Starts chrome and connects to it.
+
+        :param timeout: Seconds to wait for chrome to start (optional).
+        :return: None
+        """
+        import websockets
+
+        if self.executable is None:
+            raise CdpError("Chrome executable not found")
+        if self.user_data_dir is None:
+            self._temporary_dir = tempfile.mkdtemp(prefix="cdpbrowser_")
+            self.user_data_dir = self._temporary_dir
+        port_file = os.path.join(self.user_data_dir, "DevToolsActivePort")
+        if os.path.exists(port_file):
+            os.remove(port_file)
+
+        command = [self.executable, "--remote-debugging-port=0"]
+        command.append("--user-data-dir=" + self.user_data_dir)
+        if self.headless:
+            command.append("--headless=new")
+        command += self.arguments + ["about:blank"]
+        self.process = subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        # Chrome writes the port and browser path once the DevTools server listens
+        deadline = time.monotonic() + timeout
+        lines = []
+        while len(lines) < 2:
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.close_process()
+                raise CdpError("Chrome did not start")
+            await asyncio.sleep(0.05)
+            if os.path.exists(port_file):
+                with open(port_file) as f:
+                    lines = f.read().split()
+        websocket = await websockets.connect(
+            "ws://127.0.0.1:%s%s" % (lines[0], lines[1]), max_size=None
+        )
+        self._connection = _Connection(websocket)
+
+    def add_script(self, source):
+        """
+        Adds a script run on every new document of the tabs created afterwards.
+
+        :param source: The JavaScript source.
+        :return: None
+        """
+        self._scripts.append(source)
+
+    async def new_tab(self):
+        """
+        Opens a tab.
+
+        :return: Tab
+        """
+        target = await self._connection.send(
+            "Target.createTarget", {"url": "about:blank"}
+        )
+        session = await self._connection.send(
+            "Target.attachToTarget", {"targetId": target["targetId"], "flatten": True}
+        )
+        tab = Tab(self._connection, target["targetId"], session["sessionId"])
+        await tab.send("Page.enable")
+        for source in self._scripts:
+            await tab.add_script(source)
+        return tab
+
+    async def close(self):
+        """
+        Closes chrome and removes its temporary profile.
+
+        :return: None
+        """
+        if self._connection is not None:
+            try:
+                await self._connection.send("Browser.close", timeout=5)
+            except CdpError:
+                pass
+            await self._connection.close()
+            self._connection = None
+        self.close_process()
+
+    def close_process(self):
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+            self.process = None
+        if self._temporary_dir is not None:
+            shutil.rmtree(self._temporary_dir, ignore_errors=True)
+            self._temporary_dir = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class TabPool:
+    """
+    A fixed number of tabs of one browser, reused to process items concurrently.
+
+    Attributes:
+        browser (CdpBrowser): The browser.
+        size (int): The number of tabs (the concurrency limit).
+        errors (list of tuple): The (item, exception) of items that failed.
+    """
+
+    def __init__(self, browser, size=8):
+        """
+        The constructor for TabPool class.
+
+        :param browser: The started CdpBrowser.
+        :param size: The number of tabs (optional).
+        """
+        self.browser = browser
+        self.size = size
+        self.errors = []
+        self._tabs = []
+
+    async def map(self, func, items):
+        """
+        Runs func(tab, item) for every item, each tab processing one item at a time.
+
+        :param func: Coroutine function called as func(tab, item).
+        :param items: Iterable of items.
+        :return: List of results in items order (None for items that failed, see errors).
+        """
+        items = list(items)
+        while len(self._tabs) < min(self.size, len(items)):
+            self._tabs.append(await self.browser.new_tab())
+        results = [None] * len(items)
+        positions = iter(range(len(items)))
+
+        async def work(tab):
+            for position in positions:
+                try:
+                    results[position] = await func(tab, items[position])
+                except Exception as e:
+                    # A failed item is reported and dropped, the tab goes on
+                    self.errors.append((items[position], e))
+
+        await asyncio.gather(*[work(tab) for tab in self._tabs])
+        return results
+
+    async def close(self):
+        """
+        Closes the tabs.
+
+        :return: None
+        """
+        for tab in self._tabs:
+            try:
+                await tab.close()
+            except CdpError:
+                pass
+        self._tabs = []
+
+
+def run(main, scripts=(), **options):
+    """
+    Starts a browser, runs main(browser) on it and closes it, from synchronous code.
+
+    :param main: Coroutine function called as main(browser).
+    :param scripts: Scripts run on every new document of every tab (optional).
+    :param options: CdpBrowser arguments (optional).
+    :return: The result of main.
+    """
+
+    async def run_browser():
+        async with CdpBrowser(**options) as browser:
+            for source in scripts:
+                browser.add_script(source)
+            return await main(browser)
+
+    return asyncio.run(run_browser())
+
+
+def map_tabs(func, items, tabs=8, scripts=(), **options):
+    """
+    Runs func(tab, item) for every item over a pool of tabs of one browser, from synchronous code.
+
+    :param func: Coroutine function called as func(tab, item).
+    :param items: Iterable of items.
+    :param tabs: The number of concurrent tabs (optional).
+    :param scripts: Scripts run on every new document of every tab (optional).
+    :param options: CdpBrowser arguments (optional).
+    :return: Tuple (results in items order, list of (item, exception) of failed items).
+    """
+
+    async def main(browser):
+        pool = TabPool(browser, tabs)
+        try:
+            return await pool.map(func, items), pool.errors
+        finally:
+            await pool.close()
+
+    return run(main, scripts, **options)
@@ -0,0 +1,128 @@
+# Import necessary libraries.
+import os
+import json
+import time
+
+# Fields tracked between crawls.
+TRACKED_FIELDS = (
+    "rating",
+    "numRatings",
+    "ratingsByStars",
+    "bbeScore",
+    "bbeVotes",
+    "price",
+)
+STATE_FILE = "_state.json"
+
+
+def _tracked_values(book):
+    # Values are compared and stored as strings, as read back from csv
+    return {f: str(book[f]) for f in TRACKED_FIELDS if f in book}
+
+
+def diff_books(state, books, snapshot=True, listed=()):
+    """
+    Compares books with the tracked values of the previous crawl.
+
+    :param state: Dict bookId -> {field: value} of the previous crawl.
+    :param books: Iterable of book dicts of the current crawl.
+    :param snapshot: Whether books is the whole list, so books missing from it are removed (optional).
+    :param listed: bookIds still on the list though missing from books, e.g. broken links, never removed
+        (optional).
+    :return: Tuple (changes, new_state), changes being a list of (bookId, op, field, value) with op one of
+        "new", "changed" or "removed" (field and value are None for removed books).
+    """
+    changes = []
+    new_state = dict(state)
+    seen = set(str(book_id) for book_id in listed)
+    for book in books:
+        book_id = str(book.get("bookId"))
+        seen.add(book_id)
+        values = _tracked_values(book)
+        previous = state.get(book_id)
+        if previous is None:
+            for field, value in values.items():
+                changes.append((book_id, "new", field, value))
+            new_state[book_id] = values
+            continue
+        for field, value in values.items():
+            if previous.get(field) != value:
+                changes.append((book_id, "changed", field, value))
+        new_state[book_id] = dict(previous, **values)
+    if snapshot:
+        for book_id in sorted(set(state) - seen):
+            changes.append((book_id, "removed", None, None))
+            del new_state[book_id]
+    return changes, new_state
+
+
+def write_changes(changes, changelog_dir, crawl_time=None):
+    """
+    Writes changes as a Parquet file partitioned by crawl date (changelog_dir/date=YYYY-MM-DD/), requires pyarrow.
+
+    :param changes: List of (bookId, op, field, value) tuples.
+    :param changelog_dir: The changelog root directory.
+    :param crawl_time: Crawl time as epoch seconds (optional, defaults to now).
+    :return: The written file, None when there are no changes.
+    """
+    if len(changes) == 0:
+        return None
+    # pyarrow is only needed to write the changelog
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if crawl_time is None:
+        crawl_time = time.time()
+    book_ids, ops, fields, values = zip(*changes)
+    table = pa.table(
+        {
+            "crawlTime": pa.array(
+                [int(crawl_time * 1000)] * len(changes), pa.timestamp("ms", tz="UTC")
+            ),
+            "bookId": pa.array(book_ids, pa.string()),
+            "op": pa.array(ops, pa.string()).dictionary_encode(),
+            "field": pa.array(fields, pa.string()).dictionary_encode(),
+            "value": pa.array(values, pa.string()),
+        }
+    )
+    partition = os.path.join(
+        changelog_dir, "date=" + time.strftime("%Y-%m-%d", time.gmtime(crawl_time))
+    )
+    os.makedirs(partition, exist_ok=True)
+    file = os.path.join(
+        partition,
+        "changes_%s%03d.parquet"
+        % (
+            time.strftime("%H%M%S", time.gmtime(crawl_time)),
+            int(crawl_time * 1000) % 1000,
+        ),
+    )
+    pq.write_table(table, file, compression="zstd")
+    return file
+
+
+def record_crawl(books, changelog_dir, snapshot=True, listed=()):
+    """
+    Emits the changelog of a crawl against the previous one and updates the stored state.
+
+    :param books: Iterable of book dicts of the current crawl.
+    :param changelog_dir: The changelog root directory, also holding the state of the last crawl.
+    :param snapshot: Whether books is the whole list, so books missing from it are removed (optional).
+    :param listed: bookIds still on the list though missing from books, never removed (optional).
+    :return: Tuple (written file or None, number of changes).
+    """
+    state_file = os.path.join(changelog_dir, STATE_FILE)
+    state = {}
+    if os.path.exists(state_file):
+        with open(state_file) as f:
+            state = json.load(f)
+
+    changes, new_state = diff_books(state, books, snapshot, listed)
+    file = write_changes(changes, changelog_dir)
+
+    # Update state only once changes are safely written
+    os.makedirs(changelog_dir, exist_ok=True)
+    with open(state_file + ".tmp", "w") as f:
+        json.dump(new_state, f)
+    os.replace(state_file + ".tmp", state_file)
+    return file, len(changes)
@@ -0,0 +1,174 @@
+# Import necessary libraries.
+import os
+import mmap
+import struct
+
+# Index record header: bookId length, pack number, offset and length of the cover in the pack.
+_RECORD = struct.Struct("<HIQI")
+INDEX_FILE = "covers.idx"
+
+
+def _pack_file(directory, pack):
+    return os.path.join(directory, "covers_%05d.pack" % pack)
+
+
+def read_index(directory):
+    """
+    Reads a pack index. Records are appended, so the last record of a bookId wins.
+
+    :param directory: The directory containing pack files and index.
+    :return: Dict mapping bookId to (pack, offset, length).
+    """
+    index = {}
+    index_path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return index
+    with open(index_path, "rb") as f:
+        data = f.read()
+    position = 0
+    while position + _RECORD.size <= len(data):
+        id_length, pack, offset, length = _RECORD.unpack_from(data, position)
+        position += _RECORD.size
+        book_id = data[position : position + id_length].decode("utf-8")
+        position += id_length
+        index[book_id] = (pack, offset, length)
+    return index
+
+
+class CoverPackWriter:
+    """
+    Appends covers to large pack files and records their location in a compact binary index.
+
+    Attributes:
+        directory (string): The directory containing pack files and index.
+        max_pack_size (int): Size in bytes from which a new pack file is started.
+        pack (int): The pack number being appended to.
+    """
+
+    def __init__(self, directory, max_pack_size=1 << 30):
+        """
+        The constructor for CoverPackWriter class. Appends to existing packs in directory.
+
+        :param directory: The directory containing pack files and index.
+        :param max_pack_size: Size in bytes from which a new pack file is started (optional).
+        """
+        self.directory = directory
+        self.max_pack_size = max_pack_size
+        os.makedirs(directory, exist_ok=True)
+        self.pack = 0
+        while os.path.exists(_pack_file(directory, self.pack + 1)):
+            self.pack += 1
+        self._pack = open(_pack_file(directory, self.pack), "ab")
+        self._index = open(os.path.join(directory, INDEX_FILE), "ab")
+
+    def add(self, book_id, data):
+        """
+        Appends a cover to the current pack.
+
+        :param book_id: The GR bookId.
+        :param data: The cover image bytes.
+        :return: None
+        """
+        if self._pack.tell() > 0 and self._pack.tell() + len(data) > self.max_pack_size:
+            self._pack.close()
+            self.pack += 1
+            self._pack = open(_pack_file(self.directory, self.pack), "ab")
+        offset = self._pack.tell()
+        self._pack.write(data)
+        encoded_id = book_id.encode("utf-8")
+        self._index.write(
+            _RECORD.pack(len(encoded_id), self.pack, offset, len(data)) + encoded_id
+        )
+
+    def close(self):
+        """
+        Flushes and closes the pack and index files.
+
+        :return: None
+        """
+        self._pack.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CoverPackReader:
+    """
+    Reads covers from pack files through mmap, returning zero-copy memoryview slices.
+
+    Attributes:
+        directory (string): The directory containing pack files and index.
+        index (dict): The bookId -> (pack, offset, length) index.
+    """
+
+    def __init__(self, directory):
+        """
+        The constructor for CoverPackReader class.
+
+        :param directory: The directory containing pack files and index.
+        """
+        self.directory = directory
+        self.index = read_index(directory)
+        self._files = {}
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, book_id):
+        return book_id in self.index
+
+    def _map(self, pack):
+        if pack not in self._maps:
+            f = open(_pack_file(self.directory, pack), "rb")
+            self._files[pack] = f
+            self._maps[pack] = memoryview(
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+        return self._maps[pack]
+
+    def get(self, book_id):
+        """
+        Returns the cover of a book.
+
+        :param book_id: The GR bookId.
+        :return: memoryview over the cover bytes (valid until close), KeyError if not packed.
+        """
+        pack, offset, length = self.index[book_id]
+        return self._map(pack)[offset : offset + length]
+
+    def iter_covers(self):
+        """
+        Iterates over every cover in pack and offset order, so bulk reads are sequential I/O.
+
+        :return: Generator of (bookId, memoryview) tuples.
+        """
+        for book_id, (pack, offset, length) in sorted(
+            self.index.items(), key=lambda item: item[1]
+        ):
+            yield book_id, self._map(pack)[offset : offset + length]
+
+    def close(self):
+        """
+        Releases memory maps and pack files. Returned memoryviews must be released before.
+
+        :return: None
+        """
+        for view in self._maps.values():
+            mapped = view.obj
+            view.release()
+            mapped.close()
+        for f in self._files.values():
+            f.close()
+        self._maps = {}
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,151 @@
+# Import necessary libraries.
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+
+def shard_path(root, book_id, extension, depth=2):
+    """
+    Returns the hash-sharded path of a book file, e.g. root/3f/a2/<bookId>.jpg.
+
+    Sharding on a hash of the bookId keeps directories small (256 entries per level) regardless of dataset size.
+    :param root: The root directory of the tree.
+    :param book_id: The GR bookId.
+    :param extension: The file extension, including the dot.
+    :param depth: Number of directory levels (optional).
+    :return: The file path.
+    """
+    digest = hashlib.sha1(book_id.encode("utf-8")).hexdigest()
+    levels = [digest[2 * i : 2 * i + 2] for i in range(depth)]
+    return os.path.join(root, *levels, book_id + extension)
+
+
+def _open_image(path):
+    # Pillow is only needed by the cover pipeline, import it on use
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("Pillow is required to process covers: pip install Pillow")
+    image = Image.open(path)
+    image.load()
+    return image
+
+
+def _difference_hash(image, hash_size=8):
+    # dHash: compare adjacent pixels of a small grayscale version of the image
+    small = image.convert("L").resize((hash_size + 1, hash_size))
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return "%016x" % bits
+
+
+def _fingerprint_cover(task):
+    book_id, path = task
+    with open(path, "rb") as f:
+        checksum = hashlib.sha256(f.read()).hexdigest()
+    try:
+        phash = _difference_hash(_open_image(path))
+    except OSError:
+        # Not an image (e.g. an error page saved as cover)
+        phash = ""
+    return book_id, checksum, phash
+
+
+def _make_thumbnails(task):
+    book_id, path, out_dir, sizes, image_format = task
+    image = _open_image(path).convert("RGB")
+    extension = ".webp" if image_format == "WEBP" else ".jpg"
+    thumbnails = {}
+    for size in sizes:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        thumbnail_path = shard_path(
+            os.path.join(out_dir, str(size)), book_id, extension
+        )
+        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        thumbnail.save(thumbnail_path, image_format, quality=85)
+        with open(thumbnail_path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        thumbnails[str(size)] = {"path": thumbnail_path, "sha256": checksum}
+    return book_id, thumbnails
+
+
+def process_covers(
+    sources,
+    out_dir="covers",
+    sizes=(64, 128, 256),
+    image_format="WEBP",
+    workers=None,
+    max_distance=0,
+):
+    """
+    Generates cover thumbnails in a hash-sharded tree, dropping duplicate covers, and writes a manifest.
+
+    Work is done in a process pool in two passes: covers are fingerprinted (checksum and perceptual hash) first,
+    and thumbnails are only generated for the first book of each group of duplicates.
+    :param sources: Dict mapping bookId to the path of its downloaded cover.
+    :param out_dir: The root directory of the thumbnails tree and manifest (optional).
+    :param sizes: Thumbnail bounding box sizes in pixels (optional).
+    :param image_format: Thumbnails format, "WEBP" or "JPEG" (optional).
+    :param workers: Number of worker processes (optional, defaults to the number of CPUs).
+    :param max_distance: Maximum perceptual hash Hamming distance to consider two covers duplicates (optional).
+    :return: The manifest dict, also saved to out_dir/manifest.json.
+    """
+    manifest = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Fingerprint every cover
+        fingerprints = pool.map(_fingerprint_cover, sorted(sources.items()))
+
+        # Keep the first book of each perceptual hash, link the others to it
+        unique = []
+        seen = {}
+        for book_id, checksum, phash in fingerprints:
+            manifest[book_id] = {
+                "source": sources[book_id],
+                "sha256": checksum,
+                "phash": phash,
+            }
+            if phash == "":
+                continue
+            original = _find_duplicate(seen, phash, max_distance)
+            if original is not None:
+                manifest[book_id]["duplicateOf"] = original
+            else:
+                seen[phash] = book_id
+                unique.append(book_id)
+
+        # Generate thumbnails of unique covers
+        tasks = [
+            (book_id, sources[book_id], out_dir, tuple(sizes), image_format)
+            for book_id in unique
+        ]
+        for book_id, thumbnails in pool.map(_make_thumbnails, tasks, chunksize=16):
+            manifest[book_id]["thumbnails"] = thumbnails
+
+    # Duplicates share the thumbnails of the original cover
+    for entry in manifest.values():
+        if "duplicateOf" in entry:
+            entry["thumbnails"] = manifest[entry["duplicateOf"]]["thumbnails"]
+
+    # Save manifest
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def _find_duplicate(seen, phash, max_distance):
+    if phash in seen:
+        return seen[phash]
+    if max_distance > 0:
+        value = int(phash, 16)
+        for other, book_id in seen.items():
+            if bin(value ^ int(other, 16)).count("1") <= max_distance:
+                return book_id
+    return None
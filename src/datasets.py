@@ -0,0 +1,182 @@
+# Import necessary libraries.
+import io
+import os
+import ast
+import csv
+import gzip
+import zlib
+import sqlite3
+
+# Compressed file extensions understood by open_file.
+COMPRESSED_EXTENSIONS = (".gz", ".zst")
+
+
+def open_file(file, mode="rt", level=None, threads=-1):
+    """
+    Opens a text file for streaming, compressed with gzip or zstd when its name ends in .gz or .zst.
+
+    :param file: The file name.
+    :param mode: "rt" to read, "wt" to write or "at" to append (optional).
+    :param level: Compression level (optional, defaults to 6 for gzip and 3 for zstd).
+    :param threads: Number of zstd compression threads, -1 for one per CPU (optional).
+    :return: A text file object (newlines are not translated, as needed by the csv module).
+    """
+    if file.endswith(".gz"):
+        return gzip.open(
+            file, mode, compresslevel=6 if level is None else level, newline=""
+        )
+    if file.endswith(".zst"):
+        # zstandard is only needed for .zst files
+        import zstandard
+
+        raw = open(file, mode[0] + "b")
+        if mode[0] == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            compressor = zstandard.ZstdCompressor(
+                level=3 if level is None else level, threads=threads
+            )
+            stream = compressor.stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    return open(file, mode, newline="")
+
+
+def _part(file, number):
+    # Name of part number of file, e.g. reviews-1.jsonl.gz (the first part is file itself)
+    if number == 0:
+        return file
+    base, compression = file, ""
+    for suffix in COMPRESSED_EXTENSIONS:
+        if file.endswith(suffix):
+            base, compression = file[: -len(suffix)], suffix
+    base, extension = os.path.splitext(base)
+    return "%s-%d%s%s" % (base, number, extension, compression)
+
+
+def part_files(file):
+    """
+    Lists file and the parts written next to it by new_part, in the order they were written.
+
+    :param file: The file name.
+    :return: List of existing file names.
+    """
+    parts = []
+    while os.path.exists(_part(file, len(parts))):
+        parts.append(_part(file, len(parts)))
+    return parts
+
+
+def new_part(file):
+    """
+    Returns the name of a new part of file, for output that cannot be appended to it: compressed streams and
+    Parquet files cut by a crash cannot be appended to, so each run writes a part next to the first file, e.g.
+    reviews-1.jsonl.gz.
+
+    :param file: The file name.
+    :return: file if it does not exist, else the first part name not in use.
+    """
+    return _part(file, len(part_files(file)))
+
+
+def truncate_partial_line(file):
+    """
+    Cuts the last line of a text file if a crash left it half written, so appended lines start on a new line.
+
+    :param file: The file name (not compressed).
+    :return: None
+    """
+    with open(file, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+def read_lines(file):
+    """
+    Streams the lines of an append-only text file and its parts (see new_part), in order. A stream cut by a
+    crash ends its part, so its last line may be incomplete.
+
+    :param file: The file name (decompressed if ending in .gz or .zst).
+    :return: Generator of lines.
+    """
+    for part in part_files(file):
+        truncated = (EOFError, zlib.error, gzip.BadGzipFile, UnicodeDecodeError)
+        if part.endswith(".zst"):
+            import zstandard
+
+            truncated += (zstandard.ZstdError,)
+        with open_file(part) as f:
+            try:
+                for line in f:
+                    yield line
+            except truncated:
+                pass
+
+
+def parse_list(value):
+    """
+    Parses a list column as written to csv by GoodReadsScraper (e.g. "['Fantasy', 'Fiction']").
+
+    :param value: The stored value (a list is returned as is).
+    :return: List, empty when the value is missing or not a list.
+    """
+    if isinstance(value, list):
+        return value
+    if not value or not isinstance(value, str) or value[0] != "[":
+        return []
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def split_authors(author):
+    """
+    Splits the author field into names, dropping roles, e.g. "J.K. Rowling, Mary GrandPré (Illustrator)".
+
+    :param author: The author field of a book.
+    :return: List of author names.
+    """
+    names = []
+    for name in str(author).split(", "):
+        name = name.split(" (")[0].strip()
+        if name != "":
+            names.append(name)
+    return names
+
+
+def read_books(file, table="books"):
+    """
+    Reads a books dataset as produced by books_to_csv (csv) or converted to Parquet or SQLite.
+
+    :param file: The dataset file, format chosen by extension (.csv, .csv.gz, .csv.zst, .parquet, .db/.sqlite).
+    :param table: The table holding books in SQLite files (optional).
+    :return: Generator of book dicts, in file order.
+    """
+    if file.endswith(".parquet"):
+        # pyarrow is only needed for Parquet files
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(file).iter_batches():
+            for book in batch.to_pylist():
+                yield book
+    elif file.endswith(".db") or file.endswith(".sqlite"):
+        connection = sqlite3.connect(file)
+        connection.row_factory = sqlite3.Row
+        try:
+            for row in connection.execute("SELECT * FROM " + table):
+                yield dict(row)
+        finally:
+            connection.close()
+    else:
+        with open_file(file) as f:
+            for row in csv.DictReader(f):
+                yield row
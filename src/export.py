@@ -0,0 +1,301 @@
+# Import necessary libraries.
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import urllib.parse
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from normalize import normalize_table
+from normalize import read_table
+from pipeline import Pipeline
+from pipeline import Stage
+
+# Manifest file name, files starting with "_" are skipped by pyarrow.dataset readers.
+MANIFEST = "_manifest.json"
+
+# Directory name of partitions with no value, as read by pyarrow.dataset hive partitioning.
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _first_genre(table):
+    genres = table.column("genres")
+    has_genre = pc.greater(pc.list_value_length(genres), 0)
+    return pc.list_element(
+        pc.if_else(has_genre, genres, pa.scalar(None, genres.type)), 0
+    )
+
+
+def _publish_year(table):
+    # Year of the edition, of the first publication when the edition has no date
+    year = pc.year(table.column("publishDate"))
+    if "firstPublishDate" in table.column_names:
+        year = pc.coalesce(year, pc.year(table.column("firstPublishDate")))
+    return year
+
+
+# Partition keys derived from books columns, other keys are taken from the column of the same name.
+PARTITION_KEYS = {
+    "genre": _first_genre,
+    "year": _publish_year,
+}
+
+
+def partition_column(table, key):
+    """
+    Returns the values of a partition key for each book.
+
+    :param table: Normalized books table (see normalize.normalize_table).
+    :param key: "genre" (first genre), "year" (publish year) or the name of a column, e.g. "language".
+    :return: pyarrow Array.
+    """
+    if key in PARTITION_KEYS:
+        return PARTITION_KEYS[key](table)
+    return table.column(key)
+
+
+def _directory(key, value):
+    if value is None:
+        return "%s=%s" % (key, NULL_PARTITION)
+    # Values are URI-encoded, as pyarrow.dataset hive partitioning decodes them
+    return "%s=%s" % (key, urllib.parse.quote(str(value), safe=" "))
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def column_stats(column):
+    """
+    Returns the stats of a partition column saved in the manifest.
+
+    :param column: pyarrow Array or ChunkedArray.
+    :return: Dict with nulls, and min and max for columns that are not lists.
+    """
+    stats = {"nulls": column.null_count}
+    if not pa.types.is_list(column.type) and len(column) > column.null_count:
+        min_max = pc.min_max(column)
+        stats["min"] = _json_value(min_max["min"].as_py())
+        stats["max"] = _json_value(min_max["max"].as_py())
+    return stats
+
+
+def split_partitions(table, keys):
+    """
+    Splits a books table by the values of partition keys, with one sort and zero-copy slices.
+
+    :param table: Normalized books table.
+    :param keys: List of partition keys (see partition_column).
+    :return: List of (dict key -> value, table slice), in key order.
+    """
+    if table.num_rows == 0:
+        return []
+    values = [partition_column(table, key) for key in keys]
+    keyed = pa.table(values, names=["_%d" % i for i in range(len(keys))])
+    order = pc.sort_indices(
+        keyed,
+        [(name, "ascending") for name in keyed.column_names],
+    )
+    table = table.take(order)
+    keyed = keyed.take(order)
+
+    # A partition ends where any key changes from the previous row
+    rows = [tuple(row.values()) for row in keyed.to_pylist()]
+    partitions = []
+    start = 0
+    for i in range(1, len(rows) + 1):
+        if i == len(rows) or rows[i] != rows[start]:
+            partitions.append(
+                (dict(zip(keys, rows[start])), table.slice(start, i - start))
+            )
+            start = i
+    return partitions
+
+
+def _write_partition(out_dir, partition, keys, compression):
+    values, table = partition
+    path = "/".join(_directory(key, values[key]) for key in keys)
+    path = (path + "/" if path else "") + "part-0.parquet"
+
+    # Written to memory first, so the checksum is computed without reading the file back
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression=compression)
+    data = sink.getvalue()
+    file = os.path.join(out_dir, path)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    temporary = os.path.join(os.path.dirname(file), "_" + os.path.basename(file))
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, file)
+    return {
+        "path": path,
+        "values": {key: _json_value(value) for key, value in values.items()},
+        "rows": table.num_rows,
+        "bytes": data.size,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "columns": {
+            name: column_stats(table.column(name)) for name in table.column_names
+        },
+    }
+
+
+def read_manifest(out_dir):
+    """
+    Reads the manifest of an export.
+
+    :param out_dir: The export directory.
+    :return: The manifest dict, None if out_dir has no manifest.
+    """
+    file = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(file):
+        return None
+    with open(file) as f:
+        return json.load(f)
+
+
+def export_table(table, out_dir, keys, workers=4, compression="zstd"):
+    """
+    Writes a books table partitioned by keys, one Parquet file per partition in hive layout (e.g.
+    language=English/genre=Fantasy/year=2005/part-0.parquet), and a manifest with the row count, column stats
+    and SHA-256 checksum of each partition.
+
+    Partitions are written concurrently and the manifest is replaced last, so readers never see a manifest
+    listing missing files. Files of a previous export not in the new manifest are then removed.
+    :param table: pyarrow Table of books, typed columns are needed by genre and year (see normalize).
+    :param out_dir: The export directory.
+    :param keys: List of partition keys (see partition_column), empty for a single file.
+    :param workers: Number of partitions written concurrently (optional).
+    :param compression: Parquet compression codec (optional).
+    :return: The manifest dict.
+    """
+    keys = list(keys)
+    os.makedirs(out_dir, exist_ok=True)
+    previous = read_manifest(out_dir)
+
+    pipeline = Pipeline(
+        [
+            Stage(
+                "export",
+                lambda _, partition: _write_partition(
+                    out_dir, partition, keys, compression
+                ),
+                workers,
+            )
+        ]
+    )
+    partitions = pipeline.run(split_partitions(table, keys))
+    if len(pipeline.errors) != 0:
+        raise pipeline.errors[0][2]
+    partitions.sort(key=lambda partition: partition["path"])
+
+    manifest = {
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "partitionBy": keys,
+        "rows": table.num_rows,
+        "schema": {
+            name: str(table.schema.field(name).type) for name in table.schema.names
+        },
+        "partitions": partitions,
+    }
+    file = os.path.join(out_dir, MANIFEST)
+    with open(file + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(file + ".tmp", file)
+
+    # Remove partitions of the previous export that were not written again
+    if previous is not None:
+        paths = set(partition["path"] for partition in partitions)
+        for partition in previous["partitions"]:
+            old = os.path.join(out_dir, partition["path"])
+            if partition["path"] not in paths and os.path.exists(old):
+                os.remove(old)
+                try:
+                    os.removedirs(os.path.dirname(old))
+                except OSError:
+                    # Directory still holding other partitions
+                    pass
+    return manifest
+
+
+def select_partitions(manifest, **values):
+    """
+    Returns the partitions holding the given key values, read from the manifest without opening any file.
+
+    :param manifest: The manifest dict (see read_manifest).
+    :param values: Partition key values, e.g. language="English", year=2005.
+    :return: List of partition dicts (path, values, rows, bytes, sha256, columns).
+    """
+    return [
+        partition
+        for partition in manifest["partitions"]
+        if all(partition["values"].get(key) == value for key, value in values.items())
+    ]
+
+
+def verify(out_dir):
+    """
+    Checks the files of an export against its manifest: checksums and the row counts of the Parquet footers.
+
+    :param out_dir: The export directory.
+    :return: List of (path, problem), empty if the export is intact.
+    """
+    manifest = read_manifest(out_dir)
+    if manifest is None:
+        return [(MANIFEST, "missing")]
+    problems = []
+    for partition in manifest["partitions"]:
+        file = os.path.join(out_dir, partition["path"])
+        if not os.path.exists(file):
+            problems.append((partition["path"], "missing"))
+            continue
+        sha256 = hashlib.sha256()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+        if sha256.hexdigest() != partition["sha256"]:
+            problems.append((partition["path"], "checksum mismatch"))
+        elif pq.ParquetFile(file).metadata.num_rows != partition["rows"]:
+            problems.append((partition["path"], "row count mismatch"))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Partitioned Parquet export of a books dataset, with a manifest."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    write = commands.add_parser(
+        "write", help="Export a books file partitioned by keys."
+    )
+    write.add_argument("books")
+    write.add_argument("out")
+    write.add_argument("--by", default="language,genre,year")
+    write.add_argument("--workers", type=int, default=4)
+    check = commands.add_parser("verify", help="Check an export against its manifest.")
+    check.add_argument("out")
+    args = parser.parse_args(argv)
+
+    if args.command == "write":
+        keys = [key for key in args.by.split(",") if key != ""]
+        manifest = export_table(
+            normalize_table(read_table(args.books)), args.out, keys, args.workers
+        )
+        print(
+            "%d books exported to %d partitions in %s"
+            % (manifest["rows"], len(manifest["partitions"]), args.out)
+        )
+    else:
+        problems = verify(args.out)
+        for path, problem in problems:
+            print("%s: %s" % (path, problem))
+        print("%d problems" % len(problems))
+        return 1 if len(problems) != 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
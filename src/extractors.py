@@ -0,0 +1,777 @@
+# Import necessary libraries.
+import re
+import functools
+import time
+from collections import namedtuple
+from lxml import etree
+from lxml import html as lxml_html
+
+# A field spec declares how a single book attribute is read from a GR book page:
+#   name: The key used in the book dict.
+#   xpath: The XPath selecting the element(s) holding the value.
+#   attribute: What to read from each element: "text" (whitespace normalized text, as selenium .text),
+#              "innerText" (text as rendered by the browser innerText: whitespace runs collapsed, line breaks at
+#              <br> and blocks) or the name of an HTML attribute (href, src, content...).
+#   post: Function applied to the value read (to the list of values if many is True).
+#   default: Value (or factory, if callable) used when nothing is found.
+#   many: Whether every matching element is read or only the first one.
+FieldSpec = namedtuple(
+    "FieldSpec", ["name", "xpath", "attribute", "post", "default", "many"]
+)
+
+
+# Define post-processors.
+def _strip_series(series):
+    return series.strip("()")
+
+
+def _strip_author(author):
+    return author.replace("by ", "")
+
+
+def _pick_description(spans):
+    # The full description is on the second span when the text is truncated
+    if len(spans) > 1:
+        return spans[1]
+    return spans[0]
+
+
+def _split_genres(genres):
+    return [x.split(" > ")[1] if ">" in x else x for x in genres]
+
+
+def _strip_pages(pages):
+    return pages.replace(" pages", "")
+
+
+def _publisher(row):
+    element = row.split(" by ")
+    if len(element) == 2:
+        return element[1].split(" (f")[0]
+    return ""
+
+
+def _publish_date(row):
+    element = row.split(" by ")
+    if len(element) == 2:
+        return element[0].replace("Published ", "")
+    return element[0].split("(")[0].replace("Published ", "")
+
+
+def _first_publish_date(nobr):
+    return nobr.split("shed ")[1].strip(")")
+
+
+def _ratings_by_stars(script):
+    return [int(r) for r in script.split("[")[1].split("]")[0].split(", ")]
+
+
+def _clean_setting(setting):
+    return [x.replace("\n", "") for x in setting]
+
+
+def _distinct_urls(urls):
+    return list(dict.fromkeys(url.split("?")[0] for url in urls))
+
+
+def _likes(likes):
+    return int(likes.split(" ")[0].replace(",", ""))
+
+
+# Declarative table of the fields scraped from each GR book page.
+FIELD_SPECS = (
+    FieldSpec("title", '//*[@id="bookTitle"]', "text", None, "", False),
+    FieldSpec("series", '//*[@id="bookSeries"]', "text", _strip_series, "", False),
+    FieldSpec("author", '//*[@id="bookAuthors"]', "text", _strip_author, "", False),
+    FieldSpec("rating", '//span[@itemprop="ratingValue"]', "text", None, "", False),
+    FieldSpec(
+        "description",
+        '//*[(@id = "description")]//span',
+        "innerText",
+        _pick_description,
+        "",
+        True,
+    ),
+    FieldSpec("language", '//*[@itemprop="inLanguage"]', "innerText", None, "", False),
+    FieldSpec(
+        "isbn", '//*[@itemprop="isbn"]', "innerText", None, "9999999999999", False
+    ),
+    FieldSpec(
+        "genres",
+        '//*[contains(concat(" ", normalize-space(@class), " "), " elementList ")]'
+        '/descendant::*[contains(concat(" ", normalize-space(@class), " "), " left ")][1]',
+        "text",
+        _split_genres,
+        list,
+        True,
+    ),
+    FieldSpec(
+        "characters",
+        '//a[contains(@href, "/characters/")]',
+        "innerText",
+        None,
+        list,
+        True,
+    ),
+    FieldSpec(
+        "bookFormat", '//*[@itemprop="bookFormat"]', "innerText", None, "", False
+    ),
+    FieldSpec("edition", '//*[@itemprop="bookEdition"]', "innerText", None, "", False),
+    FieldSpec(
+        "pages", '//*[@itemprop="numberOfPages"]', "innerText", _strip_pages, "", False
+    ),
+    FieldSpec(
+        "publisher", '(//div[@class="row"])[2]', "innerText", _publisher, "", False
+    ),
+    FieldSpec(
+        "publishDate", '(//div[@class="row"])[2]', "innerText", _publish_date, "", False
+    ),
+    FieldSpec(
+        "firstPublishDate",
+        '//div[@class="row"]/nobr',
+        "innerText",
+        _first_publish_date,
+        "",
+        False,
+    ),
+    FieldSpec(
+        "awards",
+        '//*[contains(concat(" ", normalize-space(@class), " "), " award ")]',
+        "innerText",
+        None,
+        list,
+        True,
+    ),
+    FieldSpec(
+        "numReviews", '//meta[@itemprop="reviewCount"]', "content", None, "", False
+    ),
+    FieldSpec(
+        "numRatings", '//meta[@itemprop="ratingCount"]', "content", None, "", False
+    ),
+    FieldSpec("seriesUrl", '//*[@id="bookSeries"]/a', "href", None, "", False),
+    FieldSpec(
+        "relatedUrls",
+        '//div[contains(@class, "bookCarousel")]//a[contains(@href, "/book/show/")]',
+        "href",
+        _distinct_urls,
+        list,
+        True,
+    ),
+    FieldSpec(
+        "authorUrls",
+        '//*[@id="bookAuthors"]//a[@class="authorName"]',
+        "href",
+        None,
+        list,
+        True,
+    ),
+    FieldSpec(
+        "ratingsByStars",
+        '//script[@type="text/javascript+protovis"]',
+        "innerText",
+        _ratings_by_stars,
+        list,
+        False,
+    ),
+    FieldSpec(
+        "setting",
+        '//a[contains(@href, "/places/")]',
+        "textWithSibling",
+        _clean_setting,
+        list,
+        True,
+    ),
+    FieldSpec("coverImg", '//img[@id="coverImage"]', "src", None, "", False),
+)
+
+# Fields not read from the book page: taken from the list link or derived from other fields.
+LINK_FIELDS = ("bookId", "bbeScore", "bbeVotes")
+DERIVED_FIELDS = {"likedPercent": ("ratingsByStars",)}
+
+# Columns of the published dataset, in order.
+BOOK_FIELDS = (
+    "bookId",
+    "title",
+    "series",
+    "author",
+    "rating",
+    "description",
+    "language",
+    "isbn",
+    "genres",
+    "characters",
+    "bookFormat",
+    "edition",
+    "pages",
+    "publisher",
+    "publishDate",
+    "firstPublishDate",
+    "awards",
+    "numRatings",
+    "ratingsByStars",
+    "likedPercent",
+    "setting",
+    "coverImg",
+    "bbeScore",
+    "bbeVotes",
+)
+
+# JavaScript function injected through execute_script to read every spec in the browser with one call.
+# Receives a list of [name, xpath, attribute, many] and returns {name: [raw strings]}.
+EXTRACT_JS = """
+var specs = arguments[0];
+var matches = {};
+var raw = {};
+function read(e, attribute) {
+    if (attribute === "text") {
+        return e.innerText.replace(/\\s+/g, " ").trim();
+    }
+    if (attribute === "innerText") {
+        return e.innerText.trim();
+    }
+    if (attribute === "textWithSibling") {
+        var text = e.innerText;
+        var sibling = e.nextElementSibling;
+        if (sibling !== null && sibling.innerText !== "") {
+            text = text + " " + sibling.innerText;
+        }
+        return text;
+    }
+    if (typeof e[attribute] === "string") {
+        return e[attribute];
+    }
+    return e.getAttribute(attribute) || "";
+}
+for (var i = 0; i < specs.length; i++) {
+    var name = specs[i][0], xpath = specs[i][1], attribute = specs[i][2], many = specs[i][3];
+    if (!(xpath in matches)) {
+        var result = document.evaluate(
+            xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+        );
+        var elements = [];
+        for (var j = 0; j < result.snapshotLength; j++) {
+            elements.push(result.snapshotItem(j));
+        }
+        matches[xpath] = elements;
+    }
+    var found = many ? matches[xpath] : matches[xpath].slice(0, 1);
+    raw[name] = found.map(function (e) { return read(e, attribute); });
+}
+return raw;
+"""
+
+_SPECS_BY_NAME = {spec.name: spec for spec in FIELD_SPECS}
+_compiled_cache = {}
+
+
+class CompiledSpecs:
+    """
+    A projection of FIELD_SPECS compiled once and evaluated in a single pass over a parsed document.
+
+    Attributes:
+        fields (tuple of string): The requested book fields, in output order.
+        specs (tuple of FieldSpec): The page field specs needed to build the requested fields.
+        xpaths (dict): The compiled XPath per selector, shared by specs using the same selector.
+    """
+
+    def __init__(self, fields):
+        """
+        The constructor for CompiledSpecs class.
+
+        :param fields: The book fields to be extracted, in output order.
+        """
+        self.fields = tuple(fields)
+        needed = set(self.fields)
+        for field in self.fields:
+            needed.update(DERIVED_FIELDS.get(field, ()))
+        unknown = needed - set(_SPECS_BY_NAME) - set(LINK_FIELDS) - set(DERIVED_FIELDS)
+        if unknown:
+            raise ValueError("Unknown book fields: " + ", ".join(sorted(unknown)))
+        self.specs = tuple(spec for spec in FIELD_SPECS if spec.name in needed)
+        self.xpaths = {}
+        for spec in self.specs:
+            if spec.xpath not in self.xpaths:
+                self.xpaths[spec.xpath] = etree.XPath(spec.xpath)
+
+    def extract(self, document, timer=None):
+        """
+        Evaluates the page field specs over a parsed book page.
+
+        :param document: The lxml root element of the book page.
+        :param timer: Function called as timer(field, seconds) with the time spent on each field (optional,
+            used for profiling).
+        :return: Dict with the post-processed value of each page field.
+        """
+        if timer is not None:
+            return self.__extract_timed(document, timer)
+        matches = {}
+        for xpath, compiled in self.xpaths.items():
+            matches[xpath] = compiled(document)
+        raw = {}
+        for spec in self.specs:
+            elements = matches[spec.xpath]
+            if not spec.many:
+                elements = elements[:1]
+            raw[spec.name] = [_read(e, spec.attribute) for e in elements]
+        return self.post_process(raw)
+
+    def __extract_timed(self, document, timer):
+        # Same as extract, timing each spec (a selector shared by several specs is timed on the first one)
+        matches = {}
+        values = {}
+        for spec in self.specs:
+            start = time.perf_counter()
+            if spec.xpath not in matches:
+                matches[spec.xpath] = self.xpaths[spec.xpath](document)
+            elements = matches[spec.xpath]
+            if not spec.many:
+                elements = elements[:1]
+            found = [_read(e, spec.attribute) for e in elements]
+            values[spec.name] = _finish(spec, found)
+            timer(spec.name, time.perf_counter() - start)
+        return values
+
+    def extract_in_browser(self, driver, timer=None):
+        """
+        Evaluates the page field specs inside the browser with a single execute_script call.
+
+        :param driver: The WebDriver with the book page loaded.
+        :param timer: Function called as timer(name, seconds) with the time spent in the script call and
+            post-processing (optional, used for profiling).
+        :return: Dict with the post-processed value of each page field.
+        """
+        start = time.perf_counter()
+        raw = driver.execute_script(
+            EXTRACT_JS,
+            [[spec.name, spec.xpath, spec.attribute, spec.many] for spec in self.specs],
+        )
+        if timer is not None:
+            timer("execute_script", time.perf_counter() - start)
+            start = time.perf_counter()
+        values = self.post_process(raw)
+        if timer is not None:
+            timer("post_process", time.perf_counter() - start)
+        return values
+
+    async def extract_in_tab(self, tab, timer=None):
+        """
+        Evaluates the page field specs inside a DevTools protocol tab with a single script call.
+
+        :param tab: The cdpbrowser.Tab with the book page loaded.
+        :param timer: Function called as timer(name, seconds) with the time spent in the script call and
+            post-processing (optional, used for profiling).
+        :return: Dict with the post-processed value of each page field.
+        """
+        start = time.perf_counter()
+        raw = await tab.call(
+            EXTRACT_JS,
+            [[spec.name, spec.xpath, spec.attribute, spec.many] for spec in self.specs],
+        )
+        if timer is not None:
+            timer("tab.call", time.perf_counter() - start)
+            start = time.perf_counter()
+        values = self.post_process(raw)
+        if timer is not None:
+            timer("post_process", time.perf_counter() - start)
+        return values
+
+    def post_process(self, raw):
+        """
+        Applies post-processors and defaults to the raw values read for each spec.
+
+        :param raw: Dict mapping each spec name to the list of raw strings read.
+        :return: Dict with the post-processed value of each page field.
+        """
+        values = {}
+        for spec in self.specs:
+            values[spec.name] = _finish(spec, raw.get(spec.name) or [])
+        return values
+
+
+def _finish(spec, found):
+    # Apply the post-processor of a spec, or its default when nothing was found or post-processing failed
+    if len(found) == 0:
+        return spec.default() if callable(spec.default) else spec.default
+    value = found if spec.many else found[0]
+    if spec.post is not None:
+        try:
+            value = spec.post(value)
+        except (IndexError, ValueError):
+            value = spec.default() if callable(spec.default) else spec.default
+    return value
+
+
+def compile_specs(fields=None):
+    """
+    Returns the compiled specs for the given fields (cached, so each projection is compiled once).
+
+    :param fields: Iterable of book fields to extract (optional, defaults to all BOOK_FIELDS).
+    :return: CompiledSpecs
+    """
+    if fields is None:
+        fields = BOOK_FIELDS
+    else:
+        # Keep dataset column order for the requested fields
+        requested = set(fields)
+        fields = [f for f in BOOK_FIELDS if f in requested] + sorted(
+            requested - set(BOOK_FIELDS)
+        )
+    key = tuple(fields)
+    if key not in _compiled_cache:
+        _compiled_cache[key] = CompiledSpecs(key)
+    return _compiled_cache[key]
+
+
+# Selectors used on GR list pages.
+LIST_PAGES_XPATH = etree.XPath(
+    '//div[@class="pagination"]//a[contains(@href, "/list/show")]/text()'
+)
+LIST_TITLES_XPATH = etree.XPath('//a[@class="bookTitle"]/@href')
+LIST_SCORE_VOTES_XPATH = etree.XPath('//span[@class="smallText uitext"]')
+
+
+@functools.lru_cache(maxsize=None)
+def _html_parser(encoding):
+    return lxml_html.HTMLParser(encoding=encoding)
+
+
+def parse_page(page_source, base_url=None, encoding=None):
+    """
+    Parses an HTML page into an lxml document.
+
+    :param page_source: The page HTML (string or bytes).
+    :param base_url: The page URL, used to make links absolute as the browser does (optional).
+    :param encoding: The encoding of page_source bytes (optional, read from the page by default).
+    :return: The lxml root element.
+    """
+    parser = None
+    if encoding is not None and isinstance(page_source, bytes):
+        parser = _html_parser(encoding)
+    document = lxml_html.fromstring(page_source, parser=parser)
+    if base_url is not None:
+        document.make_links_absolute(base_url)
+    return document
+
+
+def parse_list_pages(document):
+    """
+    Reads the number of pages of a GR list from its first page.
+
+    :param document: The parsed list page.
+    :return: Number of pages.
+    """
+    pages = LIST_PAGES_XPATH(document)
+    if len(pages) != 0:
+        return int(pages[-2])
+    return 1
+
+
+def parse_list_page(document):
+    """
+    Reads every book URL, score and vote count of a parsed GR list page in one pass.
+
+    :param document: The parsed list page.
+    :return: List of (bookUrl, score, votes) tuples, in list order.
+    """
+    urls = LIST_TITLES_XPATH(document)
+    score_texts = []
+    vote_texts = []
+    for element in LIST_SCORE_VOTES_XPATH(document):
+        anchors = element.xpath(".//a")
+        score_texts.append(anchors[0].text_content())
+        vote_texts.append(anchors[1].text_content())
+
+    # Clean up score and votes strings in bulk
+    scores = [t.split(": ")[1].replace(",", "") for t in score_texts]
+    votes = [t.split(" p")[0].replace(",", "") for t in vote_texts]
+    return list(zip(urls, scores, votes))
+
+
+# Review field specs, relative to each review element of a GR book page.
+STAR_TITLES = {
+    "did not like it": 1,
+    "it was ok": 2,
+    "liked it": 3,
+    "really liked it": 4,
+    "it was amazing": 5,
+}
+REVIEW_XPATH = etree.XPath('//div[@id="bookReviews"]//div[starts-with(@id, "review_")]')
+NEXT_PAGE_XPATH = etree.XPath('//div[@id="reviews"]//a[@class="next_page"]/@href')
+REVIEW_SPECS = (
+    FieldSpec("user", './/a[@class="user"]', "text", None, "", False),
+    FieldSpec("userUrl", './/a[@class="user"]', "href", None, "", False),
+    FieldSpec(
+        "rating",
+        './/span[contains(@class, "staticStars")]',
+        "title",
+        STAR_TITLES.get,
+        None,
+        False,
+    ),
+    FieldSpec("date", './/a[contains(@class, "reviewDate")]', "text", None, "", False),
+    FieldSpec(
+        "text",
+        './/span[@class="readable"]/span',
+        "innerText",
+        _pick_description,
+        "",
+        True,
+    ),
+    FieldSpec(
+        "likes",
+        './/span[@class="likesCount"]',
+        "text",
+        _likes,
+        0,
+        False,
+    ),
+)
+_review_xpaths = {spec.xpath: etree.XPath(spec.xpath) for spec in REVIEW_SPECS}
+
+
+def _number_in(text):
+    # First number of a text, e.g. "J.K. Rowling's Followers (218,675)" or "80 distinct works"
+    match = re.search(r"\d[\d,]*", text)
+    if match is None:
+        raise ValueError(text)
+    return int(match.group(0).replace(",", ""))
+
+
+# Author field specs of a GR author page.
+AUTHOR_SPECS = (
+    FieldSpec("name", '//h1[@class="authorName"]', "text", None, "", False),
+    FieldSpec(
+        "bio",
+        '//div[@class="aboutAuthorInfo"]/span',
+        "innerText",
+        _pick_description,
+        "",
+        True,
+    ),
+    FieldSpec(
+        "followers",
+        '//a[contains(@href, "/author_followings")]',
+        "text",
+        _number_in,
+        None,
+        False,
+    ),
+    FieldSpec(
+        "averageRating", '//*[@itemprop="ratingValue"]', "text", float, None, False
+    ),
+    FieldSpec(
+        "numRatings",
+        '//*[@itemprop="ratingCount"]',
+        "text",
+        _number_in,
+        None,
+        False,
+    ),
+    FieldSpec(
+        "works",
+        '//a[contains(@href, "/author/list/")][contains(., "distinct works")]',
+        "text",
+        _number_in,
+        None,
+        False,
+    ),
+)
+_author_xpaths = {spec.xpath: etree.XPath(spec.xpath) for spec in AUTHOR_SPECS}
+
+
+def _evaluate(specs, xpaths, element):
+    # Evaluate specs relative to an element
+    values = {}
+    for spec in specs:
+        found = xpaths[spec.xpath](element)
+        if not spec.many:
+            found = found[:1]
+        values[spec.name] = _finish(spec, [_read(e, spec.attribute) for e in found])
+    return values
+
+
+def parse_reviews(document, book_id):
+    """
+    Reads every review of a parsed GR book (or book reviews) page.
+
+    :param document: The parsed page.
+    :param book_id: The GR bookId of the page.
+    :return: List of review dicts (reviewId, bookId, user, userUrl, rating, date, text, likes), in page order.
+    """
+    reviews = []
+    for element in REVIEW_XPATH(document):
+        review = {"reviewId": element.get("id").split("_")[-1], "bookId": book_id}
+        review.update(_evaluate(REVIEW_SPECS, _review_xpaths, element))
+        reviews.append(review)
+    return reviews
+
+
+def parse_author(document):
+    """
+    Reads the profile of a parsed GR author page.
+
+    :param document: The parsed author page.
+    :return: Dict with name, bio, followers, averageRating, numRatings and works (None when not found).
+    """
+    return _evaluate(AUTHOR_SPECS, _author_xpaths, document)
+
+
+SERIES_BOOKS_XPATH = etree.XPath(
+    '//div[contains(@class, "listWithDividers__item")]//a[contains(@href, "/book/show/")]/@href'
+)
+
+
+def parse_series_books(document):
+    """
+    Reads the book URLs of a parsed GR series page.
+
+    :param document: The parsed series page (with absolute links, see parse_page).
+    :return: List of distinct book URLs, in series order.
+    """
+    return _distinct_urls(SERIES_BOOKS_XPATH(document))
+
+
+def parse_next_page(document):
+    """
+    Reads the link to the next page of reviews.
+
+    :param document: The parsed page (with absolute links, see parse_page).
+    :return: The next page URL, None on the last page.
+    """
+    links = NEXT_PAGE_XPATH(document)
+    if len(links) != 0:
+        return links[0]
+    return None
+
+
+def liked_percent(ratings_by_stars):
+    """
+    Derives the percent of ratings over 2 stars (as in GR) from the ratings by stars.
+
+    :param ratings_by_stars: List with the number of ratings from 5 to 1 stars.
+    :return: Integer percent or "" when there are no ratings.
+    """
+    num_ratings = sum(ratings_by_stars)
+    if num_ratings > 0:
+        return int(round(sum(ratings_by_stars[0:3]) * 100 / num_ratings, 0))
+    return ""
+
+
+def build_book(compiled, values, link):
+    """
+    Builds the book dict from extracted page values and the list link.
+
+    :param compiled: The CompiledSpecs used for extraction.
+    :param values: Dict returned by CompiledSpecs.extract.
+    :param link: The book link dict (bookUrl, score, votes).
+    :return: Dict with the requested fields in dataset order.
+    """
+    book = {}
+    for field in compiled.fields:
+        if field == "bookId":
+            book[field] = link.get("bookUrl").split("/")[-1]
+        elif field == "bbeScore":
+            book[field] = link.get("score")
+        elif field == "bbeVotes":
+            book[field] = link.get("votes")
+        elif field == "likedPercent":
+            book[field] = liked_percent(values["ratingsByStars"])
+        else:
+            book[field] = values[field]
+    return book
+
+
+# Elements rendered as blocks, with the number of line breaks innerText puts around them.
+_BLOCK_BREAKS = dict.fromkeys(
+    (
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "figure",
+        "footer",
+        "form",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "li",
+        "ol",
+        "section",
+        "table",
+        "tr",
+        "ul",
+    ),
+    1,
+)
+_BLOCK_BREAKS["p"] = 2
+
+# Elements not rendered, skipped inside the element read.
+_HIDDEN_TAGS = ("script", "style", "template", "noscript")
+
+_WHITESPACE = re.compile(r"[ \t\r\n\f]+")
+_LINE_SPACES = re.compile(r" *\n *")
+
+
+def _inner_text(element):
+    # lxml text_content keeps source indentation and newlines and ignores <br>, browser innerText collapses
+    # whitespace runs and breaks lines at <br> and blocks. Required breaks (ints) collapse to the largest one.
+    parts = []
+
+    def walk(node, top=False):
+        if not isinstance(node.tag, str) or (
+            not top and node.tag.lower() in _HIDDEN_TAGS
+        ):
+            return
+        tag = node.tag.lower()
+        if tag == "br":
+            parts.append("\n")
+            return
+        parts.append(_BLOCK_BREAKS.get(tag, 0))
+        if node.text:
+            parts.append(_WHITESPACE.sub(" ", node.text))
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(_WHITESPACE.sub(" ", child.tail))
+        parts.append(_BLOCK_BREAKS.get(tag, 0))
+
+    walk(element, True)
+    text = []
+    breaks = 0
+    for part in parts:
+        if isinstance(part, int):
+            breaks = max(breaks, part)
+            continue
+        # Whitespace starting a line is not rendered
+        if part.strip(" ") == "" and (breaks or len(text) == 0):
+            continue
+        if breaks and len(text) != 0:
+            text.append("\n" * breaks)
+        breaks = 0
+        text.append(part)
+    text = "".join(text)
+    while "  " in text:
+        text = text.replace("  ", " ")
+    return _LINE_SPACES.sub("\n", text).strip(" \n")
+
+
+def _read(element, attribute):
+    if attribute == "text":
+        return " ".join(element.text_content().split())
+    if attribute == "innerText":
+        return _inner_text(element)
+    if attribute == "textWithSibling":
+        text = _inner_text(element)
+        sibling = element.getnext()
+        if sibling is not None and _inner_text(sibling) != "":
+            text = text + " " + _inner_text(sibling)
+        return text
+    return element.get(attribute, "")
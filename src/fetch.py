@@ -0,0 +1,155 @@
+# Import necessary libraries.
+import re
+import gzip
+import time
+import socket
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+from email.utils import parsedate_to_datetime
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/90.0.4430.93 Safari/537.36"
+)
+
+# GR robots.txt, read by the browserless stages.
+ROBOTS_URL = "https://www.goodreads.com/robots.txt"
+
+# Responses worth retrying: rate limited and server errors (GR often answers 502/504 under load).
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    """
+    Raised when a page cannot be fetched after retries.
+
+    Attributes:
+        url (string): The URL.
+        status (int): The last HTTP status, None for network errors.
+    """
+
+    def __init__(self, url, status=None, reason=""):
+        Exception.__init__(self, "Cannot fetch %s: %s" % (url, status or reason))
+        self.url = url
+        self.status = status
+
+
+def _retry_after(value, default):
+    # Retry-After is either seconds or an HTTP date
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def fetch_bytes(url, retries=5, timeout=30, backoff=2.0, max_delay=300):
+    """
+    Fetches a page over HTTP without a browser, retrying on 429 and 5xx responses, network errors and truncated
+    bodies.
+
+    Waits are exponential (backoff * 2 ** attempt) unless the server sends Retry-After.
+    :param url: The URL.
+    :param retries: Number of retries after the first attempt (optional).
+    :param timeout: Socket timeout in seconds (optional).
+    :param backoff: Seconds waited before the first retry (optional).
+    :param max_delay: Maximum seconds waited before a retry (optional).
+    :return: Tuple (page bytes, charset), utf-8 if the response does not say. FetchError if it cannot be
+        fetched.
+    """
+    request = urllib.request.Request(
+        url, headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"}
+    )
+    for attempt in range(retries + 1):
+        delay = backoff * 2**attempt
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                data = response.read()
+                if response.headers.get("Content-Encoding") == "gzip":
+                    data = gzip.decompress(data)
+                return data, response.headers.get_content_charset() or "utf-8"
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRY_STATUS or attempt == retries:
+                raise FetchError(url, e.code)
+            delay = _retry_after(e.headers.get("Retry-After"), delay)
+        except (
+            urllib.error.URLError,
+            http.client.HTTPException,
+            socket.timeout,
+            ConnectionError,
+        ) as e:
+            if attempt == retries:
+                raise FetchError(url, reason=str(e))
+        time.sleep(min(delay, max_delay))
+
+
+def fetch(url, retries=5, timeout=30, backoff=2.0, max_delay=300):
+    """
+    Fetches a page over HTTP without a browser (see fetch_bytes).
+
+    :param url: The URL.
+    :param retries: Number of retries after the first attempt (optional).
+    :param timeout: Socket timeout in seconds (optional).
+    :param backoff: Seconds waited before the first retry (optional).
+    :param max_delay: Maximum seconds waited before a retry (optional).
+    :return: The page text. FetchError if it cannot be fetched.
+    """
+    data, charset = fetch_bytes(url, retries, timeout, backoff, max_delay)
+    return data.decode(charset, "replace")
+
+
+def parse_robots(robots):
+    """
+    Reads the disallowed paths of a robots.txt, of every user agent.
+
+    :param robots: The robots.txt text.
+    :return: List of path rules.
+    """
+    return [
+        line.replace("Disallow: ", "")
+        for line in robots.split("\n")
+        if "Disallow" in line
+    ]
+
+
+def read_robots(url=ROBOTS_URL, retries=5):
+    """
+    Fetches the disallowed paths of a robots.txt.
+
+    :param url: The robots.txt URL (optional).
+    :param retries: Number of retries (optional, see fetch).
+    :return: List of path rules (see parse_robots), empty if robots.txt cannot be fetched.
+    """
+    try:
+        return parse_robots(fetch(url, retries))
+    except FetchError:
+        return []
+
+
+def _robots_pattern(rule):
+    # "*" matches any characters and a final "$" the end of the URL
+    end = "$" if rule.endswith("$") else ""
+    return re.escape(rule.rstrip("$")).replace(r"\*", ".*") + end
+
+
+def robots_allowed(url, disallow):
+    """
+    Checks a URL against robots.txt rules, matched from the start of its path.
+
+    :param url: The URL.
+    :param disallow: List of path rules (see parse_robots).
+    :return: True if no rule matches.
+    """
+    parts = urllib.parse.urlsplit(url)
+    path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+    for rule in disallow:
+        if rule.startswith("/") and re.match(_robots_pattern(rule), path):
+            return False
+    return True
@@ -0,0 +1,341 @@
+# Import necessary libraries.
+import os
+import json
+import math
+import struct
+import sqlite3
+import hashlib
+from datasets import COMPRESSED_EXTENSIONS
+from datasets import new_part
+from datasets import open_file
+from datasets import truncate_partial_line
+from fetch import robots_allowed
+from pipeline import Pipeline
+from pipeline import Stage
+from series import book_key
+
+_BLOOM_HEADER = struct.Struct("<QIQ")
+
+
+class BloomFilter:
+    """
+    Compact set of strings with no false negatives and a bounded false positive rate, about 14 bits per key
+    at a 0.1% rate whatever the key length.
+
+    Attributes:
+        size (int): Number of bits.
+        hashes (int): Number of bit positions per key.
+        count (int): Number of keys added.
+    """
+
+    def __init__(self, capacity=10000000, error_rate=0.001):
+        """
+        The constructor for BloomFilter class.
+
+        :param capacity: Expected number of keys (optional).
+        :param error_rate: False positive rate at capacity (optional).
+        """
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, key):
+        """
+        Adds a key.
+
+        :param key: The key string.
+        :return: True if the key was not in the filter.
+        """
+        new = False
+        bits = self._bits
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        self.count += new
+        return new
+
+    def save(self, file):
+        """
+        Saves the filter.
+
+        :param file: The file.
+        :return: None
+        """
+        with open(file + ".tmp", "wb") as f:
+            f.write(_BLOOM_HEADER.pack(self.size, self.hashes, self.count))
+            f.write(self._bits)
+        os.replace(file + ".tmp", file)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Loads a filter saved with save.
+
+        :param file: The file.
+        :return: BloomFilter
+        """
+        bloom = cls.__new__(cls)
+        with open(file, "rb") as f:
+            bloom.size, bloom.hashes, bloom.count = _BLOOM_HEADER.unpack(
+                f.read(_BLOOM_HEADER.size)
+            )
+            bloom._bits = bytearray(f.read())
+        return bloom
+
+
+class Frontier:
+    """
+    Persistent crawl frontier: pending book pages in SQLite, ordered by depth (breadth-first) then priority,
+    and a Bloom filter of every bookId ever queued, so visited URLs are never kept in memory.
+
+    Pages that failed stay queued with their number of attempts, and are given up after too many. The Bloom
+    filter is saved at checkpoints, next to the SQLite file (file + ".bloom").
+
+    Attributes:
+        file (string): The SQLite file.
+        visited (BloomFilter): The bookIds queued so far.
+        pages (int): Number of pages crawled so far.
+    """
+
+    def __init__(self, file="frontier.db", capacity=10000000, error_rate=0.001):
+        """
+        The constructor for Frontier class, resumes the frontier if file exists.
+
+        :param file: The SQLite file (optional).
+        :param capacity: Expected number of distinct books, sizing the Bloom filter (optional).
+        :param error_rate: Bloom filter false positive rate, the share of books wrongly skipped (optional).
+        """
+        self.file = file
+        self._connection = sqlite3.connect(file)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS queue (bookKey TEXT PRIMARY KEY, url TEXT, score TEXT, votes TEXT, "
+            "depth INTEGER, priority REAL, taken INTEGER DEFAULT 0, attempts INTEGER DEFAULT 0)"
+        )
+        # Frontiers created before attempts were counted
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(queue)")
+        ]
+        if "attempts" not in columns:
+            self._connection.execute(
+                "ALTER TABLE queue ADD COLUMN attempts INTEGER DEFAULT 0"
+            )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS queue_order ON queue (taken, depth, priority)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)"
+        )
+        # Pages taken when the last run stopped were not crawled (taken = 2 marks pages given up)
+        self._connection.execute("UPDATE queue SET taken = 0 WHERE taken = 1")
+        self._connection.commit()
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'pages'"
+        ).fetchone()
+        self.pages = 0 if row is None else row[0]
+        if os.path.exists(file + ".bloom"):
+            self.visited = BloomFilter.load(file + ".bloom")
+        else:
+            self.visited = BloomFilter(capacity, error_rate)
+
+    def push(self, links, depth, priority=0.0):
+        """
+        Queues the book pages not visited yet.
+
+        :param links: Iterable of book URLs or link dicts (bookUrl, score, votes).
+        :param depth: The crawl depth of the pages.
+        :param priority: Pages with higher priority are crawled first within a depth (optional).
+        :return: Number of pages queued.
+        """
+        rows = []
+        for link in links:
+            if not isinstance(link, dict):
+                link = {"bookUrl": link, "score": "", "votes": ""}
+            key = book_key(link["bookUrl"])
+            if self.visited.add(key):
+                rows.append(
+                    (
+                        key,
+                        link["bookUrl"],
+                        str(link.get("score", "")),
+                        str(link.get("votes", "")),
+                        depth,
+                        -priority,
+                    )
+                )
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO queue (bookKey, url, score, votes, depth, priority) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+
+    def pop(self, n):
+        """
+        Takes the next pages to crawl.
+
+        :param n: Maximum number of pages.
+        :return: List of (link dict, depth), lowest depth and highest priority first.
+        """
+        rows = self._connection.execute(
+            "SELECT bookKey, url, score, votes, depth FROM queue WHERE taken = 0 "
+            "ORDER BY depth, priority LIMIT ?",
+            (n,),
+        ).fetchall()
+        self._connection.executemany(
+            "UPDATE queue SET taken = 1 WHERE bookKey = ?", [(row[0],) for row in rows]
+        )
+        return [
+            ({"bookUrl": url, "score": score, "votes": votes}, depth)
+            for _, url, score, votes, depth in rows
+        ]
+
+    def done(self, links):
+        """
+        Removes crawled pages from the frontier.
+
+        :param links: List of link dicts returned by pop.
+        :return: None
+        """
+        self._connection.executemany(
+            "DELETE FROM queue WHERE bookKey = ?",
+            [(book_key(link["bookUrl"]),) for link in links],
+        )
+        self.pages += len(links)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('pages', ?)", (self.pages,)
+        )
+
+    def retry(self, links, max_attempts=3):
+        """
+        Puts back pages that failed, to be crawled again until they failed max_attempts times.
+
+        :param links: List of link dicts returned by pop.
+        :param max_attempts: Number of failures after which a page is given up, and kept out of the queue
+            (optional).
+        :return: None
+        """
+        self._connection.executemany(
+            "UPDATE queue SET attempts = attempts + 1, "
+            "taken = CASE WHEN attempts + 1 >= ? THEN 2 ELSE 0 END WHERE bookKey = ?",
+            [(max_attempts, book_key(link["bookUrl"])) for link in links],
+        )
+
+    def checkpoint(self):
+        """
+        Saves the frontier state.
+
+        :return: None
+        """
+        # Queued pages are committed first, a crash in between recrawls pages rather than losing them
+        self._connection.commit()
+        self.visited.save(self.file + ".bloom")
+
+    def __len__(self):
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM queue WHERE taken = 0"
+        ).fetchone()[0]
+
+    def close(self):
+        """
+        Saves the frontier state and closes it.
+
+        :return: None
+        """
+        self.checkpoint()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def crawl(
+    frontier,
+    scrape,
+    out_file,
+    max_depth=2,
+    max_pages=10000,
+    workers=4,
+    disallow=(),
+    max_attempts=3,
+):
+    """
+    Crawls book pages from the frontier breadth-first, queueing the related books of each page one level deeper,
+    and streams the books to a JSON lines file.
+
+    Related books disallowed by robots.txt are not queued, and pages that failed are crawled again until they
+    failed max_attempts times.
+    :param frontier: The Frontier, with the seed pages queued at depth 0.
+    :param scrape: Function called as scrape(link) returning the book dict (with relatedUrls), None if broken.
+    :param out_file: The JSON lines output file, books are appended to it. Compressed output (ending in .gz or
+        .zst) cannot be appended to after a crash, so each run writes a new part next to it, e.g.
+        crawl-1.jsonl.gz (see datasets.read_lines).
+    :param max_depth: Maximum depth of the crawled pages (optional).
+    :param max_pages: Page budget, the crawl stops once frontier.pages reaches it (optional).
+    :param workers: Number of concurrent fetches (optional).
+    :param disallow: robots.txt path rules (optional, see fetch.read_robots).
+    :param max_attempts: Number of failures after which a page is given up (optional).
+    :return: List of (stage, item, exception) of pages that failed.
+    """
+    errors = []
+    if out_file.endswith(COMPRESSED_EXTENSIONS):
+        out = open_file(new_part(out_file), "wt")
+    else:
+        if os.path.exists(out_file):
+            truncate_partial_line(out_file)
+        out = open_file(out_file, "at")
+    with out:
+        while frontier.pages < max_pages:
+            batch = frontier.pop(min(workers * 8, max_pages - frontier.pages))
+            if len(batch) == 0:
+                break
+
+            pipeline = Pipeline(
+                [Stage("crawl", lambda _, item: (item, scrape(item[0])), workers)]
+            )
+            for (link, depth), book in pipeline.run(batch):
+                if book is None:
+                    continue
+                out.write(json.dumps(dict(book, depth=depth)) + "\n")
+                if depth < max_depth:
+                    priority = float(str(book.get("numRatings") or 0) or 0)
+                    frontier.push(
+                        [
+                            url
+                            for url in book.get("relatedUrls") or []
+                            if robots_allowed(url, disallow)
+                        ],
+                        depth + 1,
+                        priority,
+                    )
+            errors += pipeline.errors
+
+            # Pages failing stay queued, the output is flushed before the frontier moves on
+            out.flush()
+            failed = set(id(item[0]) for _, item, _ in pipeline.errors)
+            frontier.done([link for link, _ in batch if id(link) not in failed])
+            frontier.retry(
+                [link for link, _ in batch if id(link) in failed], max_attempts
+            )
+            frontier.checkpoint()
+            print("%d pages crawled, %d queued" % (frontier.pages, len(frontier)))
+    return errors
@@ -1,28 +1,76 @@
-# Import necessary libraries.
+# Import necessary libraries. Selenium and lxml are imported when first needed, so the class can be used offline
+# (e.g. csv_to_books/books_to_csv post-processing) without paying for them.
 import os
 import csv
 import time
-import urllib.request
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-# Define default chrome driver options for GoodReadsScraper.
-chrome_options = Options()
-chrome_options.add_argument("--incognito")
-# chrome_options.add_argument("--headless") # Uncomment to run
-chrome_options.add_argument("--no-sandbox")
-# chrome_options.add_argument('--disable-gpu') # Uncomment this line if running windows
-chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-chrome_options.add_experimental_option("useAutomationExtension", False)
-chrome_options.add_argument("--window-size=1920x1080")
-chrome_options.add_argument(
-    "--blink-settings=imagesEnabled=false"
-)  # Do not load images
+import urllib.parse
+from catalogindex import CatalogIndex
+from changelog import record_crawl
+from coverpack import CoverPackWriter
+from coverpack import read_index
+from datasets import open_file
+from profiling import StageProfiler
+from profiling import profiled
+from textindex import TextIndex
+
+# Script run on every new document: on GR pages only, hides the GR login modal (the modal closed by its
+# "Dismiss" image, or the login interstitial) with css, removes it and its overlay as soon as they are attached
+# to the DOM and keeps the page scrollable. Other modals and other sites are left untouched.
+SUPPRESS_POPUP_JS = """
+(function () {
+    if (!/(^|\\.)goodreads\\.com$/.test(location.hostname)) {
+        return;
+    }
+    var LOGIN_MODAL = ".modal--centered:has(img[alt='Dismiss']), div[class*='LoginInterstitial']";
+    var style = document.createElement("style");
+    style.textContent = LOGIN_MODAL + " { display: none !important; } "
+        + "body.modalOpened { overflow: auto !important; }";
+    function dismiss() {
+        var modals = document.querySelectorAll(LOGIN_MODAL);
+        if (modals.length === 0) {
+            return;
+        }
+        modals.forEach(function (modal) {
+            var overlay = modal.previousElementSibling;
+            if (overlay !== null && overlay.classList.contains("modal__overlay")) {
+                overlay.remove();
+            }
+            modal.remove();
+        });
+        if (document.body !== null) {
+            document.body.classList.remove("modalOpened");
+        }
+    }
+    new MutationObserver(function () {
+        if (style.parentNode === null && document.documentElement !== null) {
+            document.documentElement.appendChild(style);
+        }
+        dismiss();
+    }).observe(document, {childList: true, subtree: true});
+})();
+"""
+
+
+def default_chrome_options():
+    """
+    Builds the default chrome driver options for GoodReadsScraper.
+
+    :return: Options
+    """
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--incognito")
+    # chrome_options.add_argument("--headless") # Uncomment to run
+    chrome_options.add_argument("--no-sandbox")
+    # chrome_options.add_argument('--disable-gpu') # Uncomment this line if running windows
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    chrome_options.add_argument("--window-size=1920x1080")
+    chrome_options.add_argument(
+        "--blink-settings=imagesEnabled=false"
+    )  # Do not load images
+    return chrome_options
 
 
 class GoodReadsScraper:
@@ -32,265 +80,145 @@ class GoodReadsScraper:
     Attributes:
         driver (WebDriver): The WebDriver used by selenium, will be initialized only when needed.
         book_links (list of dict): The list containing book urls, votes and scores taken from GR list.
+        complete_links (bool): Whether book_links holds the whole list, retrieved by get_book_links with no
+            max_books cutoff (a min_votes cutoff keeps every book of the list within bounds).
         books (list of dict): The list of dictionarys containing book information scraped.
         broken (list of dict): The list of broken links in GR, useful to retry scraping.
         list_url (string): The URL of the target GR list to be scraped.
         chrome_options (Options): The driver options to be used by the WebDriver, including headless modes.
-        robots_disallow (list of string): The list of URL disallowed in GR robots.txt
+        robots_disallow (list of string): The list of URL disallowed in GR robots.txt, read when first needed.
+        offline (bool): Whether the scraper only works on files, never starting a browser.
+        profiler (StageProfiler): The profiler of stages and extractors, None unless profile_dir is given.
+        changelog_dir (string): The directory where crawl changelogs are emitted, None to disable.
+        csv_extension (string): The extension of output files, ".csv" followed by ".gz" or ".zst" if compressed.
+        backend (string): The browser backend, "selenium" (one WebDriver per stage) or "cdp" (many tabs of one
+            browser driven concurrently through the DevTools protocol, see cdpbrowser).
+        tabs (int): The number of concurrent tabs of the "cdp" backend.
+        backoff (float): Seconds waited before reloading a book page that did not load, later reloads wait
+            backoff * (1 + attempt ** 2).
     """
 
-    def __init__(self, list_url, driver_options=chrome_options):
+    def __init__(
+        self,
+        list_url,
+        driver_options=None,
+        changelog_dir=None,
+        compression=None,
+        offline=False,
+        profile_dir=None,
+        profile_mode="sample",
+        backend="selenium",
+        tabs=8,
+        backoff=20,
+    ):
         """
         The constructor for GoodReadsScraper class.
 
         :param list_url: The URL of the target GR list to be scraped.
-        :param driver_options: The driver options to replace defaults (optional).
+        :param driver_options: The driver options to replace defaults (optional, see default_chrome_options).
+        :param changelog_dir: Directory where each crawl emits the changes from the previous one (optional).
+        :param compression: Compress output files with "gz" or "zst" (optional, zst requires zstandard).
+        :param offline: Do not use the browser or network, only read, process and write files (optional).
+        :param profile_dir: Profile each stage and extractor, writing flame-graph stacks, cProfile stats and
+            tracemalloc snapshots to this directory (optional, see profiling.StageProfiler).
+        :param profile_mode: "sample" (statistical profiler) or "cprofile" (optional).
+        :param backend: "selenium" or "cdp" to drive browser stages as concurrent tabs of a single browser
+            (optional, cdp requires websockets).
+        :param tabs: The number of concurrent tabs of the cdp backend (optional).
+        :param backoff: Seconds waited before reloading a book page that did not load (optional, GR 502/504
+            crashes usually last minutes).
         """
+        if backend not in ("selenium", "cdp"):
+            raise ValueError("backend must be selenium or cdp")
         self.driver = ""
         self.book_links = []
+        self.complete_links = False
         self.books = []
         self.broken = []
         self.list_url = list_url
         self.chrome_options = driver_options
-        self.robots_disallow = self.__get_robots_disallow()
-
-    # Define methods to scrape book information.
-    def __get_book_id(self, string):
-        book_id = string.split("/")[-1]
-        return book_id
-
-    def __get_title(self):
-        title = self.driver.find_element_by_id("bookTitle").text
-        return title
-
-    def __get_series(self):
-        series = self.driver.find_element_by_id("bookSeries").text.strip("()")
-        return series
-
-    def __get_author(self):
-        author = self.driver.find_element_by_id("bookAuthors").text.replace("by ", "")
-        return author
-
-    def __get_rating(self):
-        rating = str(
-            self.driver.find_element_by_xpath('//span[@itemprop="ratingValue"]').text
-        )
-        return rating
-
-    def __get_description(self):
-        if (
-            len(self.driver.find_elements_by_xpath('//*[(@id = "description")]//span'))
-            > 1
-        ):
-            description = self.driver.find_elements_by_xpath(
-                '//*[(@id = "description")]//span'
-            )[1].get_attribute("innerText")
-        elif (
-            len(self.driver.find_elements_by_xpath('//*[(@id = "description")]//span'))
-            == 1
-        ):
-            description = self.driver.find_elements_by_xpath(
-                '//*[(@id = "description")]//span'
-            )[0].get_attribute("innerText")
-        else:
-            description = ""
-        return description
-
-    def __get_language(self):
-        try:
-            language = self.driver.find_element_by_xpath(
-                '//*[@itemprop="inLanguage"]'
-            ).get_attribute("innerText")
-        except NoSuchElementException:
-            language = ""
-        return language
-
-    def __get_isbn(self):
-        if len(self.driver.find_elements_by_xpath('//*[@itemprop="isbn"]')) != 0:
-            isbn = self.driver.find_element_by_xpath(
-                '//*[@itemprop="isbn"]'
-            ).get_attribute("innerText")
-        else:
-            # When isbn is not informed
-            isbn = "9999999999999"
-        return isbn
-
-    def __get_genres(self):
-        genres = []
-        for e in self.driver.find_elements_by_class_name("elementList"):
-            try:
-                genres.append(e.find_element(By.CLASS_NAME, "left").text)
-            except NoSuchElementException:
-                pass
-        genres = [x.split(" > ")[1] if ">" in x else x for x in genres]
-        return genres
-
-    def __get_book_format(self):
-        try:
-            book_format = self.driver.find_element_by_xpath(
-                '//*[@itemprop="bookFormat"]'
-            ).get_attribute("innerText")
-        except NoSuchElementException:
-            book_format = ""
-        return book_format
-
-    def __get_edition(self):
-        try:
-            edition = self.driver.find_element_by_xpath(
-                '//*[@itemprop="bookEdition"]'
-            ).get_attribute("innerText")
-        except NoSuchElementException:
-            edition = ""
-        return edition
-
-    def __get_pages(self):
-        try:
-            pages = (
-                self.driver.find_element_by_xpath('//*[@itemprop="numberOfPages"]')
-                .get_attribute("innerText")
-                .replace(" pages", "")
-            )
-        except NoSuchElementException:
-            pages = ""
-        return pages
-
-    def __get_characters(self):
-        characters = []
-        for e in self.driver.find_elements_by_xpath(
-            '//a[contains(@href, "/characters/")]'
-        ):
-            characters.append(e.get_attribute("innerText"))
-        return characters
-
-    def __get_publisher(self):
-        try:
-            element = (
-                self.driver.find_element_by_xpath('(//div[@class="row"])[2]')
-                .get_attribute("innerText")
-                .split(" by ")
+        self.changelog_dir = changelog_dir
+        self.csv_extension = ".csv" if compression is None else ".csv." + compression
+        self.offline = offline
+        self.robots_disallow = None
+        self.backend = backend
+        self.tabs = tabs
+        self.backoff = backoff
+        self.profiler = None
+        if profile_dir is not None:
+            self.profiler = StageProfiler(profile_dir, profile_mode)
+
+    def __new_driver(self):
+        if self.offline:
+            raise RuntimeError(
+                "GoodReadsScraper was created offline, a browser cannot be started."
             )
-            if len(element) == 2:
-                publisher = element[1].split(" (f")[0]
-            else:
-                publisher = ""
-        except NoSuchElementException:
-            publisher = ""
-        return publisher
+        from selenium import webdriver
 
-    def __get_publish_date(self):
-        try:
-            element = (
-                self.driver.find_element_by_xpath('(//div[@class="row"])[2]')
-                .get_attribute("innerText")
-                .split(" by ")
-            )
-            if len(element) == 2:
-                publish_date = element[0].replace("Published ", "")
-            else:
-                publish_date = element[0].split("(")[0].replace("Published ", "")
-        except NoSuchElementException:
-            publish_date = ""
-        return publish_date
+        if self.chrome_options is None:
+            self.chrome_options = default_chrome_options()
+        driver = webdriver.Chrome(options=self.chrome_options)
 
-    def __get_first_publish_date(self):
-        try:
-            publish_date = (
-                self.driver.find_element_by_xpath('//div[@class="row"]/nobr')
-                .get_attribute("innerText")
-                .split("shed ")[1]
-                .strip(")")
+        # Hide the login popup on every page before it renders, instead of waiting for it to close it
+        if hasattr(driver, "execute_cdp_cmd"):
+            driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument", {"source": SUPPRESS_POPUP_JS}
             )
-        except NoSuchElementException:
-            publish_date = ""
-        return publish_date
-
-    def __get_awards(self):
-        awards = []
-        for i in self.driver.find_elements_by_class_name("award"):
-            awards.append(i.get_attribute("innerText"))
-        return awards
-
-    def __get_num_reviews(self):
-        try:
-            num_reviews = self.driver.find_element_by_xpath(
-                '//meta[@itemprop="reviewCount"]'
-            ).get_attribute("content")
-        except NoSuchElementException:
-            num_reviews = ""
-        return num_reviews
+        return driver
 
-    def __get_num_ratings(self):
-        try:
-            num_ratings = self.driver.find_element_by_xpath(
-                '//meta[@itemprop="ratingCount"]'
-            ).get_attribute("content")
-        except NoSuchElementException:
-            num_ratings = ""
-        return num_ratings
+    def __cdp_options(self):
+        # CdpBrowser arguments from driver_options: its chrome arguments (headless, proxy, user agent...) are
+        # added to the cdp defaults, the browser is headless only if they ask for it
+        import cdpbrowser
 
-    def __get_ratings_by_stars(self):
-        try:
-            ratings_by_stars = (
-                self.driver.find_element_by_xpath(
-                    '//script[@type="text/javascript+protovis"]'
-                )
-                .get_attribute("innerText")
-                .split("[")[1]
-                .split("]")[0]
-                .split(", ")
+        if self.offline:
+            raise RuntimeError(
+                "GoodReadsScraper was created offline, a browser cannot be started."
             )
-            ratings_by_stars = [int(r) for r in ratings_by_stars]
-        except NoSuchElementException:
-            ratings_by_stars = []
-        return ratings_by_stars
-
-    def __get_setting(self):
-        setting = []
-        for e in self.driver.find_elements_by_xpath('//a[contains(@href, "/places/")]'):
-            if (
-                e.find_element_by_xpath("following-sibling::*").get_attribute(
-                    "innerText"
-                )
-                != ""
-            ):
-                setting.append(
-                    e.get_attribute("innerText")
-                    + " "
-                    + e.find_element_by_xpath("following-sibling::*").get_attribute(
-                        "innerText"
-                    )
-                )
-            else:
-                setting.append(e.get_attribute("text"))
-        setting = [x.replace("\n", "") for x in setting]
-        return setting
+        if self.chrome_options is None:
+            return {}
+        options = {"headless": False, "arguments": list(cdpbrowser.DEFAULT_ARGUMENTS)}
+        for argument in self.chrome_options.arguments:
+            if argument.startswith("--user-data-dir="):
+                options["user_data_dir"] = argument.split("=", 1)[1]
+            elif not argument.startswith("--remote-debugging-port"):
+                options["arguments"].append(argument)
+        if getattr(self.chrome_options, "binary_location", ""):
+            options["executable"] = self.chrome_options.binary_location
+        return options
+
+    def __map_tabs(self, func, items):
+        import cdpbrowser
+
+        results, errors = cdpbrowser.map_tabs(
+            func, items, self.tabs, scripts=[SUPPRESS_POPUP_JS], **self.__cdp_options()
+        )
+        for item, error in errors:
+            print("\n Failed %s: %s" % (item, error))
+        return results
 
-    def __get_cover_img_url(self):
-        try:
-            cover_img_url = self.driver.find_element_by_xpath(
-                '//img[@id="coverImage"]'
-            ).get_attribute("src")
-        except NoSuchElementException:
-            cover_img_url = ""
-        return cover_img_url
+    # Define methods to scrape book information.
+    def __get_price(self, driver, isbn):
+        from selenium.common.exceptions import NoSuchElementException
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
 
-    def __get_price(self, isbn):
         # Navigate to bookstore IberLibro and search by isbn
-        self.driver.get("https://www.iberlibro.com/")
-        box = self.driver.find_elements_by_xpath('//input[@class="form-control"]')
+        driver.get("https://www.iberlibro.com/")
+        box = driver.find_elements_by_xpath('//input[@class="form-control"]')
         box[3].click()
         box[3].send_keys(isbn)
-        self.driver.find_element_by_xpath(
+        driver.find_element_by_xpath(
             '//button[@class="btn btn-abebooks btn-xs-block"]'
         ).click()
 
         # Wait for price to load to avoid crash
         try:
-            WebDriverWait(self.driver, 10).until(
-                lambda driver: driver.find_element_by_class_name("srp-item-price")
+            WebDriverWait(driver, 10).until(
+                lambda d: d.find_element_by_class_name("srp-item-price")
             )
             price = (
-                self.driver.find_element_by_class_name("srp-item-price")
+                driver.find_element_by_class_name("srp-item-price")
                 .text.split(" ")[1]
                 .replace(",", ".")
             )
@@ -299,6 +227,10 @@ class GoodReadsScraper:
         return price
 
     def __get_kindle_price(self, title, author):
+        from selenium.common.exceptions import NoSuchElementException
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
         # Navigate to bookstore and wait for complete load
         self.driver.get(
             "https://www.amazon.es/kindle-store-ebooks/b?ie=UTF8&node=818936031"
@@ -327,34 +259,95 @@ class GoodReadsScraper:
             kindle_price = ""
         return kindle_price
 
-    def __get_robots_disallow(self):
+    async def __get_price_cdp(self, tab, isbn):
+        # Search IberLibro by isbn directly and poll for the price without blocking other tabs
+        await tab.navigate(
+            "https://www.iberlibro.com/servlet/SearchResults?isbn=" + isbn
+        )
+        price = await tab.wait_for(
+            "(document.querySelector('.srp-item-price') || {}).innerText", 10
+        )
+        if not price:
+            return ""
+        return price.split(" ")[-1].replace(",", ".")
+
+    async def __get_kindle_price_cdp(self, tab, title, author):
+        from urllib.parse import quote_plus
+
+        # Search the Kindle store directly and poll for the price without blocking other tabs
+        await tab.navigate(
+            "https://www.amazon.es/s?i=digital-text&k="
+            + quote_plus(title + " " + author)
+        )
+        kindle_price = await tab.wait_for(
+            "(document.querySelector('.a-price-whole') || {}).innerText", 10
+        )
+        if not kindle_price:
+            return ""
+        return kindle_price.replace(",", ".")
+
+    def __get_robots_disallow(self, browserless=False):
+        if browserless:
+            return self.__get_robots_disallow_fetch()
+        if self.backend == "cdp":
+            return self.__get_robots_disallow_cdp()
+
+        from selenium.common.exceptions import NoSuchElementException
+        from fetch import parse_robots
+
         # Initialize driver
-        self.driver = webdriver.Chrome(options=self.chrome_options)
+        self.driver = self.__new_driver()
 
         # Get dissallowed urls from robots.txt
         try:
             self.driver.get("https://www.goodreads.com/robots.txt")
-            robots_disallow = self.driver.find_element_by_xpath("//body").text.split(
-                "\n"
+            robots_disallow = parse_robots(
+                self.driver.find_element_by_xpath("//body").text
             )
-            robots_disallow = [
-                line.replace("Disallow: ", "")
-                for line in robots_disallow
-                if "Disallow" in line
-            ]
         except NoSuchElementException:
             robots_disallow = ""
 
         self.driver.close()
         return robots_disallow
 
-    def __rem_disallowed_links(self):
+    def __get_robots_disallow_cdp(self):
+        from fetch import parse_robots
+
+        async def read_robots(tab, url):
+            await tab.navigate(url)
+            return await tab.evaluate("document.body.innerText")
+
+        robots = self.__map_tabs(read_robots, ["https://www.goodreads.com/robots.txt"])[
+            0
+        ]
+        if robots is None:
+            return ""
+        return parse_robots(robots)
+
+    def __get_robots_disallow_fetch(self):
+        from fetch import read_robots
+
+        if self.offline:
+            raise RuntimeError(
+                "GoodReadsScraper was created offline, robots.txt cannot be fetched."
+            )
+        return read_robots()
+
+    def __robots_disallow_browserless(self):
+        # robots_disallow for the stages fetching pages without a browser
+        if self.robots_disallow is None:
+            self.robots_disallow = self.__get_robots_disallow(browserless=True)
+        return self.robots_disallow
+
+    def __rem_disallowed_links(self, browserless=False):
+        if self.robots_disallow is None:
+            self.robots_disallow = self.__get_robots_disallow(browserless)
         clean_list = []
         for link in self.book_links:
+            # Path of the URL (of any host, e.g. a local simulator)
             if (
-                link.get("bookUrl")
-                .split(".com")[1]
-                .split(".")[0]
+                urllib.parse.urlsplit(link.get("bookUrl"))
+                .path.split(".")[0]
                 .split("_")[0]
                 .split("-")[0]
                 not in self.robots_disallow
@@ -362,46 +355,65 @@ class GoodReadsScraper:
                 clean_list.append(link)
         return clean_list
 
+    def __count_links_in_bounds(self, max_books, min_votes):
+        # GR lists are ranked, so books within bounds are always the first ones
+        count = 0
+        for link in self.book_links:
+            if int(link.get("votes")) < min_votes or (0 < max_books <= count):
+                break
+            count += 1
+        return count
+
     # Define methods to read from and write to csv
-    def links_to_csv(self, file):
+    @profiled("write_csv")
+    def links_to_csv(self, file, links=None):
         """
         Saves scraped book links list (book_links) to csv file.
-        :param file: The filename to be used.
+        :param file: The filename to be used, compressed with gzip or zstd if ending in .gz or .zst.
+        :param links: The links to save instead of book_links, e.g. broken (optional).
         :returns: None
         """
+        if links is None:
+            links = self.book_links
+
         # Get headers
-        keys = self.book_links[0].keys()
+        keys = ["bookUrl", "score", "votes"]
+        if len(links) != 0:
+            keys = links[0].keys()
 
         # Write output
-        with open(file, "w") as f:
+        with open_file(file, "wt") as f:
             csv_writer = csv.DictWriter(f, keys, quoting=csv.QUOTE_NONNUMERIC)
             csv_writer.writeheader()
-            csv_writer.writerows(self.book_links)
+            csv_writer.writerows(links)
 
     def csv_to_links(self, file):
         """
         Loads list books URLs, votes and scores previously exported by links_to_csv to book_links attribute.
-        :param file: The file to be loaded.
+        :param file: The file to be loaded, decompressed if ending in .gz or .zst.
         :returns: None
         """
         self.book_links = []
+        # Whether the file holds the whole list is unknown
+        self.complete_links = False
         # Read file
-        with open(file, "rt") as f:
+        with open_file(file) as f:
             csv_reader = csv.DictReader(f, quoting=csv.QUOTE_NONNUMERIC)
             for row in csv_reader:
                 self.book_links.append(row)
 
+    @profiled("write_csv")
     def books_to_csv(self, file):
         """
         Saves the information of all books scrapped (books class attribute) to csv.
-        :param file: The filename to be used.
+        :param file: The filename to be used, compressed with gzip or zstd if ending in .gz or .zst.
         :returns: None
         """
         # Get headers
         keys = self.books[0].keys()
 
         # Write output
-        with open(file, "w") as f:
+        with open_file(file, "wt") as f:
             csv_writer = csv.DictWriter(f, keys, quoting=csv.QUOTE_NONNUMERIC)
             csv_writer.writeheader()
             csv_writer.writerows(self.books)
@@ -409,251 +421,1072 @@ class GoodReadsScraper:
     def csv_to_books(self, file):
         """
         Loads a csv containing previously scrapped books (to books class attribute).
-        :param file: The file to be loaded.
+        :param file: The file to be loaded, decompressed if ending in .gz or .zst.
         :returns: None
         """
         self.books = []
         # Read file
-        with open(file, "rt") as f:
+        with open_file(file) as f:
             csv_reader = csv.DictReader(f, quoting=csv.QUOTE_NONNUMERIC)
             for row in csv_reader:
                 self.books.append(row)
 
+    @profiled("merge_books")
+    def merge_books(self, files, file=None, retry_file=None):
+        """
+        Merges the outputs of sharded get_books runs (books_*, partial_book_scrape_*, broken_links_* and
+        partial_broken_links_* files) in list order, keeping the newest row of each book, and saves the broken
+        links not scraped by any shard to a retry list, streaming the files (see merge.merge_shards). Books are
+        placed by their position in book_links, when loaded.
+
+        The retry list can be loaded with csv_to_links to scrape the remaining books with get_books.
+        :param files: List of shard files.
+        :param file: The merged books file (optional).
+        :param retry_file: The retry links file (optional).
+        :returns: None
+        """
+        from merge import merge_shards
+
+        # Time control
+        start_time = time.time()
+
+        if file is None:
+            file = (
+                "books_"
+                + str(self.list_url.split("/")[-1])
+                + "_merged"
+                + self.csv_extension
+            )
+        if retry_file is None:
+            retry_file = (
+                "retry_links_" + str(self.list_url.split("/")[-1]) + self.csv_extension
+            )
+        links = self.book_links if len(self.book_links) != 0 else None
+        books, retries = merge_shards(files, file, retry_file, links)
+        print("%d books merged to %s, %d links to retry" % (books, file, retries))
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+
+    def emit_changelog(self, snapshot=True, listed=()):
+        """
+        Writes new, removed and changed books (ratings, ratingsByStars, bbeScore, bbeVotes, price) since the
+        previous crawl to a date-partitioned Parquet file in changelog_dir (requires pyarrow).
+        :param snapshot: Whether books holds the whole list, so books missing from it are removed (optional).
+        :param listed: bookIds on the list but not in books, e.g. broken links, never removed (optional).
+        :return: None
+        """
+        file, num_changes = record_crawl(
+            self.books, self.changelog_dir, snapshot, listed
+        )
+        if file is not None:
+            print("Saved %d changes to %s" % (num_changes, file))
+
     # Define list link scraper method.
-    def get_book_links(self):
+    @profiled("get_book_links")
+    def get_book_links(self, max_books=0, min_votes=1):
         """
         Retrieves each book URL, votes and score from the given GoodReads list (list_url).
+
+        List pages are no longer loaded once the bounds are met.
+        :param max_books: Maximum number of books to retrieve from the top of the list (optional, 0 for all).
+        :param min_votes: Minimum number of votes, retrieval stops at the first book under it (optional).
         :return: None
         """
+        from extractors import parse_list_pages
+        from extractors import parse_page
+
         # Time control
         start_time = time.time()
 
-        # Initialize driver
-        driver = webdriver.Chrome(options=self.chrome_options)
-
-        # Get list number of pages:
-        driver.get(str(self.list_url))
-        pages = driver.find_elements_by_xpath(
-            '//div[@class="pagination"]//a[contains(@href, "/list/show")]'
-        )
-        if len(pages) != 0:
-            pages = int(pages[-2].text)
+        # Set once the last list page is retrieved with no cutoff
+        self.complete_links = False
+        if self.backend == "cdp":
+            self.__get_book_links_cdp(max_books, min_votes)
         else:
-            pages = 1
-
-        # Get book URL, scores and votes
-        for page in range(1, pages + 1):
+            # Initialize driver
+            driver = self.__new_driver()
 
-            if page % 10 == 0:
-                print("Retrieving links on page " + str(page))
+            # Get list number of pages:
+            driver.get(str(self.list_url))
+            pages = parse_list_pages(parse_page(driver.page_source))
 
-            # Open target site
-            if page != 1:
-                driver.get(str(self.list_url) + "?page=" + str(page))
+            # Get book URL, scores and votes
+            for page in range(1, pages + 1):
 
-            # Wait for login popup and close (will open on second page)
-            if page == 2:
-                try:
-                    WebDriverWait(driver, 20).until(
-                        EC.visibility_of_element_located(
-                            (By.XPATH, '(//img[@alt="Dismiss"])[2]')
-                        )
-                    ).click()
-                except TimeoutException:
-                    pass
-
-            # Retrieve desired elements (ordered list of books)
-            book_titles = driver.find_elements_by_class_name("bookTitle")
-            score_votes = driver.find_elements_by_xpath(
-                '//span[@class="smallText uitext"]'
-            )
+                if page % 10 == 0:
+                    print("Retrieving links on page " + str(page))
 
-            # Extract book URL, score and votes for each element
-            for i in range(len(book_titles)):
-                votes = (
-                    score_votes[i]
-                    .find_elements_by_tag_name("a")[1]
-                    .get_attribute("text")
-                    .split(" p")[0]
-                    .replace(",", "")
-                )
+                # Open target site
+                if page != 1:
+                    driver.get(str(self.list_url) + "?page=" + str(page))
 
-                # Do not retrieve books with less than 1 vote
-                if int(votes) > 0:
-                    book_info = {
-                        "bookUrl": book_titles[i].get_attribute("href"),
-                        "score": score_votes[i]
-                        .find_elements_by_tag_name("a")[0]
-                        .get_attribute("text")
-                        .split(": ")[1]
-                        .replace(",", ""),
-                        "votes": votes,
-                    }
-                    self.book_links.append(book_info)
-                else:
+                # Parse book URL, score and votes of every element from one page snapshot,
+                # do not load remaining pages once bounds are met
+                document = parse_page(driver.page_source, driver.current_url)
+                if self.__add_list_links(document, max_books, min_votes):
                     break
+            else:
+                self.complete_links = True
+
+            # Close driver
+            driver.close()
 
         # Save links to file
-        self.links_to_csv("links_" + str(self.list_url.split("/")[-1]) + ".csv")
+        self.links_to_csv(
+            "links_" + str(self.list_url.split("/")[-1]) + self.csv_extension
+        )
 
         # Time control
         end_time = time.time()
         print("--- %s seconds ---" % (round(end_time - start_time, 2)))
 
-        # Close driver
-        driver.close()
+    def __add_list_links(self, document, max_books, min_votes):
+        from extractors import parse_list_page
+
+        # Stop at the first book under min_votes or when max_books are retrieved
+        for book_url, score, votes in parse_list_page(document):
+            if int(votes) < min_votes:
+                # GR lists are ranked, every book within bounds is retrieved
+                self.complete_links = True
+                return True
+            if 0 < max_books <= len(self.book_links):
+                return True
+            book_info = {
+                "bookUrl": book_url,
+                "score": score,
+                "votes": votes,
+            }
+            self.book_links.append(book_info)
+        return 0 < max_books <= len(self.book_links)
+
+    def __get_book_links_cdp(self, max_books, min_votes):
+        import cdpbrowser
+        from extractors import parse_list_pages
+        from extractors import parse_page
+
+        async def load_page(tab, url):
+            await tab.navigate(url)
+            return parse_page(await tab.html(), url)
+
+        # Load list pages in batches of tabs, parsed in list order until bounds are met
+        async def main(browser):
+            pool = cdpbrowser.TabPool(browser, self.tabs)
+            try:
+                documents = await pool.map(load_page, [str(self.list_url)])
+                pages = None
+                page = 1
+                while len(pool.errors) == 0:
+                    if pages is None:
+                        pages = parse_list_pages(documents[0])
+                    for document in documents:
+                        if self.__add_list_links(document, max_books, min_votes):
+                            return
+                    if page >= pages:
+                        self.complete_links = True
+                        return
+                    print("Retrieving links on page " + str(page + 1))
+                    batch = range(page + 1, min(page + self.tabs, pages) + 1)
+                    documents = await pool.map(
+                        load_page,
+                        [str(self.list_url) + "?page=" + str(p) for p in batch],
+                    )
+                    page = batch[-1]
+                raise RuntimeError("Cannot load %s" % pool.errors[0][0])
+            finally:
+                await pool.close()
+
+        cdpbrowser.run(main, scripts=[SUPPRESS_POPUP_JS], **self.__cdp_options())
+
+    def __save_progress(self, start_, stop):
+        # Save books and broken links of positions start_ to stop (not included) when scraping cannot finish
+        print("Cannot finish scraping, saving progress.")
+        if len(self.books) != 0:
+            self.books_to_csv(
+                "books_" + str(start_) + "_" + str(stop) + self.csv_extension
+            )
+        self.links_to_csv(
+            "broken_links_" + str(start_) + "_" + str(stop) + self.csv_extension,
+            self.broken,
+        )
+
+    def __get_books_cdp(self, start_, end_, specs):
+        import cdpbrowser
+
+        # Scrape books concurrently in tabs, in list order, saving progress every 250 books as the selenium loop.
+        # Pages failing after retries stop scraping once their batch is done, as in the selenium loop.
+        async def main(browser):
+            pool = cdpbrowser.TabPool(browser, self.tabs)
+            try:
+                for first in range(start_, end_, 250):
+                    print(first)
+                    stop = min(first + 250, end_)
+                    links = self.book_links[first:stop]
+                    books = await pool.map(
+                        lambda tab, link: self.scrape_book_tab(tab, link, specs), links
+                    )
+                    failed = [
+                        first + position
+                        for position, link in enumerate(links)
+                        if any(link is item for item, _ in pool.errors)
+                    ]
+                    for position, (link, book) in enumerate(zip(links, books)):
+                        if book is not None:
+                            self.books.append(book)
+                        elif first + position not in failed:
+                            print("#", end="")
+                            self.broken.append(link)
+                    if len(failed) != 0:
+                        self.__save_progress(start_, stop)
+                        # GR keeps failing, stop here (resume with start_ at the first failed page)
+                        print("Resume with start_=%d" % failed[0])
+                        return False
+
+                    # Partial save (books_to_csv needs a book for the columns)
+                    if len(self.books) != 0:
+                        self.books_to_csv(
+                            "partial_book_scrape_"
+                            + str(start_)
+                            + "_"
+                            + str(end_)
+                            + self.csv_extension
+                        )
+                    self.links_to_csv(
+                        "partial_broken_links_"
+                        + str(start_)
+                        + "_"
+                        + str(end_)
+                        + self.csv_extension,
+                        self.broken,
+                    )
+                return True
+            finally:
+                await pool.close()
+                for item, error in pool.errors:
+                    print("\n Failed %s: %s" % (item, error))
+
+        return cdpbrowser.run(main, scripts=[SUPPRESS_POPUP_JS], **self.__cdp_options())
 
     # Define method to scrape books
-    def get_books(self, start_=0, end_=0):
+    def scrape_book(self, driver, link, specs, in_browser=False):
+        """
+        Navigates to a book page and builds its book entry.
+
+        :param driver: The WebDriver to use (each thread of a pipeline uses its own).
+        :param link: The book link dict (bookUrl, score, votes).
+        :param specs: The CompiledSpecs of the fields to extract (see extractors.compile_specs).
+        :param in_browser: Extract fields with one execute_script call instead of parsing the page source.
+        :return: The book dict, None if the page is broken. RuntimeError if the page does not load after retries.
+        """
+        from selenium.common.exceptions import NoSuchElementException
+        from extractors import build_book
+        from extractors import parse_page
+
+        timer = None
+        if self.profiler is not None:
+            timer = self.profiler.time_extractor
+
+        # Navigate to book url
+        start = time.perf_counter()
+        driver.get(link.get("bookUrl"))
+        if timer is not None:
+            timer("driver.get", time.perf_counter() - start)
+
+        # Broken pages
+        if driver.find_element_by_xpath("//head").get_attribute("innerText") == "":
+            return None
+
+        # Avoid common 502/504 crashes. Book title is always present, if not found an error occurred,
+        # so reload and if no response, give up.
+        for attempt in range(10):
+            try:
+                driver.find_element_by_id("bookTitle")
+            except NoSuchElementException:
+                print("\n ooops, try: " + link.get("bookUrl"))
+                time.sleep(self.backoff * (1 + attempt ** 2))
+                driver.get(link.get("bookUrl"))
+            else:
+                break
+        else:
+            raise RuntimeError("Cannot load " + link.get("bookUrl"))
+
+        # Extract requested fields in a single pass over the page
+        if in_browser:
+            values = specs.extract_in_browser(driver, timer)
+        else:
+            start = time.perf_counter()
+            document = parse_page(driver.page_source)
+            if timer is not None:
+                timer("page_source+parse_page", time.perf_counter() - start)
+            values = specs.extract(document, timer)
+
+        return build_book(specs, values, link)
+
+    async def scrape_book_tab(self, tab, link, specs):
+        """
+        Navigates to a book page in a cdp backend tab and builds its book entry, fields are extracted in the tab.
+
+        :param tab: The cdpbrowser.Tab to use (each concurrent lookup uses its own).
+        :param link: The book link dict (bookUrl, score, votes).
+        :param specs: The CompiledSpecs of the fields to extract (see extractors.compile_specs).
+        :return: The book dict, None if the page is broken. RuntimeError if the page does not load after retries.
+        """
+        import asyncio
+        from extractors import build_book
+
+        timer = None
+        if self.profiler is not None:
+            timer = self.profiler.time_extractor
+
+        # Navigate to book url
+        start = time.perf_counter()
+        await tab.navigate(link.get("bookUrl"))
+        if timer is not None:
+            timer("tab.navigate", time.perf_counter() - start)
+
+        # Broken pages
+        if await tab.evaluate("document.head.innerText") == "":
+            return None
+
+        # Avoid common 502/504 crashes, waiting does not block the other tabs
+        for attempt in range(10):
+            if await tab.evaluate("document.getElementById('bookTitle') !== null"):
+                break
+            print("\n ooops, try: " + link.get("bookUrl"))
+            await asyncio.sleep(self.backoff * (1 + attempt ** 2))
+            await tab.navigate(link.get("bookUrl"))
+        else:
+            raise RuntimeError("Cannot load " + link.get("bookUrl"))
+
+        values = await specs.extract_in_tab(tab, timer)
+        return build_book(specs, values, link)
+
+    def fetch_book(self, link, specs):
+        """
+        Fetches a book page without a browser and builds its book entry, for stages scraping many pages from
+        several threads.
+
+        :param link: The book link dict (bookUrl, score, votes).
+        :param specs: The CompiledSpecs of the fields to extract (see extractors.compile_specs).
+        :return: The book dict, None if the page is broken. FetchError if the page cannot be fetched.
+        """
+        from extractors import build_book
+        from extractors import parse_page
+        from fetch import fetch
+
+        timer = None
+        if self.profiler is not None:
+            timer = self.profiler.time_extractor
+
+        start = time.perf_counter()
+        document = parse_page(fetch(link.get("bookUrl")), link.get("bookUrl"))
+        if timer is not None:
+            timer("fetch+parse_page", time.perf_counter() - start)
+
+        # Broken pages (book title is always present)
+        if len(document.xpath('//*[@id="bookTitle"]')) == 0:
+            return None
+        return build_book(specs, specs.extract(document, timer), link)
+
+    @profiled("get_books")
+    def get_books(
+        self,
+        start_=0,
+        end_=0,
+        fields=None,
+        in_browser=False,
+        max_books=0,
+        min_votes=1,
+        processes=0,
+        workers=16,
+    ):
         """
         Retrives information of each book on the given GoodReads list.
         :param start_: Position on book_links list to start scraping (useful after crashed) using 0 indexing.
         :param end_: Position on book_links list to stop scraping.
+        :param fields: Book fields to retrieve (optional, defaults to all). Extractors not needed by the requested
+            fields are skipped, e.g. ["rating", "numRatings", "ratingsByStars"] for a ratings refresh.
+        :param in_browser: Extract fields inside the browser with one execute_script call per page instead of
+            parsing the page source (optional, for pages needing the rendered DOM, always used by the cdp backend).
+        :param max_books: Maximum number of books to scrape from the top of the list (optional, 0 for all).
+        :param min_votes: Do not scrape books from the first one with less votes than min_votes (optional).
+        :param processes: Fetch pages without a browser and parse them in this many processes, to use every
+            core once parsing is the bottleneck (optional, 0 scrapes with the browser backend).
+        :param workers: Number of concurrent fetches when processes is set (optional).
         :return: None
         """
+        from extractors import compile_specs
+
         # Time control
         start_time = time.time()
 
-        # Do not scrape books on robots_disallow:
-        self.book_links = self.__rem_disallowed_links()
+        # Compile field specs for the requested fields (bookId is always kept to identify books)
+        if fields is not None:
+            fields = ["bookId"] + list(fields)
+        specs = compile_specs(fields)
+
+        # Do not scrape books on robots_disallow (read without a browser when pages are fetched):
+        browserless = self.backend != "cdp" and processes != 0
+        self.book_links = self.__rem_disallowed_links(browserless)
 
         # Do not try to scrape more books than links
         if end_ > len(self.book_links) or end_ == 0:
             end_ = len(self.book_links)
 
-        # Initialize driver
-        self.driver = webdriver.Chrome(options=self.chrome_options)
-
-        # Iterate over link list
-        for i in range(start_, end_):
-            # Navigate to book url
-            self.driver.get(self.book_links[i].get("bookUrl"))
-
-            # Print some progress
-            if i % 500 == 0:
-                print(i)
-            elif i % 100 == 0:
-                print(
-                    " " + str(int((i - start_) * 100 / (end_ - start_))) + "% ", end=""
-                )
-            elif i % 10 == 0:
-                print(".", end="")
+        # Do not scrape books out of max_books and min_votes bounds
+        end_ = min(end_, self.__count_links_in_bounds(max_books, min_votes))
+
+        if self.backend == "cdp":
+            # Scrape books concurrently in tabs, in list order
+            if not self.__get_books_cdp(start_, end_, specs):
+                return
+        elif processes != 0:
+            from parsepool import scrape_books
+
+            # Fetch pages in threads and parse them in processes, in list order (no partial saves)
+            links = self.book_links[start_:end_]
+            books, errors = scrape_books(links, specs.fields, workers, processes)
+            for stage, link, error in errors:
+                print("\n Failed %s %s: %s" % (stage, link.get("bookUrl"), error))
+            for link, book in zip(links, books):
+                if book is None:
+                    self.broken.append(link)
+                else:
+                    self.books.append(book)
+        else:
+            # Initialize driver
+            self.driver = self.__new_driver()
+
+            # Iterate over link list
+            for i in range(start_, end_):
+                # Print some progress
+                if i % 500 == 0:
+                    print(i)
+                elif i % 100 == 0:
+                    print(
+                        " " + str(int((i - start_) * 100 / (end_ - start_))) + "% ",
+                        end="",
+                    )
+                elif i % 10 == 0:
+                    print(".", end="")
 
-            # Wait for login popup and close (will open on second page)
-            if i == start_ + 1:
+                # Navigate to book url and create book entry
                 try:
-                    WebDriverWait(self.driver, 20).until(
-                        EC.visibility_of_element_located(
-                            (By.XPATH, '(//img[@alt="Dismiss"])[2]')
-                        )
-                    ).click()
-                except TimeoutException:
-                    pass
+                    book = self.scrape_book(
+                        self.driver, self.book_links[i], specs, in_browser
+                    )
+                except RuntimeError:
+                    self.__save_progress(start_, i)
+                    # GR keeps failing, stop here (resume with start_=i)
+                    self.driver.close()
+                    return
+
+                # Skip broken pages
+                if book is None:
+                    print("#", end="")
+                    self.broken.append(self.book_links[i])
+                    continue
+                self.books.append(book)
+
+                # Partial save (books_to_csv needs a book for the columns)
+                if i % 250 == 0 and len(self.books) != 0:
+                    self.books_to_csv(
+                        "partial_book_scrape_"
+                        + str(start_)
+                        + "_"
+                        + str(end_)
+                        + self.csv_extension
+                    )
+                    self.links_to_csv(
+                        "partial_broken_links_"
+                        + str(start_)
+                        + "_"
+                        + str(end_)
+                        + self.csv_extension,
+                        self.broken,
+                    )
 
-            # Skip broken pages
-            if (
-                self.driver.find_element_by_xpath("//head").get_attribute("innerText")
-                == ""
-            ):
-                print("#", end="")
-                self.broken.append(self.book_links[i].get)
-                continue
+            self.driver.close()
+
+        # Emit changes from previous crawl (removed books are only known when the whole list is scraped,
+        # books of broken or failed links are still on the list)
+        if self.changelog_dir is not None:
+            self.emit_changelog(
+                snapshot=(
+                    self.complete_links and start_ == 0 and end_ == len(self.book_links)
+                ),
+                listed=[
+                    link.get("bookUrl").split("/")[-1]
+                    for link in self.book_links[start_:end_]
+                ],
+            )
 
-            # Avoid common 502/504 crashes. Book title is always present, if not found an error occurred,
-            # so retry and if no response, save and exit.
-            for attempt in range(10):
-                try:
-                    title = self.__get_title()
-                except NoSuchElementException:
-                    print("\n ooops, try: " + str(i))
-                    time.sleep(20 + attempt ** 2 * 20)
-                else:
-                    break
-            else:
-                print("Cannot finish scraping, saving progress.")
-                self.books_to_csv("books_" + str(start_) + "_" + str(i - 1) + ".csv")
-                self.links_to_csv("broken_links_" + str(i - 1) + ".csv")
-
-            # Calculate derived attributes
-            ratings_by_stars = self.__get_ratings_by_stars()
-            num_ratings = sum(ratings_by_stars)
-            if num_ratings > 0:
-                liked_percent = int(
-                    round(sum(ratings_by_stars[0:3]) * 100 / num_ratings, 0)
+        # Save scraped books to file
+        if len(self.books) != 0:
+            self.books_to_csv(
+                "books_"
+                + str(self.list_url.split("/")[-1])
+                + "_"
+                + str(start_)
+                + "_"
+                + str(end_)
+                + self.csv_extension
+            )
+        if len(self.broken) != 0:
+            self.links_to_csv(
+                "broken_links_"
+                + str(self.list_url.split("/")[-1])
+                + "_"
+                + str(start_)
+                + "_"
+                + str(end_)
+                + self.csv_extension,
+                self.broken,
+            )
+
+        # Delete partial save and empty files (not written if bounds stopped before a partial save)
+        for partial in ("partial_book_scrape_", "partial_broken_links_"):
+            partial_file = partial + str(start_) + "_" + str(end_) + self.csv_extension
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+
+    # Define method to run stages as a pipeline
+    @profiled("run_pipeline")
+    def run_pipeline(
+        self,
+        scrape_workers=2,
+        cover_workers=2,
+        price_workers=1,
+        queue_size=32,
+        fields=None,
+        covers=True,
+        prices=True,
+        sharded=False,
+    ):
+        """
+        Scrapes books, downloads their covers and gets their prices as a pipeline: each book moves on to the
+        cover and price stages as soon as it is scraped, instead of waiting for the whole list.
+
+        Stages are connected by bounded queues and each one runs its own number of workers (browser stages start
+        one driver per worker). With the cdp backend each of tabs tabs scrapes a book and looks its price up,
+        while covers are downloaded in cover_workers threads (scrape_workers, price_workers and queue_size are
+        not used). Uses book_links, so get_book_links should be run or links loaded (csv_to_links) before use.
+        Books are kept in list order.
+        :param scrape_workers: Number of book page workers (optional).
+        :param cover_workers: Number of cover download workers (optional).
+        :param price_workers: Number of IberLibro price workers (optional).
+        :param queue_size: The capacity of the queue feeding each stage (optional).
+        :param fields: Book fields to retrieve (optional, defaults to all).
+        :param covers: Whether to run the cover stage (optional).
+        :param prices: Whether to run the price stage (optional).
+        :param sharded: Save covers to a hash-sharded tree (optional).
+        :return: None
+        """
+        from extractors import compile_specs
+
+        # Time control
+        start_time = time.time()
+
+        if fields is not None:
+            fields = ["bookId"] + list(fields)
+        specs = compile_specs(fields)
+        self.book_links = self.__rem_disallowed_links()
+        if covers and not os.path.isdir("img"):
+            os.makedirs("img")
+
+        if self.backend == "cdp":
+            self.__run_pipeline_cdp(specs, cover_workers, covers, prices, sharded)
+        else:
+            self.__run_pipeline_selenium(
+                specs,
+                scrape_workers,
+                cover_workers,
+                price_workers,
+                queue_size,
+                covers,
+                prices,
+                sharded,
+            )
+
+        # Save scraped books to file
+        if len(self.books) != 0:
+            self.books_to_csv(
+                "books_"
+                + str(self.list_url.split("/")[-1])
+                + "_pipeline"
+                + self.csv_extension
+            )
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+
+    def __run_pipeline_selenium(
+        self,
+        specs,
+        scrape_workers,
+        cover_workers,
+        price_workers,
+        queue_size,
+        covers,
+        prices,
+        sharded,
+    ):
+        from pipeline import Pipeline
+        from pipeline import Stage
+
+        def stop_driver(driver):
+            driver.close()
+
+        def scrape(driver, item):
+            position, link = item
+            book = self.scrape_book(driver, link, specs)
+            if book is None:
+                self.broken.append(link)
+                return None
+            return position, book
+
+        stages = [
+            Stage("books", scrape, scrape_workers, self.__new_driver, stop_driver)
+        ]
+        if covers:
+            stages.append(
+                Stage(
+                    "covers",
+                    lambda _, item: (item[0], self.download_cover(item[1], sharded)),
+                    cover_workers,
                 )
-            else:
-                liked_percent = ""
-
-            # Create book entry
-            book = {
-                "bookId": self.__get_book_id(self.book_links[i].get("bookUrl")),
-                "title": title,
-                "series": self.__get_series(),
-                "author": self.__get_author(),
-                "rating": self.__get_rating(),
-                "description": self.__get_description(),
-                "language": self.__get_language(),
-                "isbn": self.__get_isbn(),
-                "genres": self.__get_genres(),
-                "characters": self.__get_characters(),
-                "bookFormat": self.__get_book_format(),
-                "edition": self.__get_edition(),
-                "pages": self.__get_pages(),
-                "publisher": self.__get_publisher(),
-                "publishDate": self.__get_publish_date(),
-                "firstPublishDate": self.__get_first_publish_date(),
-                "awards": self.__get_awards(),
-                "numRatings": self.__get_num_ratings(),
-                "ratingsByStars": ratings_by_stars,
-                "likedPercent": liked_percent,
-                "setting": self.__get_setting(),
-                "coverImg": self.__get_cover_img_url(),
-                "bbeScore": self.book_links[i].get("score"),
-                "bbeVotes": self.book_links[i].get("votes"),
-            }
-            self.books.append(book)
+            )
+        if prices:
+            stages.append(
+                Stage(
+                    "prices",
+                    lambda driver, item: (item[0], self.lookup_price(driver, item[1])),
+                    price_workers,
+                    self.__new_driver,
+                    stop_driver,
+                )
+            )
+
+        pipeline = Pipeline(stages, queue_size)
+        results = pipeline.run(enumerate(self.book_links))
 
-            # Partial save
-            if i % 250 == 0:
-                self.books_to_csv(
-                    "partial_book_scrape_" + str(start_) + "_" + str(end_) + ".csv"
+        # Books failing in the cover or price stage are kept, pages that did not load are broken
+        for stage, item, error in pipeline.errors:
+            if item is None:
+                print("Stage %s worker failed: %s" % (stage, error))
+            elif stage == "books":
+                self.broken.append(item[1])
+            else:
+                results.append(item)
+        results.sort(key=lambda item: item[0])
+        self.books = [book for _, book in results]
+        print("Processed per stage:", pipeline.processed)
+
+    def __run_pipeline_cdp(self, specs, cover_workers, covers, prices, sharded):
+        import asyncio
+        import cdpbrowser
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Each tab scrapes a book and looks its price up while its cover is downloaded in a thread, books
+        # failing in the cover or price step are kept, pages that did not load are broken
+        async def process(executor, tab, link):
+            book = await self.scrape_book_tab(tab, link, specs)
+            if book is None:
+                self.broken.append(link)
+                return None
+            cover = None
+            if covers:
+                cover = asyncio.get_running_loop().run_in_executor(
+                    executor, self.download_cover, book, sharded
                 )
-                self.links_to_csv(
-                    "partial_broken_links_" + str(start_) + "_" + str(end_) + ".csv"
+            if prices:
+                try:
+                    await self.lookup_price_tab(tab, book)
+                except Exception as e:
+                    print("\n Failed prices %s: %s" % (link.get("bookUrl"), e))
+            if cover is not None:
+                try:
+                    await cover
+                except Exception as e:
+                    print("\n Failed covers %s: %s" % (link.get("bookUrl"), e))
+            return book
+
+        async def main(browser):
+            pool = cdpbrowser.TabPool(browser, self.tabs)
+            try:
+                with ThreadPoolExecutor(cover_workers) as executor:
+                    return await pool.map(
+                        lambda tab, link: process(executor, tab, link), self.book_links
+                    )
+            finally:
+                await pool.close()
+                for link, error in pool.errors:
+                    print("\n Failed %s: %s" % (link.get("bookUrl"), error))
+                    self.broken.append(link)
+
+        books = cdpbrowser.run(
+            main, scripts=[SUPPRESS_POPUP_JS], **self.__cdp_options()
+        )
+        self.books = [book for book in books if book is not None]
+
+    @profiled("get_books_reviews")
+    def get_books_reviews(self, max_pages=10, workers=4, file=None):
+        """
+        Crawls the reviews of each book (review pages fetched without a browser, several books at a time) and
+        streams them to a JSON lines file.
+
+        Books whose reviews are already saved (see reviews.read_journal) are skipped, so an interrupted crawl
+        can be run again to resume it, and pages disallowed by robots.txt are never fetched. A books list should be scraped or loaded (csv_to_books) before use.
+        :param max_pages: Maximum number of review pages per book (optional, 30 reviews per page).
+        :param workers: Number of books crawled concurrently (optional).
+        :param file: The reviews file (optional, .jsonl, .jsonl.gz, .jsonl.zst or .parquet).
+        :return: None
+        """
+        from reviews import crawl_reviews
+
+        # Time control
+        start_time = time.time()
+
+        # Reviews file compressed as output csv files
+        if file is None:
+            file = (
+                "reviews_"
+                + str(self.list_url.split("/")[-1])
+                + self.csv_extension.replace(".csv", ".jsonl")
+            )
+        count, errors = crawl_reviews(
+            (book["bookId"] for book in self.books),
+            file,
+            max_pages,
+            workers,
+            disallow=self.__robots_disallow_browserless(),
+        )
+        for book_id, error in errors:
+            print("\n Failed %s: %s" % (book_id, error))
+        print("%d reviews saved to %s" % (count, file))
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+
+    @profiled("get_books_authors")
+    def get_books_authors(self, workers=4, cache_file="authors.db", max_age=None):
+        """
+        Links each book to its authors (authorIds field) and fetches the profile of each distinct author (bio,
+        followers, average rating, works count) once into a persistent author cache, without a browser.
+
+        Authors and book authors already in the cache, from previous runs or other lists, are not fetched again.
+        Saves the updated books and the profiles of their authors to csv.
+        :param workers: Number of concurrent fetches (optional).
+        :param cache_file: The SQLite author cache (optional, see authors.AuthorCache).
+        :param max_age: Refetch authors cached longer ago than max_age seconds (optional).
+        :return: None
+        """
+        from authors import AuthorCache
+        from authors import crawl_authors
+
+        # Time control
+        start_time = time.time()
+
+        with AuthorCache(cache_file) as cache:
+            book_authors, errors = crawl_authors(
+                self.books,
+                cache,
+                workers,
+                max_age,
+                self.__robots_disallow_browserless(),
+            )
+            for item, error in errors:
+                print("\n Failed %s: %s" % (item, error))
+
+            # Link books to authors by author ID
+            author_ids = []
+            for book in self.books:
+                book["authorIds"] = book_authors.get(str(book["bookId"]), [])
+                author_ids += book["authorIds"]
+            profiles = [cache.get(a) for a in dict.fromkeys(author_ids)]
+
+        # Save updated books and authors to file
+        self.books_to_csv(
+            "books_"
+            + str(self.list_url.split("/")[-1])
+            + "_authors"
+            + self.csv_extension
+        )
+        profiles = [profile for profile in profiles if profile is not None]
+        if len(profiles) != 0:
+            with open_file(
+                "authors_" + str(self.list_url.split("/")[-1]) + self.csv_extension,
+                "wt",
+            ) as f:
+                csv_writer = csv.DictWriter(
+                    f, profiles[0].keys(), quoting=csv.QUOTE_NONNUMERIC
                 )
+                csv_writer.writeheader()
+                csv_writer.writerows(profiles)
 
-        # Save scraped books to file
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+
+    @profiled("get_series_books")
+    def get_series_books(self, fields=None, workers=4, journal_file=None):
+        """
+        Follows the series of the scraped books and adds the books of each series to books, without a browser.
+
+        Each series page is fetched once for the whole dataset, and books already in books, book_links or the
+        journal are not fetched. Series books not on the list have empty bbeScore and bbeVotes. The journal
+        keeps fetched series and books, so an interrupted expansion is resumed by running it again.
+        :param fields: Book fields to retrieve (optional, defaults to all, see get_books).
+        :param workers: Number of concurrent fetches (optional).
+        :param journal_file: The series journal (optional, see series.SeriesJournal).
+        :return: None
+        """
+        from extractors import compile_specs
+        from series import SeriesJournal
+        from series import expand_series
+
+        # Time control
+        start_time = time.time()
+
+        if fields is not None:
+            fields = ["bookId"] + list(fields)
+        specs = compile_specs(fields)
+        if journal_file is None:
+            journal_file = (
+                "series_"
+                + str(self.list_url.split("/")[-1])
+                + self.csv_extension.replace(".csv", ".jsonl")
+            )
+
+        with SeriesJournal(journal_file) as journal:
+            known = [book["bookId"] for book in self.books]
+            known += [link["bookUrl"] for link in self.book_links]
+            errors = expand_series(
+                self.books,
+                known,
+                journal,
+                lambda link: self.fetch_book(link, specs),
+                workers,
+                self.__robots_disallow_browserless(),
+            )
+            for stage, item, error in errors:
+                print("\n Failed %s %s: %s" % (stage, item, error))
+
+            # Add series books, once
+            known_ids = set(str(book["bookId"]) for book in self.books)
+            for book in journal.books:
+                if str(book["bookId"]) not in known_ids:
+                    known_ids.add(str(book["bookId"]))
+                    self.books.append(book)
+            print(
+                "%d series fetched, %d books" % (len(journal.series), len(self.books))
+            )
+
+        # Save books to file
         self.books_to_csv(
             "books_"
             + str(self.list_url.split("/")[-1])
-            + "_"
-            + str(start_)
-            + "_"
-            + str(end_)
-            + ".csv"
+            + "_series"
+            + self.csv_extension
         )
-        if len(self.broken) != 0:
-            self.links_to_csv(
-                "broken_links_"
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+
+    @profiled("crawl_related")
+    def crawl_related(
+        self,
+        max_depth=2,
+        max_pages=10000,
+        workers=4,
+        fields=None,
+        frontier_file=None,
+        out_file=None,
+    ):
+        """
+        Crawls beyond the list breadth-first, from the book links through the "Readers also enjoyed" books of
+        each page, without a browser.
+
+        Pending pages are kept in a SQLite frontier ordered by depth and then by the votes or ratings of the
+        book linking them, and visited books in a Bloom filter keyed by bookId, so memory stays flat however
+        many books are crawled. Running it again with the same files resumes the crawl.
+        :param max_depth: Maximum number of links followed from the list (optional).
+        :param max_pages: Maximum number of pages crawled, over all runs (optional).
+        :param workers: Number of concurrent fetches (optional).
+        :param fields: Book fields to retrieve (optional, defaults to all, see get_books).
+        :param frontier_file: The frontier SQLite file (optional, see frontier.Frontier).
+        :param out_file: The JSON lines file the books are appended to, with their depth (optional, runs of
+            compressed output are written to parts next to it, see frontier.crawl).
+        :return: None
+        """
+        from extractors import BOOK_FIELDS
+        from extractors import compile_specs
+        from fetch import robots_allowed
+        from frontier import Frontier
+        from frontier import crawl
+
+        # Time control
+        start_time = time.time()
+
+        if fields is None:
+            fields = BOOK_FIELDS
+        specs = compile_specs(["bookId", "relatedUrls"] + list(fields))
+        if frontier_file is None:
+            frontier_file = "frontier_" + str(self.list_url.split("/")[-1]) + ".db"
+        if out_file is None:
+            out_file = (
+                "crawl_"
                 + str(self.list_url.split("/")[-1])
-                + "_"
-                + str(start_)
-                + "_"
-                + str(end_)
-                + ".csv"
+                + self.csv_extension.replace(".csv", ".jsonl")
             )
 
-        # Delete partial save and empty files
-        os.remove("partial_book_scrape_" + str(start_) + "_" + str(end_) + ".csv")
-        os.remove("partial_broken_links_" + str(start_) + "_" + str(end_) + ".csv")
+        disallow = self.__robots_disallow_browserless()
+        with Frontier(frontier_file) as frontier:
+            # List books first, most voted first
+            if frontier.pages == 0 and len(frontier) == 0:
+                for link in self.book_links:
+                    if robots_allowed(link["bookUrl"], disallow):
+                        frontier.push([link], 0, float(str(link["votes"]) or 0))
+            errors = crawl(
+                frontier,
+                lambda link: self.fetch_book(link, specs),
+                out_file,
+                max_depth,
+                max_pages,
+                workers,
+                disallow,
+            )
+            for stage, item, error in errors:
+                print("\n Failed %s %s: %s" % (stage, item, error))
+            print("%d pages crawled to %s" % (frontier.pages, out_file))
 
         # Time control
         end_time = time.time()
         print("--- %s seconds ---" % (round(end_time - start_time, 2)))
 
-        self.driver.close()
+    @profiled("normalize_books")
+    def normalize_books(self, file=None):
+        """
+        Converts books to typed columns (ints, floats, ISO dates, lists and nulls for missing values, see
+        normalize) in vectorised passes and saves them to Parquet (requires pyarrow).
+
+        :param file: A books file to normalize instead of books class attribute (optional, csv, csv.gz, csv.zst,
+            Parquet or SQLite).
+        :return: The normalized pyarrow Table.
+        """
+        import pyarrow.parquet as pq
+        from normalize import books_table
+        from normalize import normalize_table
+        from normalize import read_table
+
+        # Time control
+        start_time = time.time()
+
+        if file is None:
+            table = normalize_table(books_table(self.books))
+        else:
+            table = normalize_table(read_table(file))
+
+        # Save normalized books to file
+        pq.write_table(
+            table,
+            "books_" + str(self.list_url.split("/")[-1]) + "_normalized.parquet",
+            compression="zstd",
+        )
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+        return table
+
+    @profiled("export_books")
+    def export_books(
+        self,
+        partition_by=("language", "genre", "year"),
+        workers=4,
+        file=None,
+        out_dir=None,
+    ):
+        """
+        Exports books normalized to typed columns (see normalize_books) as Parquet files partitioned by
+        language, first genre, publish year or any other column, with a manifest of the row counts, column stats
+        and checksums of the partitions (requires pyarrow).
+
+        Partitions are written concurrently. Readers can pick partitions from the manifest (export.read_manifest
+        and export.select_partitions) and check them with export.verify without scanning the files.
+        :param partition_by: Partition keys, outermost first (optional, see export.partition_column).
+        :param workers: Number of partitions written concurrently (optional).
+        :param file: A books file to export instead of books class attribute (optional, csv, csv.gz, csv.zst,
+            Parquet or SQLite).
+        :param out_dir: The export directory (optional).
+        :return: The manifest dict.
+        """
+        from export import export_table
+        from normalize import books_table
+        from normalize import normalize_table
+        from normalize import read_table
+
+        # Time control
+        start_time = time.time()
+
+        if file is None:
+            table = normalize_table(books_table(self.books))
+        else:
+            table = normalize_table(read_table(file))
+        if out_dir is None:
+            out_dir = "books_" + str(self.list_url.split("/")[-1]) + "_export"
+        manifest = export_table(table, out_dir, partition_by, workers)
+        print(
+            "%d books exported to %d partitions in %s"
+            % (manifest["rows"], len(manifest["partitions"]), out_dir)
+        )
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+        return manifest
 
     # Define method to get book prices
+    def lookup_price(self, driver, book):
+        """
+        Sets the IberLibro price of a book, taken by its ISBN. Books with no ISBN or price already present are
+        left unchanged.
+        :param driver: The WebDriver to use (each thread of a pipeline uses its own).
+        :param book: The book dict to update.
+        :return: The book dict.
+        """
+        isbn = book["isbn"]  # Take ISBN from Goodreads books record
+
+        # Skip missing isbn
+        if isbn != "9999999999999":
+            # Skip if price already present
+            if "price" not in book.keys():
+                book["price"] = self.__get_price(driver, isbn)
+        return book
+
+    async def lookup_price_tab(self, tab, book):
+        """
+        Sets the IberLibro price of a book using a cdp backend tab, as lookup_price does.
+        :param tab: The cdpbrowser.Tab to use (each concurrent lookup uses its own).
+        :param book: The book dict to update.
+        :return: The book dict.
+        """
+        isbn = book["isbn"]  # Take ISBN from Goodreads books record
+
+        # Skip missing isbn and price already present
+        if isbn != "9999999999999" and "price" not in book.keys():
+            book["price"] = await self.__get_price_cdp(tab, isbn)
+        return book
+
+    @profiled("get_books_price")
     def get_books_price(self):
         """
         Retrieves book price from IberLibro store.
@@ -665,34 +1498,39 @@ class GoodReadsScraper:
         # Time control
         start_time = time.time()
 
-        # Initialize driver
-        self.driver = webdriver.Chrome(options=self.chrome_options)
+        if self.backend == "cdp":
+            # Look up prices concurrently in tabs
+            self.__map_tabs(self.lookup_price_tab, self.books)
+        else:
+            # Initialize driver
+            self.driver = self.__new_driver()
 
-        # Get price for each book on books
-        for i in range(len(self.books)):
-            isbn = self.books[i]["isbn"]  # Take ISBN from Goodreads books record
+            # Get price for each book on books
+            for i in range(len(self.books)):
+                # Print some progress
+                if i % 100 == 0:
+                    print("Getting price #" + str(i))
+                elif i % 10 == 0:
+                    print(".", end="")
 
-            # Print some progress
-            if i % 100 == 0:
-                print("Getting price #" + str(i))
-            elif i % 10 == 0:
-                print(".", end="")
+                self.lookup_price(self.driver, self.books[i])
 
-            # Skip missing isbn
-            if isbn != "9999999999999":
-                # Skip if price already present
-                if "price" not in self.books[i].keys():
-                    self.books[i]["price"] = self.__get_price(isbn)
+            self.driver.close()
+
+        # Emit price changes from previous crawl
+        if self.changelog_dir is not None:
+            self.emit_changelog(snapshot=False)
 
         # Save updated books to file
-        self.books_to_csv("books_" + str(self.list_url.split("/")[-1]) + "_price.csv")
+        self.books_to_csv(
+            "books_" + str(self.list_url.split("/")[-1]) + "_price" + self.csv_extension
+        )
 
         # Time control
         end_time = time.time()
         print("--- %s seconds ---" % (round(end_time - start_time, 2)))
 
-        self.driver.close()
-
+    @profiled("get_books_kindle_price")
     def get_books_kindle_price(self):
         """
         Retrieves Kindle ebook price from Amazon store.
@@ -704,43 +1542,67 @@ class GoodReadsScraper:
         # Time control
         start_time = time.time()
 
-        # Initialize driver
-        self.driver = webdriver.Chrome(options=self.chrome_options)
+        if self.backend == "cdp":
+            # Look up prices concurrently in tabs
+            async def lookup_kindle_price(tab, book):
+                if "kindle_price" not in book.keys():
+                    book["kindle_price"] = await self.__get_kindle_price_cdp(
+                        tab, book["title"], book["author"]
+                    )
 
-        # Get price for each book on books
-        for i in range(len(self.books)):
-            author = self.books[i]["author"]
-            title = self.books[i]["title"]
+            self.__map_tabs(lookup_kindle_price, self.books)
+        else:
+            # Initialize driver
+            self.driver = self.__new_driver()
 
-            # Print some progress
-            if i % 100 == 0:
-                print("Getting kindle price #" + str(i))
-            elif i % 10 == 0:
-                print(".", end="")
+            # Get price for each book on books
+            for i in range(len(self.books)):
+                author = self.books[i]["author"]
+                title = self.books[i]["title"]
 
-            # Skip if price already present
-            if "kindle_price" not in self.books[i].keys():
-                self.books[i]["kindle_price"] = self.__get_kindle_price(title, author)
+                # Print some progress
+                if i % 100 == 0:
+                    print("Getting kindle price #" + str(i))
+                elif i % 10 == 0:
+                    print(".", end="")
+
+                # Skip if price already present
+                if "kindle_price" not in self.books[i].keys():
+                    self.books[i]["kindle_price"] = self.__get_kindle_price(
+                        title, author
+                    )
+
+            self.driver.close()
 
         # Save updated books to file
         self.books_to_csv(
-            "books_" + str(self.list_url.split("/")[-1]) + "_kindlePrice.csv"
+            "books_"
+            + str(self.list_url.split("/")[-1])
+            + "_kindlePrice"
+            + self.csv_extension
         )
 
         # Time control
         end_time = time.time()
         print("--- %s seconds ---" % (round(end_time - start_time, 2)))
 
-        self.driver.close()
-
-    def get_books_cover(self):
+    @profiled("get_books_cover")
+    def get_books_cover(self, sharded=False, pack_dir=None):
         """
         Retrieves books covers to a img/ directory
 
         Will work on existing books class attribute, so a GoodReads list should be scraped or a books list loaded
         (csv_to_books) before use.
+        :param sharded: Save covers to a hash-sharded tree (img/3f/a2/<bookId>.jpg) instead of a flat directory
+            (optional, recommended for large lists).
+        :param pack_dir: Append covers to pack files with a bookId index in this directory instead of saving one
+            file per cover (optional, read them back with coverpack.CoverPackReader).
         :return: None
         """
+        if pack_dir is not None:
+            self.__get_books_cover_packed(pack_dir)
+            return
+
         img_dir = "img"
         check_folder = os.path.isdir(img_dir)
 
@@ -754,9 +1616,117 @@ class GoodReadsScraper:
 
         # Download covers
         for book in self.books:
-            if book.get("coverImg") != "":
-                urllib.request.urlretrieve(
-                    book.get("coverImg"), "img/" + book.get("bookId") + ".jpg"
-                )
-                # Set a respectful wait time
-                time.sleep(2)
+            self.download_cover(book, sharded)
+
+    def download_cover(self, book, sharded=False):
+        """
+        Downloads the cover of a book to the img/ directory, then waits 2 seconds to be respectful.
+        :param book: The book dict.
+        :param sharded: Save the cover to a hash-sharded tree instead of a flat directory (optional).
+        :return: The book dict.
+        """
+        import urllib.request
+        from covers import shard_path
+
+        if book.get("coverImg") != "":
+            if sharded:
+                img_path = shard_path("img", book.get("bookId"), ".jpg")
+                os.makedirs(os.path.dirname(img_path), exist_ok=True)
+            else:
+                img_path = "img/" + book.get("bookId") + ".jpg"
+            urllib.request.urlretrieve(book.get("coverImg"), img_path)
+            # Set a respectful wait time
+            time.sleep(2)
+        return book
+
+    def __get_books_cover_packed(self, pack_dir):
+        import urllib.request
+
+        # Skip covers already packed on previous runs
+        packed = read_index(pack_dir)
+        print("Saving covers to packs in", pack_dir)
+
+        with CoverPackWriter(pack_dir) as writer:
+            for book in self.books:
+                if book.get("coverImg") != "" and book.get("bookId") not in packed:
+                    with urllib.request.urlopen(book.get("coverImg")) as response:
+                        writer.add(book.get("bookId"), response.read())
+                    # Set a respectful wait time
+                    time.sleep(2)
+
+    @profiled("process_books_cover")
+    def process_books_cover(
+        self, out_dir="covers", sizes=(64, 128, 256), image_format="WEBP", workers=None
+    ):
+        """
+        Generates thumbnails of the downloaded covers in a hash-sharded tree with a manifest (requires Pillow).
+
+        Covers are taken from img/ (flat or sharded, as saved by get_books_cover) for every book in books class
+        attribute. Duplicate covers (same perceptual hash) are dropped and point to the original in the manifest.
+        :param out_dir: The root directory for thumbnails and manifest.json (optional).
+        :param sizes: Thumbnail sizes in pixels (optional).
+        :param image_format: Thumbnails format, "WEBP" or "JPEG" (optional).
+        :param workers: Number of worker processes (optional, defaults to the number of CPUs).
+        :return: The manifest dict mapping bookId to image paths and checksums.
+        """
+        from covers import process_covers
+        from covers import shard_path
+
+        # Time control
+        start_time = time.time()
+
+        # Locate downloaded covers
+        sources = {}
+        for book in self.books:
+            book_id = book.get("bookId")
+            for img_path in (
+                shard_path("img", book_id, ".jpg"),
+                "img/" + book_id + ".jpg",
+            ):
+                if os.path.exists(img_path):
+                    sources[book_id] = img_path
+                    break
+
+        manifest = process_covers(sources, out_dir, sizes, image_format, workers)
+
+        # Time control
+        end_time = time.time()
+        print("--- %s seconds ---" % (round(end_time - start_time, 2)))
+        return manifest
+
+    # Define methods to build indexes over scraped books
+    def index_books_text(self, index_file="books_text.idx"):
+        """
+        Creates or incrementally updates a full-text index over titles and descriptions of books class attribute.
+
+        Run after get_books (or csv_to_books) on each crawl, only new or changed books are reindexed and books
+        no longer in books are removed.
+        :param index_file: The index file (optional).
+        :return: The updated TextIndex, use its search method for ranked queries.
+        """
+        index = TextIndex.load(index_file)
+        changed, removed = index.update(self.books)
+        index.save(index_file)
+        print(
+            "Text index: %d books, %d added or updated, %d removed"
+            % (len(index), changed, removed)
+        )
+        return index
+
+    def index_books_catalog(self, index_file="books_catalog.json"):
+        """
+        Creates or incrementally updates genre, author, award, language and series indexes with per-key
+        aggregates (count, mean rating, total ratings) over books class attribute.
+
+        Only new, changed and removed books update the indexes and aggregates.
+        :param index_file: The index file (optional).
+        :return: The updated CatalogIndex.
+        """
+        index = CatalogIndex.load(index_file)
+        changed, removed = index.update(self.books)
+        index.save(index_file)
+        print(
+            "Catalog index: %d books, %d changed, %d removed"
+            % (len(index.entries), changed, removed)
+        )
+        return index
@@ -22,7 +22,14 @@ if __name__ == '__main__':
     BBE_scraper = GoodReadsScraper(list_url, chrome_options)
     BBE_scraper.get_book_links()  # Scrape book URLs from GoodReads list
     BBE_scraper.get_books()  # Scrape book information
+#   BBE_scraper.get_books(processes=8)  # Alternative without browser, parsing pages in 8 processes
     BBE_scraper.get_books_cover()  # Download books cover images
     BBE_scraper.get_books_price()  # Get book price from IberLibro store
 #   BBE_scraper.get_books_kindle_price()  # Not run on published BBE dataset
-
+#   BBE_scraper.run_pipeline()  # Alternative to get_books, get_books_cover and get_books_price as a pipeline
+#   BBE_scraper.get_books_reviews()  # Crawl book reviews, resumable per book
+#   BBE_scraper.get_books_authors()  # Author profiles, cached in authors.db between runs
+#   BBE_scraper.get_series_books()  # Add the remaining books of each series
+#   BBE_scraper.crawl_related()  # Crawl beyond the list through related books
+#   BBE_scraper.normalize_books()  # Typed columns (ints, ISO dates, float prices, nulls) saved to Parquet
+#   BBE_scraper.export_books()  # Parquet files partitioned by language, genre and year, with a manifest
@@ -0,0 +1,180 @@
+# Import necessary libraries.
+import os
+import re
+import csv
+import sys
+import heapq
+import argparse
+from datasets import open_file
+
+# Columns of book link files (links_to_csv).
+LINK_COLUMNS = ("bookUrl", "score", "votes")
+
+# Shard rank of bookIds already written.
+_WRITTEN = -1
+_RANGE = re.compile(r"_(-?\d+)_(-?\d+)\D*$")
+_NUMBER = re.compile(r"_(-?\d+)\D*$")
+
+
+def shard_start(file):
+    """
+    Returns the list position of the first book of a shard, read from its name, e.g. 5000 for
+    books_1.Best_Books_Ever_5000_10000.csv, partial_book_scrape_5000_10000.csv or the crash save
+    broken_links_5000_7312.csv.
+
+    :param file: The shard file.
+    :return: Int, the single number of names such as broken_links_4999 (older crash saves), 0 if the name has
+        none.
+    """
+    name = os.path.basename(file)
+    match = _RANGE.search(name)
+    if match is not None:
+        return int(match.group(1))
+    match = _NUMBER.search(name)
+    if match is not None:
+        return int(match.group(1))
+    return 0
+
+
+def link_book_id(link):
+    """
+    Returns the bookId of a book link, as set by get_books.
+
+    :param link: The book link dict (bookUrl, score, votes).
+    :return: String
+    """
+    return str(link["bookUrl"]).split("/")[-1]
+
+
+def read_header(file):
+    """
+    Reads the columns of a csv shard.
+
+    :param file: The shard file (decompressed if ending in .gz or .zst).
+    :return: List of column names, empty for an empty file.
+    """
+    with open_file(file) as f:
+        return next(csv.reader(f), [])
+
+
+def read_rows(file):
+    """
+    Streams the rows of a csv shard, read as csv_to_books and csv_to_links do.
+
+    :param file: The shard file.
+    :return: Generator of row dicts.
+    """
+    with open_file(file) as f:
+        for row in csv.DictReader(f, quoting=csv.QUOTE_NONNUMERIC):
+            yield row
+
+
+def _ordered(file, rank, book_id, positions):
+    # Rows of a shard keyed by list position: shards are written in list order from their start, rows of books
+    # not in positions keep the position of the previous row
+    position = shard_start(file)
+    for i, row in enumerate(read_rows(file)):
+        if positions is not None:
+            position = positions.get(book_id(row), position)
+        yield (position, i, rank), row
+
+
+def merge_shards(files, out_file, retry_file=None, links=None):
+    """
+    Merges the shards of sharded get_books runs into one books file ordered by list position, keeping the
+    newest row of each bookId, and gathers the broken links of every shard into one retry list.
+
+    Shards are streamed: a first pass records the newest shard of each bookId (one entry per book, never the
+    rows) and a k-way merge writes rows in list order, holding one row per shard. List positions are exact
+    when the list links are given, otherwise books are ordered by shard start and row in the shard, which is
+    only approximate around broken pages and overlapping shards. Book shards
+    (books_*, partial_book_scrape_*) and link shards (broken_links_*, partial_broken_links_*) are told apart
+    by their columns, and newer means a later modification time.
+    :param files: List of shard files (csv, decompressed if ending in .gz or .zst).
+    :param out_file: The merged books file (compressed with gzip or zstd if ending in .gz or .zst).
+    :param retry_file: The file of broken links not scraped in any shard, in links_to_csv format (optional).
+    :param links: Iterable of the list book links, e.g. read_rows of the links file of get_book_links
+        (optional).
+    :return: Tuple (number of books written, number of links to retry).
+    """
+    # Oldest first, so a later shard replaces the rows of earlier ones
+    files = sorted(files, key=lambda file: (os.path.getmtime(file), file))
+    headers = [read_header(file) for file in files]
+    book_files = [f for f, header in zip(files, headers) if "bookId" in header]
+    link_files = [
+        f
+        for f, header in zip(files, headers)
+        if "bookId" not in header and "bookUrl" in header
+    ]
+
+    # Columns in order of first appearance, shards scraping other fields are padded with ""
+    columns = []
+    for header in headers:
+        if "bookId" in header:
+            columns += [c for c in header if c not in columns]
+
+    positions = None
+    if links is not None:
+        positions = {link_book_id(link): i for i, link in enumerate(links)}
+
+    # Newest shard of each bookId
+    newest = {}
+    for rank, file in enumerate(book_files):
+        for row in read_rows(file):
+            newest[row["bookId"]] = rank
+    scraped = len(newest)
+
+    with open_file(out_file, "wt") as f:
+        writer = csv.DictWriter(f, columns, restval="", quoting=csv.QUOTE_NONNUMERIC)
+        writer.writeheader()
+        streams = [
+            _ordered(file, rank, lambda row: row["bookId"], positions)
+            for rank, file in enumerate(book_files)
+        ]
+        for (_, _, rank), row in heapq.merge(*streams, key=lambda item: item[0]):
+            # Written once, from its newest shard
+            if newest[row["bookId"]] == rank:
+                newest[row["bookId"]] = _WRITTEN
+                writer.writerow(row)
+
+    retries = 0
+    if retry_file is not None:
+        with open_file(retry_file, "wt") as f:
+            writer = csv.DictWriter(
+                f,
+                LINK_COLUMNS,
+                extrasaction="ignore",
+                restval="",
+                quoting=csv.QUOTE_NONNUMERIC,
+            )
+            writer.writeheader()
+            streams = [
+                _ordered(file, rank, link_book_id, positions)
+                for rank, file in enumerate(link_files)
+            ]
+            for _, link in heapq.merge(*streams, key=lambda item: item[0]):
+                # Books scraped in any shard or already in the retry list are skipped
+                book_id = link_book_id(link)
+                if book_id not in newest:
+                    newest[book_id] = _WRITTEN
+                    writer.writerow(link)
+                    retries += 1
+    return scraped, retries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge the book and broken link shards of sharded get_books runs."
+    )
+    parser.add_argument("shards", nargs="+")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--retry", default=None)
+    parser.add_argument("--links", default=None, help="links file of the list")
+    args = parser.parse_args(argv)
+    links = None if args.links is None else read_rows(args.links)
+    books, retries = merge_shards(args.shards, args.out, args.retry, links)
+    print("%d books merged to %s, %d links to retry" % (books, args.out, retries))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# Import necessary libraries. pyarrow is required, every column is normalized with one vectorised pass.
+import csv
+import sys
+import argparse
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from datasets import open_file
+from datasets import read_books
+
+# Typed columns of a normalized books dataset (columns not listed are kept as strings).
+INT_COLUMNS = (
+    "pages",
+    "numRatings",
+    "numReviews",
+    "likedPercent",
+    "bbeScore",
+    "bbeVotes",
+)
+FLOAT_COLUMNS = ("rating", "price", "kindle_price")
+DATE_COLUMNS = ("publishDate", "firstPublishDate")
+LIST_COLUMNS = ("genres", "characters", "awards", "setting")
+INT_LIST_COLUMNS = ("ratingsByStars",)
+
+# Values standing for a missing value.
+NULL_SENTINELS = {"isbn": "9999999999999"}
+
+# Date formats found on GR pages, each applied only to values matching its pattern, e.g. "May 2001" would be
+# read as May 20th of year 1 by "%B %d %Y". Two digit years pivot at 69 (06/26/97 is 1997, 01/28/13 is 2013).
+DATE_FORMATS = (
+    (r"^[A-Za-z]+ \d{1,2} \d{4}$", "%B %d %Y"),
+    (r"^[A-Za-z]+ \d{4}$", "%B %Y"),
+    (r"^\d{4}$", "%Y"),
+    (r"^\d{1,2}/\d{1,2}/\d{2}$", "%m/%d/%y"),
+    (r"^\d{1,2}/\d{1,2}/\d{4}$", "%m/%d/%Y"),
+)
+
+_NUMBER = r"^-?\d+(\.\d+)?$"
+
+
+def _clean(column):
+    # Trimmed strings, empty strings as nulls
+    column = pc.utf8_trim_whitespace(pc.cast(column, pa.string()))
+    return pc.if_else(pc.equal(column, ""), pa.scalar(None, pa.string()), column)
+
+
+def _number(column, type_):
+    column = pc.replace_substring(_clean(column), ",", "")
+    valid = pc.match_substring_regex(column, _NUMBER)
+    column = pc.if_else(valid, column, pa.scalar(None, pa.string()))
+    return pc.cast(pc.cast(column, pa.float64()), type_)
+
+
+def to_int(column):
+    """
+    Converts a column of display strings ("1,234", "336", "1234.0") to int64, other values become nulls.
+
+    :param column: Arrow array or chunked array.
+    :return: int64 chunked array.
+    """
+    return _number(column, pa.int64())
+
+
+def to_float(column):
+    """
+    Converts a column of display strings ("4.27", "12.5") to float64, other values become nulls.
+
+    :param column: Arrow array or chunked array.
+    :return: float64 chunked array.
+    """
+    return _number(column, pa.float64())
+
+
+def to_date(column):
+    """
+    Converts a column of GR dates ("September 14th 2008", "May 2001", "1997", "06/26/97") to date32, missing
+    day or month being the first one. Other values become nulls.
+
+    :param column: Arrow array or chunked array.
+    :return: date32 chunked array.
+    """
+    column = pc.replace_substring_regex(_clean(column), r"(\d)(st|nd|rd|th)\b", r"\1")
+    parsed = []
+    for pattern, date_format in DATE_FORMATS:
+        matching = pc.if_else(
+            pc.match_substring_regex(column, pattern),
+            column,
+            pa.scalar(None, pa.string()),
+        )
+        parsed.append(
+            pc.strptime(matching, format=date_format, unit="s", error_is_null=True)
+        )
+    return pc.cast(pc.coalesce(*parsed), pa.date32())
+
+
+def to_list(column, value_type=pa.string()):
+    """
+    Converts a column of lists written as text ("['Fantasy', 'Fiction']", "[5, 4, 3]") to a list column.
+
+    String items are only split between quotes, so "['New York City, New York (United States)', 'Capitol']"
+    has two items.
+    :param column: Arrow array or chunked array, list columns are only cast.
+    :param value_type: The type of list values (optional).
+    :return: List chunked array.
+    """
+    if not pa.types.is_list(column.type):
+        text = pc.utf8_trim_whitespace(pc.cast(column, pa.string()))
+        if pa.types.is_string(value_type):
+            # Items are quoted with ' or " (items holding ')
+            inner = pc.replace_substring_regex(text, r"^\[['\"]|['\"]\]$", "")
+            split = pc.split_pattern_regex(inner, r"['\"], ['\"]")
+        else:
+            inner = pc.replace_substring_regex(text, r"^\[|\]$", "")
+            split = pc.split_pattern(inner, ", ")
+        empty = pc.or_(pc.equal(text, ""), pc.equal(text, "[]"))
+        column = pc.if_else(empty, pa.scalar([], pa.list_(pa.string())), split)
+    return pc.cast(column, pa.list_(value_type))
+
+
+def normalize_table(table):
+    """
+    Converts a books table of display strings to typed columns: ints, floats, ISO dates (date32), lists and
+    nulls for missing values.
+
+    :param table: pyarrow Table with books columns (any subset).
+    :return: pyarrow Table with the same columns, in the same order.
+    """
+    columns = []
+    for name in table.column_names:
+        column = table.column(name)
+        if name in LIST_COLUMNS + INT_LIST_COLUMNS or pa.types.is_list(column.type):
+            value_type = pa.int64() if name in INT_LIST_COLUMNS else pa.string()
+            column = to_list(column, value_type)
+        elif not pa.types.is_string(column.type):
+            # Already typed, e.g. a normalized Parquet file
+            pass
+        elif name in INT_COLUMNS:
+            column = to_int(column)
+        elif name in FLOAT_COLUMNS:
+            column = to_float(column)
+        elif name in DATE_COLUMNS:
+            column = to_date(column)
+        else:
+            column = _clean(column)
+            if name in NULL_SENTINELS:
+                column = pc.if_else(
+                    pc.equal(column, NULL_SENTINELS[name]),
+                    pa.scalar(None, pa.string()),
+                    column,
+                )
+        columns.append(column)
+    return pa.table(columns, names=table.column_names)
+
+
+def books_table(books):
+    """
+    Builds a table of strings from book dicts, e.g. GoodReadsScraper.books, with values written as books_to_csv
+    does (lists as text).
+
+    :param books: List of book dicts.
+    :return: pyarrow Table.
+    """
+    names = list(books[0].keys()) if len(books) != 0 else []
+    columns = []
+    for name in names:
+        values = [book.get(name) for book in books]
+        columns.append(
+            pa.array(["" if v is None else str(v) for v in values], pa.string())
+        )
+    return pa.table(columns, names=names)
+
+
+def read_table(file):
+    """
+    Reads a books file as a table: csv (optionally .gz or .zst compressed) as strings, Parquet as stored and
+    SQLite through datasets.read_books.
+
+    :param file: The books file.
+    :return: pyarrow Table.
+    """
+    if file.endswith(".parquet"):
+        return pq.read_table(file)
+    if file.endswith(".db") or file.endswith(".sqlite"):
+        return books_table(list(read_books(file)))
+    # Read every column as strings, pyarrow decompresses .gz and .zst files by extension
+    with open_file(file) as f:
+        names = next(csv.reader(f))
+    return pacsv.read_csv(
+        file,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=False,
+        ),
+    )
+
+
+def normalize_file(file, out_file):
+    """
+    Normalizes a books file and saves it as Parquet (typed columns).
+
+    :param file: The books file (csv, csv.gz, csv.zst, Parquet or SQLite).
+    :param out_file: The output Parquet file.
+    :return: The normalized table.
+    """
+    table = normalize_table(read_table(file))
+    pq.write_table(table, out_file, compression="zstd")
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert a books dataset to typed columns (Parquet)."
+    )
+    parser.add_argument("books")
+    parser.add_argument("out")
+    args = parser.parse_args(argv)
+    table = normalize_file(args.books, args.out)
+    print("%d books normalized to %s" % (table.num_rows, args.out))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# Import necessary libraries.
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from extractors import build_book
+from extractors import compile_specs
+from extractors import parse_page
+from fetch import fetch_bytes
+from pipeline import Pipeline
+from pipeline import Stage
+
+
+def parse_book(page, link, fields=None, encoding="utf-8"):
+    """
+    Parses a book page and builds its book entry.
+
+    :param page: The page HTML (string, or bytes).
+    :param link: The book link dict (bookUrl, score, votes).
+    :param fields: Book fields to extract (optional, see extractors.compile_specs).
+    :param encoding: The encoding of page bytes (optional).
+    :return: The book dict, None if the page is broken.
+    """
+    # Runs in a pool process, the specs are compiled once per process (XPath objects cannot be pickled)
+    document = parse_page(page, link.get("bookUrl"), encoding)
+
+    # Broken pages (book title is always present)
+    if len(document.xpath('//*[@id="bookTitle"]')) == 0:
+        return None
+    specs = compile_specs(fields)
+    return build_book(specs, specs.extract(document), link)
+
+
+class ParsePool:
+    """
+    Process pool parsing book pages, so extraction runs on all cores while pages are fetched by threads.
+
+    Pages are sent to the parsing process as the response bytes, never decoded in the parent.
+
+    Attributes:
+        processes (int): Number of parsing processes.
+    """
+
+    def __init__(self, processes=None):
+        """
+        The constructor for ParsePool class.
+
+        :param processes: Number of parsing processes (optional, defaults to one per core).
+        """
+        # One per core by default, as ProcessPoolExecutor (limited to 61 processes on Windows)
+        if processes is None:
+            processes = os.cpu_count() or 1
+            if sys.platform == "win32":
+                processes = min(processes, 61)
+        self.processes = processes
+        # Processes are started from pipeline threads while other threads fetch, forking then could deadlock
+        self._executor = ProcessPoolExecutor(
+            processes, multiprocessing.get_context("spawn")
+        )
+
+    def parse(self, page, link, fields=None, encoding="utf-8"):
+        """
+        Parses a book page in a pool process, blocking the calling thread until it is done.
+
+        :param page: The page HTML as bytes.
+        :param link: The book link dict (bookUrl, score, votes).
+        :param fields: Book fields to extract (optional, see extractors.compile_specs).
+        :param encoding: The encoding of page (optional).
+        :return: The book dict, None if the page is broken.
+        """
+        return self._executor.submit(parse_book, page, link, fields, encoding).result()
+
+    def close(self):
+        """
+        Stops the pool processes.
+
+        :return: None
+        """
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def scrape_books(
+    links,
+    fields=None,
+    workers=16,
+    processes=None,
+    queue_size=64,
+    retries=5,
+    backoff=2.0,
+):
+    """
+    Scrapes book pages without a browser: pages are fetched by threads and parsed by a ParsePool, connected by
+    a bounded queue so fetching runs ahead of parsing by at most queue_size pages.
+
+    :param links: List of book link dicts (bookUrl, score, votes).
+    :param fields: Book fields to extract (optional, see extractors.compile_specs).
+    :param workers: Number of concurrent fetches (optional).
+    :param processes: Number of parsing processes (optional, defaults to one per core).
+    :param queue_size: Number of fetched pages waiting to be parsed (optional).
+    :param retries: Number of retries of each page (optional, see fetch.fetch).
+    :param backoff: Seconds waited before the first retry of a page (optional, see fetch.fetch).
+    :return: Tuple (list of book dicts in links order, None for broken pages, list of (stage, link, exception)
+        of pages that failed).
+    """
+    books = [None] * len(links)
+    with ParsePool(processes) as pool:
+
+        def fetch_page(_, i):
+            page, charset = fetch_bytes(
+                links[i].get("bookUrl"), retries, backoff=backoff
+            )
+            return i, page, charset
+
+        def parse(_, item):
+            i, page, charset = item
+            books[i] = pool.parse(page, links[i], fields, charset)
+
+        pipeline = Pipeline(
+            [
+                Stage("fetch", fetch_page, workers),
+                # One thread per process keeps every process busy
+                Stage("parse", parse, pool.processes),
+            ],
+            queue_size,
+        )
+        pipeline.run(range(len(links)))
+    errors = []
+    for stage, item, error in pipeline.errors:
+        i = item if stage == "fetch" else item[0]
+        errors.append((stage, links[i], error))
+    return books, errors
@@ -0,0 +1,124 @@
+# Import necessary libraries.
+import queue
+import threading
+from collections import namedtuple
+
+# A pipeline stage:
+#   name: Stage name, used in progress and error reports.
+#   func: Function called as func(resource, item), returning the item passed to the next stage (None drops it).
+#   workers: Number of worker threads (the concurrency limit of the stage).
+#   setup: Function called once per worker returning its resource, e.g. a WebDriver (optional).
+#   teardown: Function called with the resource when the worker ends, e.g. to close the driver (optional).
+Stage = namedtuple("Stage", ["name", "func", "workers", "setup", "teardown"])
+Stage.__new__.__defaults__ = (1, None, None)
+
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Runs stages connected by bounded queues, so each item moves on as soon as a stage is done with it.
+
+    End-to-end time approaches the time of the slowest stage instead of the sum of all stages, and bounded
+    queues keep fast stages from running too far ahead of slow ones.
+
+    Attributes:
+        stages (list of Stage): The stages, in order.
+        queue_size (int): The capacity of the queue feeding each stage.
+        errors (list of tuple): The (stage name, item, exception) of items that failed in a stage.
+        processed (dict): Stage name -> number of items processed.
+    """
+
+    def __init__(self, stages, queue_size=32):
+        """
+        The constructor for Pipeline class.
+
+        :param stages: List of Stage.
+        :param queue_size: The capacity of the queue feeding each stage (optional).
+        """
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.errors = []
+        self.processed = {stage.name: 0 for stage in self.stages}
+        self._lock = threading.Lock()
+
+    def _work(self, stage, inbox, outbox, remaining):
+        resource = None
+        if stage.setup is not None:
+            try:
+                resource = stage.setup()
+            except Exception as e:
+                # Keep consuming so upstream stages never block, items will fail and be reported
+                with self._lock:
+                    self.errors.append((stage.name, None, e))
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                try:
+                    result = stage.func(resource, item)
+                except Exception as e:
+                    # A failed item is reported and dropped, the stage goes on
+                    with self._lock:
+                        self.errors.append((stage.name, item, e))
+                    continue
+                with self._lock:
+                    self.processed[stage.name] += 1
+                if result is not None:
+                    outbox.put(result)
+        finally:
+            if stage.teardown is not None and resource is not None:
+                try:
+                    stage.teardown(resource)
+                except Exception as e:
+                    # Reported like a failed setup, the end mark must still be passed on
+                    with self._lock:
+                        self.errors.append((stage.name, None, e))
+            # Pass the end mark on to the other workers of the stage, the last one passes it to the next stage
+            with self._lock:
+                remaining[stage.name] -= 1
+                last = remaining[stage.name] == 0
+            if last:
+                outbox.put(_DONE)
+            else:
+                inbox.put(_DONE)
+
+    def run(self, items):
+        """
+        Feeds items to the first stage and collects the results of the last one.
+
+        :param items: Iterable of items.
+        :return: List of results of the last stage, in completion order.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        results = queue.Queue()
+        queues.append(results)
+        remaining = {stage.name: stage.workers for stage in self.stages}
+
+        threads = []
+        for position, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[position], queues[position + 1], remaining),
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        # Feed the first stage (blocks while its queue is full)
+        for item in items:
+            queues[0].put(item)
+        queues[0].put(_DONE)
+
+        # Collect results until the last stage is done
+        collected = []
+        while True:
+            result = results.get()
+            if result is _DONE:
+                break
+            collected.append(result)
+        for thread in threads:
+            thread.join()
+        return collected
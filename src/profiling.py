@@ -0,0 +1,203 @@
+# Import necessary libraries.
+import os
+import sys
+import json
+import time
+import cProfile
+import functools
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+
+class _Sampler(threading.Thread):
+    # Statistical profiler: samples the stacks of every other thread at a fixed interval
+    def __init__(self, interval):
+        threading.Thread.__init__(self, daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        "%s (%s:%d)"
+                        % (
+                            code.co_name,
+                            os.path.basename(code.co_filename),
+                            code.co_firstlineno,
+                        )
+                    )
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class StageProfiler:
+    """
+    Opt-in profiler for scraper stages.
+
+    For each stage it writes to out_dir:
+        <stage>_<n>.folded: Sampled stacks in collapsed format (flamegraph.pl, speedscope, inferno), "sample" mode.
+        <stage>_<n>.prof: cProfile stats (snakeviz, flameprof, pstats), "cprofile" mode.
+        <stage>_<n>.tracemalloc: tracemalloc snapshot at the end of the stage (tracemalloc.Snapshot.load).
+    and keeps a summary (stages.json) with wall time, memory growth and time spent per extractor field.
+
+    Attributes:
+        out_dir (string): The output directory.
+        mode (string): "sample" (statistical, low overhead) or "cprofile" (deterministic).
+        interval (float): Sampling interval in seconds.
+        trace_memory (bool): Whether tracemalloc snapshots are taken.
+        extractor_timings (Counter): Field name -> seconds spent extracting it, filled by extractors.
+        summary (list of dict): The summary of each profiled stage.
+    """
+
+    def __init__(
+        self, out_dir="profiles", mode="sample", interval=0.005, trace_memory=True
+    ):
+        """
+        The constructor for StageProfiler class.
+
+        :param out_dir: The output directory (optional).
+        :param mode: "sample" or "cprofile" (optional).
+        :param interval: Sampling interval in seconds (optional).
+        :param trace_memory: Take tracemalloc snapshots per stage (optional).
+        """
+        if mode not in ("sample", "cprofile"):
+            raise ValueError("mode must be sample or cprofile")
+        self.out_dir = out_dir
+        self.mode = mode
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.extractor_timings = Counter()
+        self.summary = []
+        self._active = 0
+        self._peaks = []
+        self._lock = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Profiles the code run inside the context as a stage.
+
+        :param name: The stage name.
+        :return: Context manager.
+        """
+        prefix = os.path.join(self.out_dir, "%s_%d" % (name, len(self.summary)))
+        entry = {"stage": name, "files": []}
+        self.summary.append(entry)
+
+        # Tracing started here is stopped at the end of the stage, so it does not slow down the rest of the run
+        started = self.trace_memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(25)
+        memory_start = 0
+        if self.trace_memory:
+            # The peak is reset for this stage, the peak so far of an enclosing stage is kept on the stack
+            memory_start, peak = tracemalloc.get_traced_memory()
+            if len(self._peaks) != 0:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+
+        # cProfile cannot be nested, stages run inside another one are included in its profile
+        sampler = None
+        profile = None
+        if self.mode == "sample":
+            sampler = _Sampler(self.interval)
+            sampler.start()
+        elif self._active == 0:
+            profile = cProfile.Profile()
+            profile.enable()
+        self._active += 1
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            entry["seconds"] = round(time.perf_counter() - start, 3)
+            self._active -= 1
+            if sampler is not None:
+                sampler.stop()
+                with open(prefix + ".folded", "w") as f:
+                    for stack, count in sampler.stacks.most_common():
+                        f.write("%s %d\n" % (stack, count))
+                entry["files"].append(prefix + ".folded")
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(prefix + ".prof")
+                entry["files"].append(prefix + ".prof")
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(self._peaks.pop(), peak)
+                if len(self._peaks) != 0:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                tracemalloc.take_snapshot().dump(prefix + ".tracemalloc")
+                entry["files"].append(prefix + ".tracemalloc")
+                entry["memoryGrowthBytes"] = current - memory_start
+                entry["memoryPeakBytes"] = peak
+                if started:
+                    tracemalloc.stop()
+            self.write_summary()
+
+    def time_extractor(self, name, seconds):
+        """
+        Adds time spent extracting a field.
+
+        :param name: The field name.
+        :param seconds: The time spent.
+        :return: None
+        """
+        with self._lock:
+            self.extractor_timings[name] += seconds
+
+    def write_summary(self):
+        """
+        Writes stages.json with the summary of every stage and extractor timings.
+
+        :return: None
+        """
+        with open(os.path.join(self.out_dir, "stages.json"), "w") as f:
+            json.dump(
+                {
+                    "stages": self.summary,
+                    "extractorSeconds": {
+                        k: round(v, 4) for k, v in self.extractor_timings.most_common()
+                    },
+                },
+                f,
+                indent=1,
+            )
+
+
+def profiled(stage):
+    """
+    Decorator profiling a GoodReadsScraper method as a stage when its profiler attribute is set.
+
+    :param stage: The stage name.
+    :return: Decorator.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return method(self, *args, **kwargs)
+            with self.profiler.stage(stage):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
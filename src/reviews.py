@@ -0,0 +1,255 @@
+# Import necessary libraries.
+import os
+import sys
+import json
+import argparse
+import threading
+import urllib.parse
+from datasets import new_part
+from datasets import open_file
+from datasets import read_books
+from datasets import truncate_partial_line
+from extractors import parse_next_page
+from extractors import parse_page
+from extractors import parse_reviews
+from fetch import fetch
+from fetch import read_robots
+from fetch import robots_allowed
+from pipeline import Pipeline
+from pipeline import Stage
+
+BOOK_URL = "https://www.goodreads.com/book/show/"
+
+# Columns of the reviews output, in order.
+REVIEW_COLUMNS = (
+    "reviewId",
+    "bookId",
+    "user",
+    "userUrl",
+    "rating",
+    "date",
+    "text",
+    "likes",
+)
+
+
+def journal_file(file):
+    """
+    Returns the journal of the books whose reviews are saved in file.
+
+    :param file: The reviews file.
+    :return: The journal file name.
+    """
+    return file + ".done"
+
+
+def read_journal(file):
+    """
+    Reads the bookIds whose reviews are already saved in file.
+
+    :param file: The reviews file.
+    :return: Set of bookIds.
+    """
+    if not os.path.exists(journal_file(file)):
+        return set()
+    with open(journal_file(file)) as f:
+        return set(line.strip() for line in f if line.strip() != "")
+
+
+class ReviewSink:
+    """
+    Append-only review output: JSON lines (compressed with gzip or zstd if file ends in .gz or .zst) or Parquet
+    files of batch_size reviews. Books are written as a unit and recorded in the journal once their reviews are
+    saved and readable after a crash, so a crawl can be resumed per book.
+
+    Plain JSON lines are appended to file. Compressed streams and Parquet files cut by a crash cannot be
+    appended to, so each run of compressed output and each Parquet batch is written to a new part next to file
+    (e.g. reviews-1.jsonl.gz, reviews-2.parquet).
+
+    Attributes:
+        file (string): The reviews file.
+        batch_size (int): Number of reviews per Parquet file.
+        count (int): Number of reviews written.
+    """
+
+    def __init__(self, file, batch_size=10000):
+        """
+        The constructor for ReviewSink class.
+
+        :param file: The reviews file (.jsonl, .jsonl.gz, .jsonl.zst or .parquet, which requires pyarrow).
+        :param batch_size: Number of reviews per Parquet file (optional).
+        """
+        self.file = file
+        self.batch_size = batch_size
+        self.count = 0
+        self._lock = threading.Lock()
+        self._batch = []
+        self._pending = []
+        self._journal = open(journal_file(file), "a")
+        self._text = None
+        if file.endswith((".gz", ".zst")):
+            self._text = open_file(new_part(file), "wt")
+        elif not file.endswith(".parquet"):
+            if os.path.exists(file):
+                truncate_partial_line(file)
+            self._text = open_file(file, "at")
+
+    def write(self, book_id, reviews):
+        """
+        Writes the reviews of a book.
+
+        :param book_id: The GR bookId.
+        :param reviews: List of review dicts.
+        :return: None
+        """
+        with self._lock:
+            self.count += len(reviews)
+            self._pending.append(str(book_id))
+            if self._text is not None:
+                self._text.write("".join(json.dumps(r) + "\n" for r in reviews))
+                self._flush()
+            else:
+                self._batch.extend(reviews)
+                if len(self._batch) >= self.batch_size:
+                    self._flush()
+
+    def _flush(self):
+        if self._text is not None:
+            self._text.flush()
+        elif len(self._batch) != 0:
+            # pyarrow is only needed for Parquet output
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = pa.schema(
+                [
+                    (name, pa.int64() if name in ("rating", "likes") else pa.string())
+                    for name in REVIEW_COLUMNS
+                ]
+            )
+            # Each batch is a complete file (footer included) before its books are journaled, the temporary
+            # name starting with "_" is skipped by pyarrow.dataset readers
+            part = new_part(self.file)
+            temporary = os.path.join(
+                os.path.dirname(part), "_" + os.path.basename(part)
+            )
+            pq.write_table(
+                pa.Table.from_pylist(self._batch, schema),
+                temporary,
+                compression="zstd",
+            )
+            os.replace(temporary, part)
+            self._batch = []
+        # Books are only journaled once their reviews are saved
+        self._journal.write("".join(book_id + "\n" for book_id in self._pending))
+        self._journal.flush()
+        self._pending = []
+
+    def close(self):
+        """
+        Saves pending reviews and closes the files.
+
+        :return: None
+        """
+        with self._lock:
+            self._flush()
+            if self._text is not None:
+                self._text.close()
+            self._journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def crawl_book(book_id, max_pages=10, disallow=()):
+    """
+    Fetches the review pages of a book, following the next page link until it leads to a page already fetched
+    or disallowed by robots.txt.
+
+    :param book_id: The GR bookId.
+    :param max_pages: Maximum number of review pages (optional).
+    :param disallow: robots.txt path rules (optional, see fetch.read_robots).
+    :return: List of review dicts, without repeated reviews.
+    """
+    url = BOOK_URL + book_id
+    reviews = []
+    seen = set()
+    fetched = set()
+    pages = 0
+    while url is not None and pages < max_pages:
+        # GR links the last page to itself (href="#")
+        url = urllib.parse.urldefrag(url)[0]
+        if url in fetched or not robots_allowed(url, disallow):
+            break
+        fetched.add(url)
+        document = parse_page(fetch(url), url)
+        for review in parse_reviews(document, book_id):
+            if review["reviewId"] not in seen:
+                seen.add(review["reviewId"])
+                reviews.append(review)
+        url = parse_next_page(document)
+        pages += 1
+    return reviews
+
+
+def crawl_reviews(book_ids, file, max_pages=10, workers=4, queue_size=32, disallow=()):
+    """
+    Crawls the reviews of books concurrently and streams them to file, skipping books already in its journal
+    and books whose page is disallowed by robots.txt.
+
+    Memory is bounded by the queue size and the reviews of the books being crawled.
+    :param book_ids: Iterable of GR bookIds.
+    :param file: The reviews file (see ReviewSink).
+    :param max_pages: Maximum number of review pages per book (optional).
+    :param workers: Number of books crawled concurrently (optional).
+    :param queue_size: Number of books queued for the workers (optional).
+    :param disallow: robots.txt path rules (optional, see fetch.read_robots).
+    :return: Tuple (number of reviews written, list of (bookId, exception) of books that failed).
+    """
+    done = read_journal(file)
+    with ReviewSink(file) as sink:
+        pipeline = Pipeline(
+            [
+                Stage(
+                    "reviews",
+                    lambda _, book_id: sink.write(
+                        book_id, crawl_book(book_id, max_pages, disallow)
+                    ),
+                    workers,
+                )
+            ],
+            queue_size,
+        )
+        pipeline.run(
+            book_id
+            for book_id in book_ids
+            if str(book_id) not in done
+            and robots_allowed(BOOK_URL + str(book_id), disallow)
+        )
+    return sink.count, [(item, error) for _, item, error in pipeline.errors]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Crawl the reviews of the books of a books file."
+    )
+    parser.add_argument("books")
+    parser.add_argument("out", help=".jsonl, .jsonl.gz, .jsonl.zst or .parquet")
+    parser.add_argument("--max-pages", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+    count, errors = crawl_reviews(
+        (book["bookId"] for book in read_books(args.books)),
+        args.out,
+        args.max_pages,
+        args.workers,
+        disallow=read_robots(),
+    )
+    print("%d reviews saved to %s, %d books failed" % (count, args.out, len(errors)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
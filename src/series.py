@@ -0,0 +1,278 @@
+# Import necessary libraries.
+import os
+import json
+import threading
+from datasets import COMPRESSED_EXTENSIONS
+from datasets import new_part
+from datasets import open_file
+from datasets import parse_list
+from datasets import read_lines
+from datasets import truncate_partial_line
+from extractors import compile_specs
+from extractors import parse_page
+from extractors import parse_series_books
+from fetch import fetch
+from fetch import robots_allowed
+from pipeline import Pipeline
+from pipeline import Stage
+
+BOOK_URL = "https://www.goodreads.com/book/show/"
+
+
+def book_key(book):
+    """
+    Returns the GR numeric book ID of a bookId or book URL, e.g. "2" for "2.Harry_Potter_and_the_Order" or
+    https://www.goodreads.com/book/show/2-harry-potter, so the same book is found under any slug.
+
+    :param book: The bookId or book URL.
+    :return: String
+    """
+    return str(book).split("/")[-1].split("?")[0].split(".")[0].split("-")[0]
+
+
+class SeriesJournal:
+    """
+    Append-only JSON lines journal of a series expansion: the series of each book resolved from its page, the
+    books of each fetched series page, each book scraped and each failed fetch, so an expansion is resumed
+    without repeating requests.
+
+    A compressed stream cut by a crash cannot be appended to, so each run of a compressed journal is written
+    to a new part next to file (e.g. series-1.jsonl.gz), and every part is read when the journal is loaded.
+
+    Attributes:
+        file (string): The journal file (compressed with gzip or zstd if it ends in .gz or .zst).
+        series (dict): Series URL -> list of book URLs of the fetched series pages.
+        series_urls (dict): bookId -> series URL of the books whose page was fetched to find their series.
+        books (list of dict): The books scraped.
+        broken (list of string): The book URLs whose pages are broken.
+        failures (dict): URL -> number of failed fetches of the pages not fetched yet.
+    """
+
+    def __init__(self, file):
+        """
+        The constructor for SeriesJournal class, loads the journal and its parts if they exist.
+
+        :param file: The journal file.
+        """
+        self.file = file
+        self.series = {}
+        self.series_urls = {}
+        self.books = []
+        self.broken = []
+        self.failures = {}
+        for line in read_lines(file):
+            # A line cut by an interruption is ignored
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "seriesOf" in entry:
+                self.series_urls[entry["seriesOf"]] = entry["seriesUrl"]
+            elif "series" in entry:
+                self.series[entry["series"]] = entry["bookUrls"]
+            elif "book" in entry:
+                self.books.append(entry["book"])
+            elif "broken" in entry:
+                self.broken.append(entry["broken"])
+            elif "failed" in entry:
+                self.failures[entry["failed"]] = (
+                    self.failures.get(entry["failed"], 0) + 1
+                )
+        self._lock = threading.Lock()
+        if file.endswith(COMPRESSED_EXTENSIONS):
+            self._f = open_file(new_part(file), "wt")
+        else:
+            if os.path.exists(file):
+                truncate_partial_line(file)
+            self._f = open_file(file, "at")
+
+    def _append(self, entry):
+        with self._lock:
+            self._f.write(json.dumps(entry) + "\n")
+            self._f.flush()
+
+    def add_series(self, series_url, book_urls):
+        """
+        Records the books of a series page.
+
+        :param series_url: The series URL.
+        :param book_urls: List of book URLs.
+        :return: None
+        """
+        with self._lock:
+            self.series[series_url] = book_urls
+        self._append({"series": series_url, "bookUrls": book_urls})
+
+    def add_series_url(self, book_id, series_url):
+        """
+        Records the series of a book.
+
+        :param book_id: The GR bookId.
+        :param series_url: The series URL, "" if the book is not in a series.
+        :return: None
+        """
+        with self._lock:
+            self.series_urls[book_id] = series_url
+        self._append({"seriesOf": book_id, "seriesUrl": series_url})
+
+    def add_book(self, book):
+        """
+        Records a scraped book.
+
+        :param book: The book dict.
+        :return: None
+        """
+        with self._lock:
+            self.books.append(book)
+        self._append({"book": book})
+
+    def add_broken(self, book_url):
+        """
+        Records a broken book page.
+
+        :param book_url: The book URL.
+        :return: None
+        """
+        with self._lock:
+            self.broken.append(book_url)
+        self._append({"broken": book_url})
+
+    def add_failure(self, url):
+        """
+        Records a failed fetch of a page, which stays pending for the next runs.
+
+        :param url: The page URL.
+        :return: None
+        """
+        with self._lock:
+            self.failures[url] = self.failures.get(url, 0) + 1
+        self._append({"failed": url})
+
+    def close(self):
+        """
+        Closes the journal.
+
+        :return: None
+        """
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fetch_series_url(book_id):
+    """
+    Fetches a book page and reads the link to its series.
+
+    :param book_id: The GR bookId.
+    :return: The series URL, "" if the book is not in a series.
+    """
+    url = BOOK_URL + book_id
+    return compile_specs(["seriesUrl"]).extract(parse_page(fetch(url), url))[
+        "seriesUrl"
+    ]
+
+
+def fetch_series_books(series_url):
+    """
+    Fetches a series page and reads its books.
+
+    :param series_url: The series URL.
+    :return: List of book URLs, in series order.
+    """
+    return parse_series_books(parse_page(fetch(series_url), series_url))
+
+
+def expand_series(
+    books, known, journal, scrape, workers=4, disallow=(), max_attempts=3
+):
+    """
+    Follows the series of books and scrapes the books of each series not already known.
+
+    Series links are taken from the seriesUrl field when scraped or from the journal, book pages are only
+    fetched for other books with series text. Each series page is fetched once, however many of its books are
+    in the dataset, and series pages and books in the journal are not fetched again. Pages disallowed by
+    robots.txt are never fetched, and pages that failed are fetched again by later runs until they failed
+    max_attempts times.
+    :param books: List of book dicts (bookId, series and optionally seriesUrl).
+    :param known: Iterable of bookIds or book URLs already scraped or queued (dataset, book links).
+    :param journal: The SeriesJournal.
+    :param scrape: Function called as scrape(link) with a link dict (bookUrl, score, votes) returning the book
+        dict, None if the page is broken.
+    :param workers: Number of concurrent fetches (optional).
+    :param disallow: robots.txt path rules (optional, see fetch.read_robots).
+    :param max_attempts: Number of failed fetches after which a page is given up (optional).
+    :return: List of (stage, item, exception) of failed fetches.
+    """
+    errors = []
+
+    def pending(url):
+        return (
+            robots_allowed(url, disallow)
+            and journal.failures.get(url, 0) < max_attempts
+        )
+
+    # Series URL of each book in a series
+    series_urls = []
+    unresolved = []
+    for book in books:
+        if str(book.get("seriesUrl") or "") != "":
+            series_urls.append(book["seriesUrl"])
+        elif str(book["bookId"]) in journal.series_urls:
+            series_urls.append(journal.series_urls[str(book["bookId"])])
+        elif str(book.get("series") or "") != "":
+            if pending(BOOK_URL + str(book["bookId"])):
+                unresolved.append(str(book["bookId"]))
+
+    def resolve(_, book_id):
+        series_url = fetch_series_url(book_id)
+        journal.add_series_url(book_id, series_url)
+        return series_url
+
+    resolving = Pipeline([Stage("series_url", resolve, workers)])
+    series_urls += resolving.run(unresolved)
+    for _, book_id, _ in resolving.errors:
+        journal.add_failure(BOOK_URL + book_id)
+    errors += resolving.errors
+
+    # Fetch each series page once
+    def fetch_series(_, series_url):
+        journal.add_series(series_url, fetch_series_books(series_url))
+
+    fetching = Pipeline([Stage("series", fetch_series, workers)])
+    fetching.run(
+        url
+        for url in dict.fromkeys(series_urls)
+        if url and url not in journal.series and pending(url)
+    )
+    for _, series_url, _ in fetching.errors:
+        journal.add_failure(series_url)
+    errors += fetching.errors
+
+    # Scrape series books not in the dataset, links or journal
+    seen = set(book_key(book) for book in known)
+    seen.update(book_key(book["bookId"]) for book in journal.books)
+    seen.update(book_key(url) for url in journal.broken)
+    new_urls = []
+    for series_url in dict.fromkeys(series_urls):
+        for book_url in parse_list(journal.series.get(series_url)):
+            if book_key(book_url) not in seen and pending(book_url):
+                seen.add(book_key(book_url))
+                new_urls.append(book_url)
+
+    def scrape_series_book(_, book_url):
+        book = scrape({"bookUrl": book_url, "score": "", "votes": ""})
+        if book is None:
+            journal.add_broken(book_url)
+        else:
+            journal.add_book(book)
+
+    scraping = Pipeline([Stage("series_books", scrape_series_book, workers)])
+    scraping.run(new_urls)
+    for _, book_url, _ in scraping.errors:
+        journal.add_failure(book_url)
+    errors += scraping.errors
+    return errors
@@ -0,0 +1,332 @@
+# Import necessary libraries.
+import sys
+import json
+import time
+import asyncio
+import datetime
+import argparse
+from collections import OrderedDict
+from urllib.parse import unquote, urlsplit, parse_qs
+from datasets import parse_list
+from datasets import read_books
+from datasets import split_authors
+
+
+def _json_default(value):
+    # Dates of normalized (Parquet) datasets are served as ISO strings
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError("Object of type %s is not JSON serializable" % type(value).__name__)
+
+
+class BookStore:
+    """
+    In-memory lookup indexes over a scraped books dataset.
+
+    Attributes:
+        books (list of dict): The books, in list order (rank 1 first).
+        by_id (dict): bookId -> book.
+        by_isbn (dict): ISBN -> book.
+        by_author (dict): Lowercase author name -> list of books.
+        by_genre (dict): Lowercase genre -> list of books.
+    """
+
+    def __init__(self, books):
+        """
+        The constructor for BookStore class.
+
+        :param books: Iterable of book dicts, in list order.
+        """
+        self.books = []
+        self.by_id = {}
+        self.by_isbn = {}
+        self.by_author = {}
+        self.by_genre = {}
+        for book in books:
+            self.books.append(book)
+            self.by_id[str(book.get("bookId"))] = book
+            # Missing values are null in normalized (Parquet) datasets, never indexed as "None"
+            isbn = book.get("isbn")
+            if isbn is not None and str(isbn) not in ("", "9999999999999"):
+                self.by_isbn[str(isbn)] = book
+            for author in split_authors(book.get("author") or ""):
+                self.by_author.setdefault(author.lower(), []).append(book)
+            for genre in parse_list(book.get("genres")):
+                self.by_genre.setdefault(genre.lower(), []).append(book)
+
+    def lookup(self, kind, key):
+        """
+        Looks up books.
+
+        :param kind: One of "books" (bookId), "isbn", "authors", "genres" or "rank".
+        :param key: The value to look up.
+        :return: A book dict, a list of books or None when not found.
+        """
+        if kind == "books":
+            return self.by_id.get(key)
+        if kind == "isbn":
+            return self.by_isbn.get(key)
+        if kind == "authors":
+            return self.by_author.get(key.lower())
+        if kind == "genres":
+            return self.by_genre.get(key.lower())
+        if kind == "rank" and key.isdigit() and 0 < int(key) <= len(self.books):
+            return self.books[int(key) - 1]
+        return None
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded response bodies.
+
+    Attributes:
+        max_size (int): The maximum number of cached responses.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class BookServer:
+    """
+    Asyncio HTTP/1.1 server answering book lookups with keep-alive connections.
+
+    Routes (GET, JSON responses):
+        /books/<bookId>, /isbn/<isbn>, /rank/<n>: A single book.
+        /authors/<name>, /genres/<genre>: Books, in list order (?limit=<n>, default 100).
+
+    Attributes:
+        store (BookStore): The dataset indexes.
+        cache (ResponseCache): The LRU response cache.
+    """
+
+    def __init__(self, store, cache_size=10000):
+        """
+        The constructor for BookServer class.
+
+        :param store: The BookStore to serve.
+        :param cache_size: Number of responses kept in the LRU cache (optional).
+        """
+        self.store = store
+        self.cache = ResponseCache(cache_size)
+
+    def respond(self, target):
+        """
+        Builds the response to a request target, using the cache.
+
+        :param target: The request target (path and query).
+        :return: Tuple of (status line, body bytes).
+        """
+        cached = self.cache.get(target)
+        if cached is not None:
+            return cached
+
+        url = urlsplit(target)
+        parts = url.path.strip("/").split("/", 1)
+        result = None
+        if len(parts) == 2:
+            result = self.store.lookup(parts[0], unquote(parts[1]))
+        if result is None:
+            response = ("404 Not Found", b'{"error": "not found"}')
+        else:
+            if isinstance(result, list):
+                limit = parse_qs(url.query).get("limit", ["100"])[0]
+                result = result[: int(limit)] if limit.isdigit() else result
+            response = (
+                "200 OK",
+                json.dumps(result, default=_json_default).encode("utf-8"),
+            )
+        self.cache.put(target, response)
+        return response
+
+    async def handle(self, reader, writer):
+        """
+        Serves the requests of one connection until the client closes it or asks to.
+
+        :param reader: The connection StreamReader.
+        :param writer: The connection StreamWriter.
+        :return: None
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = not request_line.endswith(b"HTTP/1.0\r\n")
+                # Read headers
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.lower() == "connection":
+                        keep_alive = value.strip().lower() == "keep-alive"
+
+                method, target = request_line.decode("latin-1").split(" ")[:2]
+                if method != "GET":
+                    status, body = "405 Method Not Allowed", b'{"error": "GET only"}'
+                else:
+                    try:
+                        status, body = self.respond(target)
+                    except Exception as e:
+                        # Answer instead of dropping the connection, the server goes on
+                        print("Error serving %s: %r" % (target, e))
+                        status, body = (
+                            "500 Internal Server Error",
+                            b'{"error": "internal"}',
+                        )
+                writer.write(
+                    (
+                        "HTTP/1.1 %s\r\nContent-Type: application/json\r\n"
+                        "Content-Length: %d\r\nConnection: %s\r\n\r\n"
+                        % (status, len(body), "keep-alive" if keep_alive else "close")
+                    ).encode("latin-1")
+                    + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        """
+        Serves forever.
+
+        :param host: The interface to listen on (optional).
+        :param port: The port to listen on (optional).
+        :return: None
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        print("Serving %d books on http://%s:%d" % (len(self.store.books), host, port))
+        async with server:
+            await server.serve_forever()
+
+
+async def _load_client(host, port, paths, counter, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] > 0:
+            counter[0] -= 1
+            path = paths[counter[0] % len(paths)]
+            start = time.perf_counter()
+            writer.write(
+                ("GET %s HTTP/1.1\r\nHost: %s\r\n\r\n" % (path, host)).encode("latin-1")
+            )
+            await writer.drain()
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                if header.lower().startswith(b"content-length:"):
+                    length = int(header.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, paths, requests=10000, concurrency=50):
+    """
+    Runs a keep-alive load test against a running server.
+
+    :param host: The server host.
+    :param port: The server port.
+    :param paths: List of request targets, requested in turns.
+    :param requests: Total number of requests (optional).
+    :param concurrency: Number of concurrent connections (optional).
+    :return: Dict with requests/sec and latency percentiles in milliseconds (no percentiles if no request
+        completed).
+    """
+    counter = [requests]
+    latencies = []
+    start = time.perf_counter()
+    # A connection failing (refused or closed by the server) ends its client, the others go on
+    results = await asyncio.gather(
+        *[
+            _load_client(host, port, paths, counter, latencies)
+            for _ in range(concurrency)
+        ],
+        return_exceptions=True,
+    )
+    failed = sum(isinstance(result, Exception) for result in results)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    # No request completed, e.g. the server is not running
+    if len(latencies) == 0:
+        return {
+            "requests": 0,
+            "failedConnections": failed,
+            "seconds": round(elapsed, 3),
+            "requestsPerSecond": 0.0,
+        }
+
+    def percentile(p):
+        return round(
+            latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3
+        )
+
+    return {
+        "requests": len(latencies),
+        "failedConnections": failed,
+        "seconds": round(elapsed, 3),
+        "requestsPerSecond": round(len(latencies) / elapsed, 1),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "p999": percentile(0.999),
+        "max": round(latencies[-1] * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Local read API over a scraped books dataset."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser(
+        "serve", help="Serve a books dataset (csv, parquet or sqlite)."
+    )
+    serve.add_argument("file")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--cache-size", type=int, default=10000)
+    load = commands.add_parser("loadtest", help="Load test a running server.")
+    load.add_argument(
+        "paths", nargs="+", help="Request targets, e.g. /rank/1 /genres/fantasy"
+    )
+    load.add_argument("--host", default="127.0.0.1")
+    load.add_argument("--port", type=int, default=8080)
+    load.add_argument("--requests", type=int, default=10000)
+    load.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        store = BookStore(read_books(args.file))
+        asyncio.run(BookServer(store, args.cache_size).serve(args.host, args.port))
+    else:
+        report = asyncio.run(
+            load_test(args.host, args.port, args.paths, args.requests, args.concurrency)
+        )
+        print(json.dumps(report, indent=1))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
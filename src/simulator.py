@@ -0,0 +1,468 @@
+# Import necessary libraries.
+import sys
+import math
+import time
+import random
+import argparse
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+# A fault profile of the simulator:
+#   latency: Response delay distribution: ("fixed", seconds, 0), ("uniform", low, high) or ("lognormal", median,
+#            sigma), in seconds.
+#   error_rate: Share of responses answered 502 or 504 (GR crashes under load).
+#   rate_limit: Share of responses answered 429 with Retry-After.
+#   retry_after: Seconds sent in Retry-After with 429 responses.
+#   truncate_rate: Share of responses whose connection is closed halfway through the body.
+#   broken_rate: Share of book pages served with an empty <head> and no book (GR broken pages).
+#   outage: (start, duration) in seconds since the simulator started, during which every request is answered
+#           503 (None for no outage).
+FaultProfile = namedtuple(
+    "FaultProfile",
+    [
+        "latency",
+        "error_rate",
+        "rate_limit",
+        "retry_after",
+        "truncate_rate",
+        "broken_rate",
+        "outage",
+    ],
+)
+FaultProfile.__new__.__defaults__ = (("fixed", 0, 0), 0.0, 0.0, 1, 0.0, 0.0, None)
+
+# Fault profiles used by the benchmarks.
+PROFILES = {
+    "clean": FaultProfile(),
+    "latency": FaultProfile(latency=("lognormal", 0.05, 1.0)),
+    "errors": FaultProfile(error_rate=0.05),
+    "rate_limited": FaultProfile(rate_limit=0.1, retry_after=1),
+    "truncated": FaultProfile(truncate_rate=0.05),
+    "broken": FaultProfile(broken_rate=0.05),
+    "outage": FaultProfile(outage=(1, 5)),
+    "mixed": FaultProfile(
+        latency=("lognormal", 0.05, 1.0),
+        error_rate=0.02,
+        rate_limit=0.05,
+        truncate_rate=0.02,
+        broken_rate=0.02,
+    ),
+}
+
+BOOKS_PER_LIST_PAGE = 100
+
+# Book pages keep the multi-line layout of GR markup (indentation, newlines and <br> inside text), so extractors
+# reading text are tested against the whitespace the browser collapses.
+BOOK_PAGE = """<html><head><title>Book {id}</title>
+<meta charset="utf-8"/></head><body>
+<div id="metacol" class="last col">
+  <h1 id="bookTitle" class="gr-h1 gr-h1--serif" itemprop="name">
+    Book {id}
+  </h1>
+  <h2 id="bookSeries">
+    <a class="greyText" href="/series/{series}-series-{series}">
+      (Series {series} #{position})
+</a>
+  </h2>
+  <div id="bookAuthors" class="">
+    <span class='by'>by</span>
+<span itemprop='author' itemscope='' itemtype='http://schema.org/Person'>
+<div class='authorName__container'>
+<a class="authorName" itemprop="url" href="/author/show/{author}.Author_{author}"><span itemprop="name">Author {author}</span></a>
+</div>
+</span>
+  </div>
+  <div id="bookMeta" itemprop="aggregateRating" itemscope="" itemtype="http://schema.org/AggregateRating">
+    <span itemprop="ratingValue">
+  {rating}
+</span>
+    <meta itemprop="ratingCount" content="{ratings}"/>
+    <meta itemprop="reviewCount" content="{reviews}"/>
+  </div>
+  <div id="descriptionContainer">
+    <div id="description" class="readable stacked" style="right:0">
+      <span id="freeTextContainer{id}">Short description of book {id}.</span>
+      <span id="freeText{id}" style="display:none">Description of book {id}, año {year}.<br /><br />
+        Second paragraph of book {id}.</span>
+      <a data-text-id="{id}" href="#" onclick="swapContent($(this));; return false;">...more</a>
+    </div>
+  </div>
+  <div id="details" class="uitext darkGreyText">
+    <div class="row"><span itemprop="bookFormat">Paperback</span>, <span itemprop="numberOfPages">{pages} pages</span></div>
+    <div class="row">
+            Published
+        May 1st {year}
+         by Publisher
+        <nobr class="greyText">
+          (first published {year})
+        </nobr>
+    </div>
+    <div id="bookDataBox">
+      <div class="clearFloats">
+        <div class="infoBoxRowTitle">ISBN</div>
+        <div class="infoBoxRowItem">
+          <span itemprop='isbn'>{isbn}</span>
+        </div>
+      </div>
+      <div class="clearFloats">
+        <div class="infoBoxRowTitle">Edition Language</div>
+        <div class="infoBoxRowItem" itemprop='inLanguage'>English</div>
+      </div>
+      <div class="clearFloats">
+        <div class="infoBoxRowTitle">Characters</div>
+        <div class="infoBoxRowItem">
+            <a href="/characters/{id}-hero">Hero {id}</a>
+        </div>
+      </div>
+    </div>
+  </div>
+</div>
+<div class="rightContainer">
+  <div class="elementList ">
+    <div class="left">
+      <a class="actionLinkLite bookPageGenreLink" href="/genres/fiction">Fiction</a>
+    </div>
+  </div>
+  <div class="elementList ">
+    <div class="left">
+      <a class="actionLinkLite bookPageGenreLink" href="/genres/fantasy">Fantasy</a> &gt;
+      <a class="actionLinkLite bookPageGenreLink" href="/genres/magic">Magic</a>
+    </div>
+  </div>
+</div>
+<script type="text/javascript+protovis">
+  renderRatingGraph([{stars}]);
+</script>
+<img id="coverImage" alt="Book {id}" src="/covers/{id}.jpg"/>
+<div class="bookCarousel">{related}</div>
+{padding}
+</body></html>"""
+
+BROKEN_PAGE = "<html><head></head><body></body></html>"
+
+
+def book_path(i):
+    """
+    Returns the path of a simulated book page.
+
+    :param i: The book position on the list (0 indexing).
+    :return: String
+    """
+    return "/book/show/%d.Book_%d" % (i + 1, i + 1)
+
+
+class Simulator:
+    """
+    Local HTTP server serving GR-shaped list and book pages with injected faults, to test and tune the
+    browserless scraping stages offline.
+
+    Every request draws its faults from the profile, with a seeded random generator. Book pages are padded to
+    the size of GR pages, so parsing costs about as much.
+
+    Attributes:
+        profile (FaultProfile): The fault profile.
+        books (int): Number of books on the simulated list.
+        url (string): The server root URL, set by start.
+        list_url (string): The URL of the simulated list, set by start.
+        stats (dict): Number of requests, ok responses and of each fault served.
+        recovered_at (float): Seconds since start of the first ok response after the outage, None if none.
+    """
+
+    def __init__(
+        self,
+        profile=None,
+        books=1000,
+        list_name="1.Best_Books_Ever",
+        padding=200000,
+        seed=0,
+        host="127.0.0.1",
+        port=0,
+    ):
+        """
+        The constructor for Simulator class.
+
+        :param profile: The FaultProfile, or the name of one of PROFILES (optional, no faults by default).
+        :param books: Number of books on the simulated list (optional).
+        :param list_name: The name of the simulated list (optional).
+        :param padding: Approximate size in bytes of the markup added to each book page (optional).
+        :param seed: Seed of the fault random generator (optional).
+        :param host: The address the server listens on (optional).
+        :param port: The port the server listens on (optional, 0 for any free port).
+        """
+        if profile is None:
+            profile = FaultProfile()
+        elif isinstance(profile, str):
+            profile = PROFILES[profile]
+        self.profile = profile
+        self.books = books
+        self.list_name = list_name
+        self.padding = padding
+        self.url = None
+        self.list_url = None
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "errors": 0,
+            "rateLimited": 0,
+            "truncated": 0,
+            "broken": 0,
+            "outage": 0,
+        }
+        self.recovered_at = None
+        self.started = None
+        self._host = host
+        self._port = port
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._padding = self.__padding_markup(padding)
+
+    @staticmethod
+    def __padding_markup(size):
+        # Review-like markup, so the padding costs as much to parse as the rest of a GR page
+        block = (
+            '<div class="review"><a class="user" href="/user/show/1-reader">Reader</a>'
+            '<span class="staticStars" title="really liked it">4</span>'
+            '<span class="readable"><span>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</span></span>'
+            '<span class="likesCount">3 likes</span></div>\n'
+        )
+        return block * max(0, size // len(block))
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+
+        :return: Simulator
+        """
+        self._server = ThreadingHTTPServer((self._host, self._port), _Handler)
+        self._server.daemon_threads = True
+        self._server.simulator = self
+        host, port = self._server.server_address[:2]
+        self.url = "http://%s:%d" % (host, port)
+        self.list_url = self.url + "/list/show/" + self.list_name
+        self.started = time.monotonic()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving.
+
+        :return: None
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def links(self):
+        """
+        Returns the book links of the simulated list, as returned by GoodReadsScraper.get_book_links.
+
+        :return: List of dicts (bookUrl, score, votes).
+        """
+        return [
+            {
+                "bookUrl": self.url + book_path(i),
+                "score": str(self.__score(i)),
+                "votes": str(self.__score(i) // 100),
+            }
+            for i in range(self.books)
+        ]
+
+    def recovery_time(self):
+        """
+        Returns the time from the end of the outage to the first ok response after it.
+
+        :return: Seconds, None if the profile has no outage or nothing was served after it.
+        """
+        if self.profile.outage is None or self.recovered_at is None:
+            return None
+        return self.recovered_at - sum(self.profile.outage)
+
+    def __score(self, i):
+        return (self.books - i) * 1000
+
+    def __latency(self):
+        distribution, a, b = self.profile.latency
+        if distribution == "uniform":
+            return self._random.uniform(a, b)
+        if distribution == "lognormal":
+            return self._random.lognormvariate(math.log(a), b)
+        return a
+
+    def respond(self, path):
+        """
+        Draws the faults of a request and builds its response.
+
+        :param path: The request path.
+        :return: Tuple (delay in seconds, status, headers dict, body bytes, bytes sent before closing or None).
+        """
+        profile = self.profile
+        now = time.monotonic() - self.started
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.__latency()
+            draw = self._random.random()
+            broken = self._random.random() < profile.broken_rate
+
+        def fault(name, status, headers=None):
+            with self._lock:
+                self.stats[name] += 1
+            return delay, status, headers or {}, b"", None
+
+        if profile.outage is not None:
+            start, duration = profile.outage
+            if start <= now < start + duration:
+                return fault("outage", 503)
+        if draw < profile.error_rate:
+            return fault("errors", self._random.choice((502, 504)))
+        draw -= profile.error_rate
+        if draw < profile.rate_limit:
+            return fault("rateLimited", 429, {"Retry-After": str(profile.retry_after)})
+        draw -= profile.rate_limit
+
+        status, body = self.page(path, broken)
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if status != 200:
+            return delay, status, headers, body, None
+        with self._lock:
+            if broken and path.startswith("/book/show/"):
+                self.stats["broken"] += 1
+            if draw < profile.truncate_rate:
+                self.stats["truncated"] += 1
+                return delay, status, headers, body, len(body) // 2
+            self.stats["ok"] += 1
+            if profile.outage is not None and self.recovered_at is None:
+                if now >= sum(profile.outage):
+                    self.recovered_at = now
+        return delay, status, headers, body, None
+
+    def page(self, path, broken=False):
+        """
+        Builds a simulated page.
+
+        :param path: The request path: /robots.txt, /list/show/<list_name>?page=N or /book/show/<id>.
+        :param broken: Serve book pages as GR broken pages (optional).
+        :return: Tuple (status, body bytes).
+        """
+        path, _, query = path.partition("?")
+        if path == "/robots.txt":
+            return 200, b"User-agent: *\nDisallow: /search\n"
+        if path == "/list/show/" + self.list_name:
+            page = 1
+            if query.startswith("page="):
+                page = int(query[len("page=") :])
+            return 200, self.__list_page(page).encode("utf-8")
+        if path.startswith("/book/show/"):
+            try:
+                i = int(path[len("/book/show/") :].split(".")[0].split("-")[0]) - 1
+            except ValueError:
+                return 404, b""
+            if not 0 <= i < self.books:
+                return 404, b""
+            if broken:
+                return 200, BROKEN_PAGE.encode("utf-8")
+            return 200, self.__book_page(i).encode("utf-8")
+        return 404, b""
+
+    def __list_page(self, page):
+        pages = max(1, -(-self.books // BOOKS_PER_LIST_PAGE))
+        first = (page - 1) * BOOKS_PER_LIST_PAGE
+        rows = []
+        for i in range(first, min(first + BOOKS_PER_LIST_PAGE, self.books)):
+            rows.append(
+                '<tr><td><a class="bookTitle" href="%s">Book %d</a><span class="smallText uitext">'
+                "<a>score: %s</a> <a>%s people voted</a></span></td></tr>"
+                % (
+                    book_path(i),
+                    i + 1,
+                    "{:,}".format(self.__score(i)),
+                    "{:,}".format(self.__score(i) // 100),
+                )
+            )
+        pagination = "".join(
+            '<a href="/list/show/%s?page=%d">%d</a>' % (self.list_name, p, p)
+            for p in range(1, pages + 1)
+        )
+        return (
+            "<html><head><title>%s</title></head><body><table>%s</table>"
+            '<div class="pagination">%s<a href="/list/show/%s?page=%d">next</a></div></body></html>'
+            % (self.list_name, "".join(rows), pagination, self.list_name, page + 1)
+        )
+
+    def __book_page(self, i):
+        n = i + 1
+        related = "".join(
+            '<a href="%s">Book</a>' % book_path((i * 7 + k) % self.books)
+            for k in range(1, 6)
+        )
+        return BOOK_PAGE.format(
+            id=n,
+            series=n // 3,
+            position=n % 3 + 1,
+            author=n % 97,
+            rating="%.2f" % (3 + (n % 200) / 100),
+            year=1900 + n % 120,
+            isbn="978%010d" % n,
+            pages=100 + n % 700,
+            reviews=n * 3,
+            ratings=self.__score(i),
+            stars=", ".join(str(self.__score(i) // s) for s in (3, 4, 6, 12, 24)),
+            related=related,
+            padding=self._padding,
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        delay, status, headers, body, cut = self.server.simulator.respond(self.path)
+        time.sleep(delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        if cut is not None:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if cut is None:
+            self.wfile.write(body)
+        else:
+            # Truncated body: the client is promised the whole page and the connection closes halfway
+            self.wfile.write(body[:cut])
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve simulated GR pages with injected faults."
+    )
+    parser.add_argument("--profile", default="clean", choices=sorted(PROFILES))
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    with Simulator(args.profile, args.books, seed=args.seed, port=args.port) as sim:
+        print("Serving %s (%s profile)" % (sim.list_url, args.profile))
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            print(sim.stats)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
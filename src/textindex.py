@@ -0,0 +1,320 @@
+# Import necessary libraries.
+import os
+import re
+import sys
+import json
+import math
+import heapq
+import struct
+import hashlib
+import argparse
+from collections import Counter
+from datasets import read_books
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_HEADER = struct.Struct("<8sQ")
+_MAGIC = b"GRTXT001"
+
+# Title words count as many occurrences as TITLE_BOOST description words.
+TITLE_BOOST = 3
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase word tokens.
+
+    :param text: The text to tokenize.
+    :return: List of tokens.
+    """
+    return _TOKEN.findall(str(text).lower())
+
+
+def _encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_postings(data):
+    # Postings are (docno delta, term frequency) varint pairs
+    postings = []
+    docno = 0
+    value = 0
+    shift = 0
+    pending = None
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        if pending is None:
+            docno += value
+            pending = docno
+        else:
+            postings.append((pending, value))
+            pending = None
+        value = 0
+        shift = 0
+    return postings
+
+
+class TextIndex:
+    """
+    Inverted index over book titles and descriptions with varint delta-compressed postings and BM25 ranking.
+
+    Updated books get a new document number and the old one is marked deleted, so postings are only ever
+    appended. Deleted documents are dropped from postings when the index is compacted (on save, once they
+    make up a quarter of the documents).
+
+    Attributes:
+        docs (list of string): The bookId of each document number (None if deleted).
+        lengths (list of int): The number of (boosted) tokens of each document.
+        digests (dict): bookId -> digest of indexed text, to skip unchanged books on updates.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.lengths = []
+        self.digests = {}
+        self._doc_of_book = {}
+        self._postings = {}
+        self._last = {}
+        self._deleted = 0
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._doc_of_book)
+
+    def add_book(self, book):
+        """
+        Indexes a book, replacing its previous version. Unchanged books are skipped.
+
+        :param book: Book dict with bookId, title and description.
+        :return: True if the index changed.
+        """
+        book_id = str(book.get("bookId"))
+        title = book.get("title", "") or ""
+        description = book.get("description", "") or ""
+        digest = hashlib.blake2b(
+            (title + "\0" + description).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        if self.digests.get(book_id) == digest:
+            return False
+        self.remove_book(book_id)
+
+        counts = Counter(tokenize(description))
+        for token in tokenize(title):
+            counts[token] += TITLE_BOOST
+        docno = len(self.docs)
+        self.docs.append(book_id)
+        self.lengths.append(sum(counts.values()))
+        self._total_length += self.lengths[docno]
+        self.digests[book_id] = digest
+        self._doc_of_book[book_id] = docno
+        for term, frequency in counts.items():
+            postings = self._postings.setdefault(term, bytearray())
+            _encode_varint(docno - self._last.get(term, 0), postings)
+            _encode_varint(frequency, postings)
+            self._last[term] = docno
+        return True
+
+    def add_books(self, books):
+        """
+        Indexes books incrementally (e.g. the result of a delta crawl).
+
+        :param books: Iterable of book dicts.
+        :return: Number of books added or updated.
+        """
+        return sum(1 for book in books if self.add_book(book))
+
+    def update(self, books, snapshot=True):
+        """
+        Updates the index from books, touching only new, changed and removed books.
+
+        :param books: Iterable of book dicts.
+        :param snapshot: Whether books is the whole dataset, so books not in it are removed (optional).
+        :return: Tuple (changed, removed) counts.
+        """
+        seen = set()
+        changed = 0
+        for book in books:
+            seen.add(str(book.get("bookId")))
+            changed += self.add_book(book)
+        removed = 0
+        if snapshot:
+            for book_id in set(self._doc_of_book) - seen:
+                self.remove_book(book_id)
+                removed += 1
+        return changed, removed
+
+    def remove_book(self, book_id):
+        """
+        Marks a book as deleted.
+
+        :param book_id: The GR bookId.
+        :return: None
+        """
+        docno = self._doc_of_book.pop(book_id, None)
+        if docno is not None:
+            self.docs[docno] = None
+            self.digests.pop(book_id, None)
+            self._total_length -= self.lengths[docno]
+            self._deleted += 1
+
+    def search(self, query, limit=10, k1=1.2, b=0.75):
+        """
+        Ranks books by BM25 score for a query.
+
+        :param query: The query text.
+        :param limit: Maximum number of results (optional).
+        :param k1: BM25 term frequency saturation (optional).
+        :param b: BM25 length normalization (optional).
+        :return: List of (bookId, score) tuples, best first.
+        """
+        num_docs = len(self._doc_of_book)
+        if num_docs == 0:
+            return []
+        average_length = max(self._total_length / num_docs, 1)
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = [
+                (d, f)
+                for d, f in _decode_postings(self._postings.get(term, b""))
+                if self.docs[d] is not None
+            ]
+            if not postings:
+                continue
+            idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for docno, frequency in postings:
+                norm = k1 * (1 - b + b * self.lengths[docno] / average_length)
+                scores[docno] += idf * frequency * (k1 + 1) / (frequency + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.docs[docno], round(score, 4)) for docno, score in best]
+
+    def compact(self):
+        """
+        Rewrites postings without deleted documents, renumbering documents.
+
+        :return: None
+        """
+        renumber = {}
+        docs = []
+        lengths = []
+        for docno, book_id in enumerate(self.docs):
+            if book_id is not None:
+                renumber[docno] = len(docs)
+                docs.append(book_id)
+                lengths.append(self.lengths[docno])
+        postings = {}
+        last = {}
+        for term, data in self._postings.items():
+            previous = 0
+            compacted = bytearray()
+            for docno, frequency in _decode_postings(data):
+                if docno in renumber:
+                    _encode_varint(renumber[docno] - previous, compacted)
+                    _encode_varint(frequency, compacted)
+                    previous = renumber[docno]
+            if compacted:
+                postings[term] = compacted
+                last[term] = previous
+        self.docs = docs
+        self.lengths = lengths
+        self._doc_of_book = {book_id: docno for docno, book_id in enumerate(docs)}
+        self._postings = postings
+        self._last = last
+        self._deleted = 0
+
+    def save(self, file):
+        """
+        Saves the index to disk (written to a temporary file and renamed).
+
+        :param file: The index file.
+        :return: None
+        """
+        if self._deleted * 4 > len(self.docs):
+            self.compact()
+        blob = bytearray()
+        terms = {}
+        for term, data in self._postings.items():
+            terms[term] = [len(blob), len(data), self._last[term]]
+            blob += data
+        meta = json.dumps(
+            {
+                "docs": self.docs,
+                "lengths": self.lengths,
+                "digests": self.digests,
+                "terms": terms,
+            }
+        ).encode("utf-8")
+        with open(file + ".tmp", "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(meta)))
+            f.write(meta)
+            f.write(blob)
+        os.replace(file + ".tmp", file)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Loads an index saved with save, or returns an empty index if the file does not exist.
+
+        :param file: The index file.
+        :return: TextIndex
+        """
+        index = cls()
+        if not os.path.exists(file):
+            return index
+        with open(file, "rb") as f:
+            magic, meta_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(file + " is not a text index")
+            meta = json.loads(f.read(meta_length).decode("utf-8"))
+            blob = f.read()
+        index.docs = meta["docs"]
+        index.lengths = meta["lengths"]
+        index.digests = meta["digests"]
+        index._doc_of_book = {
+            book_id: docno
+            for docno, book_id in enumerate(index.docs)
+            if book_id is not None
+        }
+        index._deleted = len(index.docs) - len(index._doc_of_book)
+        index._total_length = sum(index.lengths[d] for d in index._doc_of_book.values())
+        for term, (offset, length, last) in meta["terms"].items():
+            index._postings[term] = bytearray(blob[offset : offset + length])
+            index._last[term] = last
+        return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Full-text index over book titles and descriptions."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser(
+        "update", help="Create or update an index from a books file."
+    )
+    build.add_argument("index")
+    build.add_argument("books")
+    search = commands.add_parser("search", help="Search an index.")
+    search.add_argument("index")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    index = TextIndex.load(args.index)
+    if args.command == "update":
+        changed, removed = index.update(read_books(args.books))
+        index.save(args.index)
+        print(
+            "%d books indexed (%d added or updated, %d removed)"
+            % (len(index), changed, removed)
+        )
+    else:
+        for book_id, score in index.search(args.query, args.limit):
+            print("%s\t%s" % (score, book_id))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
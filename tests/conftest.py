@@ -0,0 +1,7 @@
+# Modules of src are imported flat (from extractors import ...), as the scripts in src do.
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
@@ -0,0 +1,32 @@
+import pytest
+
+from changelog import diff_books
+from changelog import record_crawl
+
+
+def test_broken_links_are_not_removed():
+    state = {"1": {"rating": "4.1"}, "2": {"rating": "3.9"}, "3": {"rating": "4.5"}}
+    changes, new_state = diff_books(
+        state, [{"bookId": "1", "rating": "4.2"}], listed=["2"]
+    )
+    assert changes == [("1", "changed", "rating", "4.2"), ("3", "removed", None, None)]
+    assert set(new_state) == {"1", "2"}
+
+
+def test_record_crawl_keeps_state_of_listed_books(tmp_path):
+    pytest.importorskip("pyarrow")
+    changelog_dir = str(tmp_path)
+    record_crawl(
+        [{"bookId": "1", "rating": "4.1"}, {"bookId": "2", "rating": "3.9"}],
+        changelog_dir,
+    )
+    _, num_changes = record_crawl(
+        [{"bookId": "1", "rating": "4.1"}], changelog_dir, listed=["1", "2"]
+    )
+    assert num_changes == 0
+    # Scraped again, the book is neither new nor changed
+    _, num_changes = record_crawl(
+        [{"bookId": "1", "rating": "4.1"}, {"bookId": "2", "rating": "3.9"}],
+        changelog_dir,
+    )
+    assert num_changes == 0
@@ -0,0 +1,65 @@
+import pytest
+from lxml import html
+from extractors import _inner_text
+from parsepool import parse_book
+from simulator import Simulator
+
+DETAILS = """<div id="details">
+    <div class="row">
+            Published
+        September 14th 2008
+         by Scholastic Press
+        <nobr class="greyText">
+          (first published September 14th 2008)
+        </nobr>
+    </div>
+    <span id="description">Winning will make you famous.<br><br>Losing means
+      certain death.</span>
+</div>"""
+
+
+def test_inner_text_collapses_whitespace():
+    document = html.fromstring(DETAILS)
+    row = document.xpath('//div[@class="row"]')[0]
+    assert _inner_text(row) == (
+        "Published September 14th 2008 by Scholastic Press "
+        "(first published September 14th 2008)"
+    )
+
+
+def test_inner_text_breaks_lines_at_br():
+    document = html.fromstring(DETAILS)
+    description = document.xpath('//*[@id="description"]')[0]
+    assert _inner_text(description) == (
+        "Winning will make you famous.\n\nLosing means certain death."
+    )
+
+
+def test_inner_text_breaks_lines_at_blocks_once():
+    document = html.fromstring("<div> <div>a</div>\n  <div>b</div> x <b>y</b></div>")
+    assert _inner_text(document) == "a\nb\nx y"
+
+
+def test_book_page_with_gr_layout():
+    sim = Simulator(books=3, padding=0)
+    sim.url = "http://localhost"
+    _, page = sim.page("/book/show/2.Book_2")
+    link = {"bookUrl": sim.url + "/book/show/2.Book_2", "score": "1", "votes": "1"}
+    book = parse_book(page, link, ["bookId", "publisher", "publishDate", "description"])
+    assert book["publisher"] == "Publisher"
+    assert book["publishDate"] == "May 1st 1902"
+    assert book["description"] == (
+        "Description of book 2, año 1902.\n\nSecond paragraph of book 2."
+    )
+
+
+def test_publish_date_normalizes():
+    pa = pytest.importorskip("pyarrow")
+    from normalize import to_date
+
+    sim = Simulator(books=3, padding=0)
+    sim.url = "http://localhost"
+    _, page = sim.page("/book/show/2.Book_2")
+    link = {"bookUrl": sim.url + "/book/show/2.Book_2", "score": "1", "votes": "1"}
+    book = parse_book(page, link, ["bookId", "publishDate"])
+    assert to_date(pa.array([book["publishDate"]])).to_pylist()[0].year == 1902
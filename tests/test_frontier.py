@@ -0,0 +1,34 @@
+import json
+
+from datasets import read_lines
+from frontier import Frontier
+from frontier import crawl
+
+BOOK_URL = "https://www.goodreads.com/book/show/"
+
+
+def scrape(link):
+    book_id = link["bookUrl"].split("/")[-1]
+    return {"bookId": book_id, "relatedUrls": [BOOK_URL + book_id + "0"]}
+
+
+def test_compressed_output_of_each_run_is_a_new_part(tmp_path):
+    out_file = str(tmp_path / "crawl.jsonl.gz")
+    with Frontier(str(tmp_path / "frontier.db")) as frontier:
+        frontier.push([{"bookUrl": BOOK_URL + "1", "score": "", "votes": ""}], 0)
+        crawl(frontier, scrape, out_file, max_pages=2, workers=1)
+    # A crash cuts the first run before its stream ends
+    with open(out_file, "rb") as f:
+        data = f.read()
+    with open(out_file, "wb") as f:
+        f.write(data[:-8])
+    with Frontier(str(tmp_path / "frontier.db")) as frontier:
+        crawl(frontier, scrape, out_file, max_pages=3, workers=1)
+
+    assert (tmp_path / "crawl-1.jsonl.gz").exists()
+    books = [json.loads(line) for line in read_lines(out_file)]
+    assert [(book["bookId"], book["depth"]) for book in books] == [
+        ("1", 0),
+        ("10", 1),
+        ("100", 2),
+    ]
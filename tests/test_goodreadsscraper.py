@@ -0,0 +1,92 @@
+from goodreadsscraper import GoodReadsScraper
+
+LIST_URL = "https://www.goodreads.com/list/show/1.Best_Books_Ever"
+
+
+class FakeDriver:
+    def close(self):
+        pass
+
+
+def crashing_scraper(books):
+    # Scrapes the given books, then GR keeps failing
+    scraper = GoodReadsScraper(LIST_URL)
+    scraper.robots_disallow = []
+    scraper.book_links = [
+        {
+            "bookUrl": "https://www.goodreads.com/book/show/%d" % i,
+            "score": 1,
+            "votes": 1,
+        }
+        for i in range(5)
+    ]
+    scraper._GoodReadsScraper__new_driver = FakeDriver
+    scraped = iter(books)
+
+    def scrape_book(driver, link, specs, in_browser=False):
+        book = next(scraped, None)
+        if book is None:
+            raise RuntimeError("Cannot load " + link["bookUrl"])
+        return book
+
+    scraper.scrape_book = scrape_book
+    return scraper
+
+
+def test_crash_save_with_no_book(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scraper = crashing_scraper([])
+    scraper.get_books()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["broken_links_0_0.csv"]
+
+
+def test_crash_save_names_the_scraped_range(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scraper = crashing_scraper([{"bookId": "0"}, {"bookId": "1"}])
+    scraper.get_books(start_=0)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "books_0_2.csv",
+        "broken_links_0_2.csv",
+        "partial_book_scrape_0_5.csv",
+        "partial_broken_links_0_5.csv",
+    ]
+
+
+class FakeTab:
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    async def new_tab(self):
+        return FakeTab()
+
+
+def test_cdp_stops_and_saves_when_pages_do_not_load(tmp_path, monkeypatch):
+    import asyncio
+    import cdpbrowser
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        cdpbrowser,
+        "run",
+        lambda main, scripts=(), **options: asyncio.run(main(FakeBrowser())),
+    )
+    scraper = crashing_scraper([])
+    scraper.backend = "cdp"
+
+    async def scrape_book_tab(tab, link, specs):
+        book_id = link["bookUrl"].split("/")[-1]
+        if book_id == "1":
+            return None
+        if book_id == "3":
+            raise RuntimeError("Cannot load " + link["bookUrl"])
+        return {"bookId": book_id}
+
+    scraper.scrape_book_tab = scrape_book_tab
+    scraper.get_books()
+    # The page that did not load is not a broken link, the output is a crash save
+    assert [book["bookId"] for book in scraper.books] == ["0", "2", "4"]
+    assert [link["bookUrl"][-1] for link in scraper.broken] == ["1"]
+    assert "books_0_5.csv" in [p.name for p in tmp_path.iterdir()]
+    assert not (tmp_path / "books_1.Best_Books_Ever_0_5.csv").exists()
@@ -0,0 +1,37 @@
+import reviews
+
+PAGE = """<html><body><div id="bookReviews">
+<div id="review_%d"><a class="user" href="/user/show/1-reader">Reader</a></div>
+</div><div id="reviews"><a class="next_page" href="%s">next</a></div></body></html>"""
+
+
+def fake_fetch(pages, fetched):
+    def fetch(url):
+        fetched.append(url)
+        return pages[url]
+
+    return fetch
+
+
+def test_crawl_book_stops_on_a_self_link(monkeypatch):
+    url = reviews.BOOK_URL + "1"
+    pages = {url: PAGE % (1, "?page=2"), url + "?page=2": PAGE % (2, "#")}
+    fetched = []
+    monkeypatch.setattr(reviews, "fetch", fake_fetch(pages, fetched))
+    book_reviews = reviews.crawl_book("1", max_pages=10)
+    assert [review["reviewId"] for review in book_reviews] == ["1", "2"]
+    assert fetched == [url, url + "?page=2"]
+
+
+def test_crawl_reviews_skips_disallowed_pages(tmp_path, monkeypatch):
+    url = reviews.BOOK_URL + "1"
+    pages = {url: PAGE % (1, "?page=2"), reviews.BOOK_URL + "2": PAGE % (2, "#")}
+    fetched = []
+    monkeypatch.setattr(reviews, "fetch", fake_fetch(pages, fetched))
+    count, errors = reviews.crawl_reviews(
+        ["1", "2", "3"],
+        str(tmp_path / "reviews.jsonl"),
+        disallow=["/book/show/3", "/*?page="],
+    )
+    assert (count, errors) == (2, [])
+    assert sorted(fetched) == [url, reviews.BOOK_URL + "2"]
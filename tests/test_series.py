@@ -0,0 +1,40 @@
+import os
+import shutil
+
+import pytest
+
+from series import SeriesJournal
+
+
+@pytest.mark.parametrize("extension", [".jsonl", ".jsonl.gz", ".jsonl.zst"])
+def test_journal_resumes_after_a_crash(tmp_path, extension):
+    if extension.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    file = str(tmp_path / ("series" + extension))
+    crashed = str(tmp_path / "crashed")
+    journal = SeriesJournal(file)
+    for i in range(100):
+        journal.add_book({"bookId": str(i)})
+    # Interrupted before closing, the last entry is half written
+    shutil.copy(file, crashed)
+    journal.close()
+    with open(crashed, "rb") as f:
+        data = f.read()
+    with open(file, "wb") as f:
+        f.write(data[:-5])
+
+    with SeriesJournal(file) as journal:
+        # Entries written before the cut are read
+        resumed = len(journal.books)
+        assert 90 < resumed <= 100
+        assert [book["bookId"] for book in journal.books] == [
+            str(i) for i in range(resumed)
+        ]
+        for i in range(resumed, 100):
+            journal.add_book({"bookId": str(i)})
+        journal.add_broken("https://www.goodreads.com/book/show/100")
+    journal = SeriesJournal(file)
+    journal.close()
+    assert [book["bookId"] for book in journal.books] == [str(i) for i in range(100)]
+    assert journal.broken == ["https://www.goodreads.com/book/show/100"]
+    assert len(os.listdir(tmp_path)) == (2 if extension == ".jsonl" else 4)
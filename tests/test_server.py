@@ -0,0 +1,21 @@
+import asyncio
+from server import BookStore
+from server import load_test
+
+
+def test_null_isbn_and_author_not_indexed():
+    store = BookStore(
+        [
+            {"bookId": "1", "isbn": None, "author": None, "genres": []},
+            {"bookId": "2", "isbn": "123", "author": "A", "genres": ["Fantasy"]},
+        ]
+    )
+    assert list(store.by_isbn) == ["123"]
+    assert list(store.by_author) == ["a"]
+
+
+def test_load_test_without_server():
+    # Port 9 (discard) is closed: every connection is refused
+    report = asyncio.run(load_test("127.0.0.1", 9, ["/rank/1"], 10, 2))
+    assert report["requests"] == 0
+    assert report["failedConnections"] == 2
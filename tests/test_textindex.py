@@ -0,0 +1,22 @@
+from textindex import TextIndex
+
+
+def test_update_removes_books_missing_from_snapshot(tmp_path):
+    index = TextIndex()
+    index.update(
+        [
+            {"bookId": "1", "title": "Dragon Tales", "description": ""},
+            {"bookId": "2", "title": "Dragon Riders", "description": ""},
+        ]
+    )
+    assert index.update([{"bookId": "1", "title": "Dragon Tales"}]) == (0, 1)
+    index.save(str(tmp_path / "books.idx"))
+    index = TextIndex.load(str(tmp_path / "books.idx"))
+    assert [book_id for book_id, _ in index.search("dragon")] == ["1"]
+
+
+def test_update_without_snapshot_keeps_books():
+    index = TextIndex()
+    index.update([{"bookId": "1", "title": "Dragon Tales", "description": ""}])
+    assert index.update([], snapshot=False) == (0, 0)
+    assert len(index) == 1